@@ -0,0 +1,461 @@
+"""
+Offline benchmark harness for the data generation pipeline.
+
+Runs DataGenerator.generate_and_save end-to-end against the local mock LLM
+server (src/mock_llm_server.py) and a local Redis, so throughput can be
+measured without API keys, network variance or cost.
+
+Reported per scale:
+- users/sec and events/sec (wall clock of the whole run)
+- p50 / p99 latency of individual LLM calls (client side)
+- p50 time to the first validated event of a call (streaming mode only)
+- time spent writing to Redis
+- responses with no recoverable JSON (parse failures) and responses that
+  were not strict JSON but were recovered (retries avoided)
+
+The `parse` command is a micro-benchmark of JSON extraction alone, run over
+a corpus of LLM responses (benchmarks/llm_responses.jsonl) and compared with
+the previous bracket-counting parser. The `validation` command compares
+per-record model construction with the batch TypeAdapter and trusted
+read-back paths.
+
+Usage:
+    python -m src.bench run --scales 10,50,100 --concurrency 16
+    python -m src.bench run --providers openai,deepseek --rate-limit-rate 0.05
+    python -m src.bench run --invalid-json-rate 0.2 --structured-output json_schema
+    python -m src.bench parse --iterations 2000
+    python -m src.bench validation --records 2000
+
+The benchmark uses its own Redis database (--redis-db, default 15) and
+clears it before every scale, so it never touches the main dataset.
+"""
+
+import contextlib
+import gc
+import io
+import json
+import re
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import click
+
+from .config_loader import ConfigLoader
+from .database import RedisManager
+from .data_generator import DataGenerator
+from .data_models import User, CalendarEvent, USER_LIST_ADAPTER, EVENT_LIST_ADAPTER, TIMESTAMPS_NORMALIZED
+from .event_store import EventStore
+from .json_extractor import extract_json, salvage_array
+from .mock_llm_server import MockBehavior, MockLLMServer, STRUCTURED_OUTPUT_LEVELS
+from .time_normalizer import EventTimeNormalizer
+
+
+def configure_for_mock(config_loader: ConfigLoader, providers: List[str], base_url: str,
+                       redis_db: int, output_dir: str, streaming: bool = False,
+                       structured_output: str = 'none'):
+    """Point the given providers at the mock server and isolate all outputs."""
+    api_config = config_loader.config.setdefault('api', {})
+    for provider in ('openai', 'deepseek'):
+        provider_config = api_config.setdefault(provider, {})
+        if provider in providers:
+            provider_config['api_key'] = 'mock-key'
+            provider_config['base_url'] = base_url
+            provider_config['structured_output'] = structured_output
+            # The mock has no quota; only AIMD concurrency bounds apply
+            provider_config['rate_limit'] = {
+                'requests_per_minute': None,
+                'tokens_per_minute': None,
+                'max_concurrency': 256,
+                'min_concurrency': 1
+            }
+        else:
+            provider_config.pop('api_key', None)
+    
+    config_loader.config.setdefault('database', {}).setdefault('redis', {})['db'] = redis_db
+    config_loader.config.setdefault('cache', {})['enabled'] = False
+    generation = config_loader.config.setdefault('generation', {})
+    generation['streaming'] = streaming
+    generation.setdefault('output', {})['directory'] = output_dir
+
+
+def run_scale(config_loader: ConfigLoader, redis_manager: RedisManager, users: int,
+              concurrency: int, verbose: bool = False, seed: int = None) -> Dict[str, Any]:
+    """Run one generate_and_save at the given scale and collect metrics.
+    
+    With a seed, the generator and the mock payloads are seeded, so every
+    run of the same command writes the same records.
+    """
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    
+    with output:
+        redis_manager.clear_all_data()
+        generator = DataGenerator(config_loader, redis_manager, seed=seed)
+        started = time.perf_counter()
+        results = generator.generate_and_save(users, concurrency=concurrency)
+        elapsed = time.perf_counter() - started
+    
+    stats = generator.stats
+    return {
+        'users': results['users_generated'],
+        'events': results['events_generated'],
+        'seconds': round(elapsed, 3),
+        'users_per_sec': round(results['users_generated'] / elapsed, 2),
+        'events_per_sec': round(results['events_generated'] / elapsed, 2),
+        'api_calls': results['api_calls'],
+        'failed': results['failed_generations'],
+        'parse_failures': results['parse_failures'],
+        'retries_avoided': results['retries_avoided'],
+        'truncated': results['truncated_responses'],
+        'p50_call_ms': round((stats.latency_percentile(50) or 0) * 1000, 1),
+        'p99_call_ms': round((stats.latency_percentile(99) or 0) * 1000, 1),
+        'p50_first_event_ms': round((stats.latency_percentile(50, first_record=True) or 0) * 1000, 1),
+        'redis_write_ms': round(results['redis_write_seconds'] * 1000, 1)
+    }
+
+
+DEFAULT_CORPUS = Path(__file__).parent.parent / "benchmarks" / "llm_responses.jsonl"
+
+
+def legacy_parse(response: str) -> Any:
+    """The previous LLMClient._parse_json_response (baseline for `parse`).
+    
+    Counts brackets character by character without tracking strings, so a
+    bracket inside a value ends the match early.
+    """
+    response = response.strip()
+    if response.startswith('```json'):
+        response = response[7:]
+    if response.startswith('```'):
+        response = response[3:]
+    if response.endswith('```'):
+        response = response[:-3]
+    response = response.strip()
+    
+    markers = [('{', '}'), ('[', ']')]
+    markers.sort(key=lambda pair: response.find(pair[0]) if pair[0] in response else len(response))
+    for start_marker, end_marker in markers:
+        start_idx = response.find(start_marker)
+        if start_idx != -1:
+            bracket_count = 0
+            for i, char in enumerate(response[start_idx:], start_idx):
+                if char == start_marker:
+                    bracket_count += 1
+                elif char == end_marker:
+                    bracket_count -= 1
+                    if bracket_count == 0:
+                        response = response[start_idx:i+1]
+                        break
+            break
+    
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        try:
+            return json.loads(re.sub(r',(\s*[}\]])', r'\1', response))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON response from LLM: {str(e)[:100]}")
+
+
+def salvage_parse(response: str) -> Any:
+    """The generator's path: strict JSON, then truncated-array salvage, then extract_json."""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        pass
+    items, closed = salvage_array(response)
+    if items and not closed:
+        return items
+    return extract_json(response)
+
+
+def count_records(value: Any) -> int:
+    """Number of records a parsed response yields (list items or one object)."""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        # {"events": [...]}-style wrappers count as one record here
+        return 1
+    return 0
+
+
+def bench_parser(parser: Callable[[str], Any], corpus: List[Dict[str, Any]], iterations: int) -> Dict[str, Any]:
+    """Time a parser over the corpus and count responses parsed as expected."""
+    outcomes = {}
+    for case in corpus:
+        try:
+            outcomes[case['name']] = count_records(parser(case['response']))
+        except ValueError:
+            outcomes[case['name']] = 0
+    
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for case in corpus:
+            try:
+                parser(case['response'])
+            except ValueError:
+                pass
+    elapsed = time.perf_counter() - started
+    
+    return {
+        'correct': sum(1 for case in corpus if outcomes[case['name']] == case['expected_records']),
+        'outcomes': outcomes,
+        'us_per_parse': round(elapsed / (iterations * len(corpus)) * 1e6, 2)
+    }
+
+
+@click.group()
+def cli():
+    """Benchmarks for the calendar data generator (fully offline)."""
+    pass
+
+
+@cli.command()
+@click.option('--scales', default='10,50,100', help='Comma-separated user counts to benchmark')
+@click.option('--concurrency', '-c', default=16, type=int, help='Max concurrent LLM calls')
+@click.option('--providers', default='deepseek', help='Providers routed to the mock (comma-separated)')
+@click.option('--latency', type=click.Choice(['fixed', 'uniform', 'lognormal']), default='lognormal')
+@click.option('--latency-ms', default=300.0, type=float, help='Fixed/mean/median call latency in ms')
+@click.option('--latency-spread', default=0.5, type=float, help='Uniform half-width fraction or lognormal sigma')
+@click.option('--error-rate', default=0.0, type=float, help='Fraction of HTTP 500 responses')
+@click.option('--rate-limit-rate', default=0.0, type=float, help='Fraction of HTTP 429 responses')
+@click.option('--invalid-json-rate', default=0.0, type=float, help='Fraction of broken JSON completions')
+@click.option('--truncation-rate', default=0.0, type=float, help='Fraction of completions cut off by max_tokens')
+@click.option('--seed', default=None, type=int, help='Seed for the mock payloads and the generator (same records every run)')
+@click.option('--streaming/--no-streaming', default=False, help='Stream event completions')
+@click.option('--structured-output', type=click.Choice(['json_schema', 'json_object', 'none']), default='none',
+              help='response_format mode requested by the clients')
+@click.option('--mock-structured-output', type=click.Choice(list(STRUCTURED_OUTPUT_LEVELS)),
+              default='json_schema', help='Most capable mode the mock accepts (tests the fallback)')
+@click.option('--redis-db', default=15, type=int, help='Redis database used (cleared before each scale)')
+@click.option('--output', '-o', default=None, type=click.Path(), help='Write results as JSON to this file')
+@click.option('--verbose', is_flag=True, help='Show generator output')
+def run(scales, concurrency, providers, latency, latency_ms, latency_spread, error_rate,
+        rate_limit_rate, invalid_json_rate, truncation_rate, seed, streaming, structured_output, mock_structured_output,
+        redis_db, output, verbose):
+    """Benchmark generate_and_save against the mock LLM server."""
+    scale_list = [int(s) for s in scales.split(',') if s.strip()]
+    provider_list = [p.strip() for p in providers.split(',') if p.strip()]
+    behavior = MockBehavior(latency, latency_ms, latency_spread, error_rate, rate_limit_rate,
+                            invalid_json_rate=invalid_json_rate, seed=seed,
+                            structured_output=mock_structured_output, truncation_rate=truncation_rate)
+    
+    rows = []
+    with MockLLMServer(behavior) as server, tempfile.TemporaryDirectory() as output_dir:
+        config_loader = ConfigLoader()
+        configure_for_mock(config_loader, provider_list, server.base_url, redis_db, output_dir, streaming,
+                           structured_output)
+        redis_manager = RedisManager(config_loader.get_database_config())
+        
+        click.echo(f" Mock server: {server.base_url} ({latency}, {latency_ms:.0f}ms)")
+        click.echo(f" Providers: {', '.join(provider_list)} | concurrency: {concurrency} | "
+                   f"streaming: {'on' if streaming else 'off'} | structured output: {structured_output} | "
+                   f"Redis db: {redis_db}")
+        click.echo("")
+        header = f"{'users':>7} {'events':>7} {'sec':>8} {'users/s':>9} {'events/s':>9} {'calls':>6} " \
+                 f"{'fail':>5} {'unparsed':>9} {'salvaged':>9} {'cut off':>8} {'p50 ms':>8} {'p99 ms':>8} " \
+                 f"{'1st ev ms':>10} {'redis ms':>9}"
+        click.echo(header)
+        click.echo("-" * len(header))
+        
+        for users in scale_list:
+            row = run_scale(config_loader, redis_manager, users, concurrency, verbose, seed)
+            rows.append(row)
+            click.echo(f"{row['users']:>7} {row['events']:>7} {row['seconds']:>8.2f} {row['users_per_sec']:>9.2f} "
+                       f"{row['events_per_sec']:>9.2f} {row['api_calls']:>6} {row['failed']:>5} "
+                       f"{row['parse_failures']:>9} {row['retries_avoided']:>9} {row['truncated']:>8} "
+                       f"{row['p50_call_ms']:>8.1f} {row['p99_call_ms']:>8.1f} {row['p50_first_event_ms']:>10.1f} "
+                       f"{row['redis_write_ms']:>9.1f}")
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            redis_manager.clear_all_data()
+    
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'concurrency': concurrency, 'providers': provider_list, 'streaming': streaming,
+                       'structured_output': structured_output, 'results': rows}, f, indent=2)
+        click.echo(f"\n Results written to {output}")
+
+
+@cli.command()
+@click.option('--corpus', default=str(DEFAULT_CORPUS), type=click.Path(exists=True),
+              help='JSONL file of {"name", "response", "expected_records"} cases')
+@click.option('--iterations', default=1000, type=int, help='Passes over the corpus per parser')
+@click.option('--verbose', is_flag=True, help='Show per-case record counts')
+def parse(corpus, iterations, verbose):
+    """Micro-benchmark JSON extraction from LLM responses."""
+    with open(corpus, encoding='utf-8') as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    
+    results = {
+        'legacy': bench_parser(legacy_parse, cases, iterations),
+        'extract_json': bench_parser(extract_json, cases, iterations),
+        'salvage': bench_parser(salvage_parse, cases, iterations)
+    }
+    
+    click.echo(f" Corpus: {corpus} ({len(cases)} responses, {iterations} iterations)")
+    click.echo("")
+    click.echo(f"{'parser':>14} {'correct':>9} {'us/parse':>10}")
+    for name, result in results.items():
+        click.echo(f"{name:>14} {result['correct']:>5}/{len(cases):<3} {result['us_per_parse']:>10.2f}")
+    
+    if verbose:
+        click.echo("")
+        click.echo(f"{'case':<26} {'expected':>8} {'legacy':>7} {'new':>5} {'salvage':>8}")
+        for case in cases:
+            click.echo(f"{case['name']:<26} {case['expected_records']:>8} "
+                       f"{results['legacy']['outcomes'][case['name']]:>7} "
+                       f"{results['extract_json']['outcomes'][case['name']]:>5} "
+                       f"{results['salvage']['outcomes'][case['name']]:>8}")
+
+
+def time_per_record(func: Callable[[], Any], records: int, repeat: int) -> float:
+    """Best-of-`repeat` time of func(), in microseconds per record."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best / records * 1e6
+
+
+@cli.command()
+@click.option('--records', default=2000, type=int, help='Users and events per measurement')
+@click.option('--repeat', default=5, type=int, help='Runs per measurement (best is reported)')
+@click.option('--seed', default=0, type=int, help='Seed for the generated records')
+def validation(records, repeat, seed):
+    """Micro-benchmark model validation: per record vs batch vs trusted read-back."""
+    behavior = MockBehavior(seed=seed)
+    user_json = json.dumps(behavior.make_users(records))
+    event_json = json.dumps(behavior.make_events(records))
+    context = {'user_id': 'user_bench'}
+    
+    # What RedisManager reads back: flat string hashes
+    with contextlib.redirect_stdout(io.StringIO()):
+        stored_users = [RedisManager._to_redis_hash(u.model_dump())
+                        for u in USER_LIST_ADAPTER.validate_json(user_json)]
+        stored_events = [RedisManager._to_redis_hash(e.model_dump())
+                         for e in EVENT_LIST_ADAPTER.validate_json(event_json, context=context)]
+    
+    def per_record_users():
+        return [User(**data) for data in json.loads(user_json)]
+    
+    def per_record_events():
+        return [CalendarEvent(**{**data, 'user_id': 'user_bench'}) for data in json.loads(event_json)]
+    
+    normalizer = EventTimeNormalizer.from_config({})
+    normalized_context = {**context, TIMESTAMPS_NORMALIZED: True}
+    
+    def normalized_events():
+        # What the generator does per response: batch timestamp normalization, then batch validation
+        records, _ = normalizer.normalize(json.loads(event_json), 'America/New_York')
+        return EVENT_LIST_ADAPTER.validate_python(records, context=normalized_context)
+    
+    def read_back_users(trusted: bool):
+        if trusted:
+            return [User.from_trusted(data) for data in stored_users]
+        return [User.model_validate({**data, 'preferences': json.loads(data['preferences'])}) for data in stored_users]
+    
+    def read_back_events(trusted: bool):
+        if trusted:
+            return [CalendarEvent.from_trusted(data) for data in stored_events]
+        return [CalendarEvent.model_validate({**data, 'attendees': json.loads(data.get('attendees', '[]'))})
+                for data in stored_events]
+    
+    rows = [
+        ('users', 'json.loads + User(**d)', time_per_record(per_record_users, records, repeat)),
+        ('users', 'USER_LIST_ADAPTER.validate_json', 
+         time_per_record(lambda: USER_LIST_ADAPTER.validate_json(user_json), records, repeat)),
+        ('events', 'json.loads + CalendarEvent(**d)', time_per_record(per_record_events, records, repeat)),
+        ('events', 'EVENT_LIST_ADAPTER.validate_json',
+         time_per_record(lambda: EVENT_LIST_ADAPTER.validate_json(event_json, context=context), records, repeat)),
+        ('events', 'normalize times + validate_python', time_per_record(normalized_events, records, repeat)),
+        ('read users', 'model_validate', time_per_record(lambda: read_back_users(False), records, repeat)),
+        ('read users', 'from_trusted', time_per_record(lambda: read_back_users(True), records, repeat)),
+        ('read events', 'model_validate', time_per_record(lambda: read_back_events(False), records, repeat)),
+        ('read events', 'from_trusted', time_per_record(lambda: read_back_events(True), records, repeat)),
+    ]
+    
+    click.echo(f" {records} records, best of {repeat}")
+    click.echo("")
+    click.echo(f"{'stage':<12} {'method':<34} {'us/record':>10}")
+    for stage, method, us in rows:
+        click.echo(f"{stage:<12} {method:<34} {us:>10.2f}")
+
+
+def make_stamped_events(count: int, seed: int) -> List[CalendarEvent]:
+    """Validated events spread over a year and 1% as many users, stamped like the generator does."""
+    behavior = MockBehavior(seed=seed)
+    events = []
+    for i, data in enumerate(behavior.make_events(count)):
+        day = timedelta(days=i % 365)
+        for field in ('start_time', 'end_time'):
+            data[field] = (datetime.fromisoformat(data[field]) + day).isoformat()
+        event = CalendarEvent.model_validate(data, context={'user_id': f"user_{i % max(1, count // 100):06d}"})
+        event.event_id = f"event_{uuid.uuid4().hex[:8]}"
+        event.created_at = datetime.now()
+        events.append(event)
+    return events
+
+
+def best_seconds(func: Callable[[], Any], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@cli.command()
+@click.option('--events', 'count', default=100000, type=int, help='Events held in memory')
+@click.option('--repeat', default=3, type=int, help='Runs per timing (best is reported)')
+@click.option('--seed', default=0, type=int, help='Seed for the generated events')
+def store(count, repeat, seed):
+    """Compare a list of CalendarEvent models with the columnar EventStore."""
+    gc.collect()
+    tracemalloc.start()
+    events = make_stamped_events(count, seed)
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    
+    event_store = EventStore()
+    event_store.extend(events)
+    del events
+    gc.collect()
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    events = list(event_store.iter_events())
+    range_start = datetime(2025, 3, 1)
+    range_end = datetime(2025, 4, 1)
+    
+    rows = [
+        ('sort by start', 'sorted(models)',
+         best_seconds(lambda: sorted(events, key=lambda e: e.start_time), repeat)),
+        ('sort by start', 'EventStore.sorted_by_start',
+         best_seconds(event_store.sorted_by_start, repeat)),
+        ('range filter', 'list comprehension',
+         best_seconds(lambda: [e for e in events if range_start <= e.start_time < range_end], repeat)),
+        ('range filter', 'EventStore.in_range',
+         best_seconds(lambda: event_store.in_range(range_start, range_end), repeat)),
+        ('export JSON', 'model_dump_json',
+         best_seconds(lambda: [e.model_dump_json() for e in events], repeat)),
+        ('export JSON', 'EventStore.iter_json',
+         best_seconds(lambda: list(event_store.iter_json()), repeat)),
+    ]
+    
+    click.echo(f" {count} events, best of {repeat}")
+    click.echo(f" Memory: list of models {list_bytes / count:.0f} B/event, "
+               f"EventStore {store_bytes / count:.0f} B/event ({list_bytes / max(store_bytes, 1):.1f}x smaller)")
+    click.echo("")
+    click.echo(f"{'operation':<14} {'method':<28} {'ms':>10}")
+    for operation, method, seconds in rows:
+        click.echo(f"{operation:<14} {method:<28} {seconds * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    cli()
@@ -88,7 +88,7 @@ class ConfigLoader:
         Args:
             key_path: Dot-separated path to the configuration key (e.g., 'api.openai.model')
             default: Default value if key is not found
-            
+        
         Returns:
             Configuration value or default
         """
@@ -107,7 +107,7 @@ class ConfigLoader:
         
         Args:
             provider: API provider name ('openai' or 'deepseek')
-            
+        
         Returns:
             API configuration dictionary
         """
@@ -121,6 +121,14 @@ class ConfigLoader:
         """Get data generation configuration."""
         return self.get('generation', {})
     
+    def get_cache_config(self) -> Dict[str, Any]:
+        """Get LLM response cache configuration."""
+        return self.get('cache', {})
+    
+    def get_ingest_config(self) -> Dict[str, Any]:
+        """Get Redis Streams ingestion configuration."""
+        return self.get('ingest', {})
+    
     def get_prompts(self) -> Dict[str, str]:
         """Get LLM prompts configuration."""
         return self.get('prompts', {}) 
\ No newline at end of file
@@ -21,36 +21,59 @@ Why LLMs for data generation?
 """
 
 import json
-import random
+import time
+import asyncio
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
-import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
 
 from .config_loader import ConfigLoader
-from .llm_clients import LLMClientFactory, LLMClient
-from .data_models import User, CalendarEvent, GenerationStats
+from .llm_clients import LLMClientFactory, LLMClient, AsyncLLMClient, Completion
+from pydantic import ValidationError
+
+from .data_models import User, CalendarEvent, GenerationStats, GenerationBatch, USER_LIST_ADAPTER, \
+    EVENT_LIST_ADAPTER, validate_many, TIMESTAMPS_NORMALIZED, EVENT_DATE
 from .database import RedisManager
+from .event_store import EventStore
+from .exporters import DatasetExporter
+from .json_extractor import IncrementalArrayParser, salvage_array
+from .seeding import RunSeed
+from .ingest_stream import IngestStream
+from .llm_cache import LLMResponseCache, CachedLLMClient, AsyncCachedLLMClient, CachedChunk
+from .structured_output import StructuredOutput, USER_OUTPUT, EVENT_OUTPUT, unwrap_items
+from .time_normalizer import EventTimeNormalizer
+from .uniqueness import UniquenessIndex
+from .scheduler import ProviderScheduler, LoadBalancedLLMClient, AsyncLoadBalancedLLMClient
 
 
 class DataGenerator:
     """Generates realistic calendar data using LLMs."""
     
-    def __init__(self, config_loader: ConfigLoader, redis_manager: RedisManager):
+    def __init__(self, config_loader: ConfigLoader, redis_manager: RedisManager, seed: Optional[int] = None):
         """Initialize the data generator.
         
         Args:
             config_loader: Configuration loader instance
             redis_manager: Redis database manager
+            seed: Seed for a reproducible run (generation.reproducibility.seed if None)
         """
         self.config = config_loader #This is the config loader, it is used to load the config from the config.json file
         self.redis = redis_manager #This is the redis database manager, it is used to save the data to the database
         self.stats = GenerationStats() #This is the generation stats, it is used to track the generation stats
+        self.exporter = None  # Streaming file exporter, open only during generate_and_save
+        self.ingest: Optional[IngestStream] = None  # Set during generate_and_save when records are queued
+        self.event_store: Optional[EventStore] = None  # Columnar buffer of the run's events
+        # Stream event completions and validate each event as soon as it closes
+        self.streaming = bool(self.config.get_generation_config().get('streaming', False))
+        # Ids, event counts and created_at are derived from this (random when unseeded)
+        self.run_seed = RunSeed.from_config(self.config.get_generation_config().get('reproducibility', {}), seed)
+        self._event_serials: Dict[str, int] = {}  # Events stamped per user (part of seeded event ids)
         
         # Initialize LLM clients
         self.clients = {}
         for provider in ['openai', 'deepseek']: #This is the list of providers that are available, it is used to create the clients
             try:
-                api_config = self.config.get_api_config(provider)
+                api_config = self._api_config(provider)
                 if api_config.get('api_key'):
                     self.clients[provider] = LLMClientFactory.create_client(provider, api_config) #This is the client factory, it is used to create the clients
                     print(f" Initialized {provider} client")
@@ -61,30 +84,328 @@ class DataGenerator:
         
         if not self.clients:
             raise ValueError("No LLM clients available. Please check your API keys.")
+        self._api_clients = list(self.clients.values())  # Unwrapped clients (set_seed updates them)
+        
+        # Optional response cache wrapped around every client
+        self.cache = None
+        cache_config = self.config.get_cache_config()
+        if cache_config.get('enabled'):
+            self.cache = LLMResponseCache.from_config(cache_config, redis_client=self.redis.client)
+            self.clients = {
+                provider: CachedLLMClient(client, provider, self.cache, self.stats)
+                for provider, client in self.clients.items()
+            }
+            print(f" LLM response cache enabled ({cache_config.get('backend', 'sqlite')})")
+        
+        # Event times are parsed per response against the user's timezone and the date window
+        self.time_normalizer = EventTimeNormalizer.from_config(
+            self.config.get_generation_config().get('events', {}).get('date_window', {})
+        )
+        
+        # Users must be unique across runs and workers, not just within this run
+        self._uniqueness_index = UniquenessIndex.from_config(
+            self.config.get_generation_config().get('uniqueness', {}), self.redis.client
+        )
+        self.uniqueness = self._select_uniqueness()
+        self.run_nonce = self._make_run_nonce()
+        self._unsaved_claims: List[User] = []  # Claimed users not saved or queued yet
+        
+        # Spread calls over every provider when more than one is available
+        self.scheduler = None
+        self.balanced_client = None
+        scheduler_config = self.config.get_generation_config().get('load_balancing', {})
+        if len(self.clients) > 1 and scheduler_config.get('enabled', True):
+            quotas = {
+                provider: (self.config.get_api_config(provider).get('rate_limit') or {}).get('requests_per_minute')
+                for provider in self.clients
+            }
+            self.scheduler = ProviderScheduler(
+                list(self.clients),
+                quotas=quotas,
+                ewma_alpha=scheduler_config.get('ewma_alpha', 0.2),
+                min_share=scheduler_config.get('min_share', 0.05),
+                rng=self.run_seed.random('scheduler')
+            )
+            self.balanced_client = LoadBalancedLLMClient(self.clients, self.scheduler)
+            print(f" Load balancing across: {', '.join(self.clients)}")
+    
+    def _api_config(self, provider: str) -> Dict[str, Any]:
+        """API settings of a provider, with the run seed as the request `seed`."""
+        api_config = self.config.get_api_config(provider)
+        if self.run_seed.seeded:
+            api_config = {**api_config, 'seed': self.run_seed.seed}
+        return api_config
+    
+    def set_seed(self, seed: Optional[int]):
+        """Make the following runs reproducible with `seed` (None = random again).
+        
+        Applies to ids, event counts, created_at, the hybrid expansion, the
+        scheduler's provider picks and the `seed` sent with each API request
+        (OpenAI; DeepSeek has no seed parameter and relies on temperature
+        alone).
+        """
+        self.run_seed = RunSeed(seed, self.run_seed.time_base)
+        for client in self._api_clients:
+            client.seed = seed
+        self.uniqueness = self._select_uniqueness()
+        self.run_nonce = self._make_run_nonce()
+        if self.scheduler is not None:
+            self.scheduler.rng = self.run_seed.random('scheduler')
+    
+    def _select_uniqueness(self) -> Optional[UniquenessIndex]:
+        """Uniqueness index for the current seed (None for seeded runs).
+        
+        Why skip the index when seeded? A seeded rerun is meant to produce
+        the same users again, with the same ids, so saving them rewrites the
+        same records. The index would reject every one of them as a
+        duplicate of the first run. Seeded runs check duplicates within the
+        run only.
+        """
+        if self._uniqueness_index is not None and self.run_seed.seeded:
+            print(" Seeded run: global uniqueness index skipped (reruns rewrite the same users)")
+            return None
+        return self._uniqueness_index
+    
+    def _make_run_nonce(self) -> str:
+        """Run tag for user prompts: new every unseeded run, fixed per seed."""
+        return f"{self.run_seed.derive('run_nonce') & 0xFFFFFFFF:08x}"
     
     def _get_client(self, preferred_provider: str = None) -> Tuple[str, LLMClient]:
         """Get an available LLM client.
         
         Args:
             preferred_provider: Preferred provider name
-            
+        
         Returns:
-            Tuple of (provider_name, client)
+            Tuple of (provider_name, client). Without a preferred provider and
+            with several providers configured, this is ('balanced', client
+            routing each call through the scheduler).
         """
         if preferred_provider and preferred_provider in self.clients:
             return preferred_provider, self.clients[preferred_provider] #.client creates the client object, here client is an entity that uses the api key to generate the text
         
+        if self.balanced_client is not None:
+            return 'balanced', self.balanced_client
+        
         # Return first available client
         provider = list(self.clients.keys())[0]
         return provider, self.clients[provider]
     
+    def _record_call(self, completion: Completion, started: float) -> Completion:
+        """Count a finished call, its latency and whether max_tokens cut it off."""
+        if not completion.cached:
+            # Cache hits return in microseconds and would drag the latency percentiles down
+            self.stats.call_latencies.append(time.perf_counter() - started)
+        self.stats.total_api_calls += 1
+        if completion.finish_reason == 'length':
+            self.stats.truncated_responses += 1
+        return completion
+    
+    def _call_llm(self, client: LLMClient, prompt: str, max_retries: int = 3,
+                  output_spec: Optional[StructuredOutput] = None) -> Completion:
+        """Send one prompt, counting the call and recording its latency."""
+        started = time.perf_counter()
+        completion = client.complete(prompt, max_retries=max_retries, output_spec=output_spec)
+        return self._record_call(completion, started)
+    
+    async def _call_llm_async(self, client: AsyncLLMClient, prompt: str, semaphore: asyncio.Semaphore,
+                              max_retries: int = 3, output_spec: Optional[StructuredOutput] = None) -> Completion:
+        """Async twin of _call_llm, holding a concurrency slot only during the call."""
+        async with semaphore:
+            started = time.perf_counter()
+            completion = await client.complete(prompt, max_retries=max_retries, output_spec=output_spec)
+        return self._record_call(completion, started)
+    
+    def _get_user_batch_size(self) -> int:
+        """Number of users requested per LLM call (generation.users.batch_size)."""
+        batch_size = self.config.get_generation_config().get('users', {}).get('batch_size', 1)
+        return max(1, int(batch_size or 1))
+    
+    def _build_user_prompt(self, prompt: str, count: int, variant: str) -> str:
+        """Build the prompt for a batch of users.
+        
+        Uniqueness is enforced by the Redis index after generation, so the
+        prompt no longer lists earlier users and stays the same size however
+        large the dataset gets. The variant tag (run nonce, batch and attempt
+        number) makes each batch and retry of each run a distinct request, so
+        a cached or deterministic reply from an earlier run is not replayed
+        into users the index already holds.
+        
+        Args:
+            prompt: Base user generation prompt from config
+            count: Number of users to request in this call
+            variant: Run/batch/attempt tag, e.g. "5e0c13a7.3.1"
+        
+        Returns:
+            Prompt asking the LLM for exactly `count` new users
+        """
+        noun = "person" if count == 1 else "people"
+        uniqueness_instruction = (f"\n\nGenerate unique {noun} with realistic, diverse names and emails "
+                                  f"(request {variant}: vary names, cultures and professions between requests).")
+        
+        profiles = "profile" if count == 1 else "profiles"
+        return f"Generate {count} realistic user {profiles}. Return a JSON array with exactly {count} users:\n\n{prompt}{uniqueness_instruction}"
+    
+    def _parse_response(self, client: LLMClient, response: str, error: Exception) -> Any:
+        """Parse a response the strict fast path (validate_json / json.loads) rejected.
+        
+        Structured output wraps arrays ({"users": [...]}), so the wrapper is
+        removed here. A response that was not valid JSON but is recovered by
+        the extractor counts as a retry avoided; one with no recoverable JSON
+        counts as a parse failure and the caller requests it again.
+        
+        Invalid JSON is first tried as a truncated array (max_tokens cut-off):
+        every element closed before the cut is kept, and the caller asks for
+        the rest instead of repeating the whole request.
+        """
+        if isinstance(error, ValidationError):
+            json_invalid = any(detail['type'] == 'json_invalid' for detail in error.errors())
+        else:
+            json_invalid = isinstance(error, json.JSONDecodeError)
+        if json_invalid:
+            items, closed = salvage_array(response)
+            if items and not closed:
+                self.stats.retries_avoided += 1
+                print(f" Response was cut off: salvaged {len(items)} complete item(s)")
+                return items
+        
+        try:
+            parsed_data = client._parse_json_response(response) #This is the function that is used to parse the response from the client
+        except ValueError:
+            self.stats.parse_failures += 1
+            raise
+        if json_invalid:
+            self.stats.retries_avoided += 1
+        return unwrap_items(parsed_data)
+    
+    def _users_from_response(self, client: LLMClient, response: str, count: int,
+                             existing_users: List[User]) -> List[User]:
+        """Parse a batch response and validate every user in it on its own.
+        
+        One bad profile in the array does not discard the others: invalid or
+        duplicate items are only counted as failures so the caller can
+        re-request exactly that many. The whole array is validated in one
+        pydantic call; items are only looked at one by one when some fail.
+        
+        Args:
+            client: Client that produced the response (used for JSON parsing)
+            response: Raw LLM response text
+            count: Number of users that were requested
+            existing_users: Users already accepted in this run (duplicate check when
+                            the uniqueness index is disabled)
+        
+        Returns:
+            List of valid, unique User objects (at most `count`)
+        """
+        try:
+            # Fast path: a clean JSON array is parsed and validated by pydantic-core in one call
+            candidates = USER_LIST_ADAPTER.validate_json(response)[:count]
+            invalid = []
+        except ValidationError as e:
+            parsed_data = self._parse_response(client, response, e)
+            if isinstance(parsed_data, dict): #This is the condition that is used to check if the response is a dictionary
+                parsed_data = [parsed_data]
+            candidates, invalid = validate_many(USER_LIST_ADAPTER, (parsed_data or [])[:count])
+        
+        if not candidates and not invalid:
+            print(" No user data returned")
+            return []
+        
+        for _, message in invalid:
+            print(f" Failed to create user: {message}") #This is the message that is printed when the user is not created
+            self.stats.failed_generations += 1 #This is the counter that is used to track the number of failed generations
+        
+        if self.uniqueness is not None:
+            # Global check across runs and workers (atomic claim in Redis)
+            claimed = self.uniqueness.claim(candidates)
+        else:
+            # Without the index only this run's users can be checked
+            seen_emails = {user.email.lower() for user in existing_users}
+            claimed = []
+            for user in candidates:
+                claimed.append(user.email.lower() not in seen_emails)
+                seen_emails.add(user.email.lower())
+        
+        users = []
+        for user, unique in zip(candidates, claimed):
+            if not unique:
+                print(f" Failed to create user: duplicate {user.name} <{user.email}>")
+                self.stats.duplicates_rejected += 1
+                self.stats.failed_generations += 1
+                continue
+            
+            # Seeded ids depend on the (unique) email, not on the order calls finish in
+            user.user_id = self.run_seed.make_id('user_', 'user', user.email.lower()) #This is the user id that is used to identify the user
+            user.created_at = self.run_seed.now() #This is the date and time when the user was created
+            users.append(user)
+            self.stats.users_generated += 1
+            print(f" Created user: {user.name}") #This is the message that is printed when the user is created
+        
+        if self.uniqueness is not None:
+            self._unsaved_claims.extend(users)  # Released if the run fails before saving them
+        
+        # Stream validated users to the export file right away
+        if self.exporter and users:
+            self.exporter.write_users(users)
+        
+        # ...and to the ingest stream, where the writers pick them up
+        if self.ingest and users:
+            self.ingest.publish_users(users)
+            if self.uniqueness is not None:
+                # Queued users are persisted by the writers even if this run fails
+                del self._unsaved_claims[-len(users):]
+        
+        return users
+    
+    def _generate_user_batch(self, client: LLMClient, prompt: str, count: int,
+                             users: List[User], batch_index: int = 0, max_attempts: int = 3) -> List[User]:
+        """Generate `count` users, re-requesting only the ones that failed.
+        
+        Invalid users and duplicates rejected by the uniqueness index are
+        both regenerated this way.
+        
+        Args:
+            client: LLM client to use
+            prompt: Base user generation prompt from config
+            count: Number of users wanted from this batch
+            users: Users accepted so far in the run (new users are appended)
+            batch_index: Position of the batch in the run (part of the prompt variant)
+            max_attempts: Maximum LLM calls spent on this batch
+        
+        Returns:
+            Users accepted in this batch
+        """
+        accepted = []
+        for attempt in range(max_attempts):
+            missing = count - len(accepted)
+            if missing <= 0:
+                break
+            
+            try:
+                variant = f"{self.run_nonce}.{batch_index + 1}.{attempt + 1}"
+                user_prompt = self._build_user_prompt(prompt, missing, variant)
+                completion = self._call_llm(client, user_prompt, output_spec=USER_OUTPUT)
+                new_users = self._users_from_response(client, completion.text, missing, users)
+            except Exception as e:
+                print(f" Failed to generate {missing} user(s) (attempt {attempt + 1}): {e}")
+                self.stats.failed_generations += missing
+                continue
+            
+            users.extend(new_users)
+            accepted.extend(new_users)
+        
+        return accepted
+    
     def generate_users(self, count: int, provider: str = None) -> List[User]:
         """Generate realistic users using LLM.
         
+        Users are requested generation.users.batch_size at a time. Each user in
+        a batch is validated on its own and only failed users are re-requested.
+        
         Args:
             count: Number of users to generate
             provider: Preferred LLM provider
-            
+        
         Returns:
             List of generated User objects
         """
@@ -96,68 +417,33 @@ class DataGenerator:
         if not prompt:
             raise ValueError("User generation prompt not found in config")
         
+        batch_size = self._get_user_batch_size()
         users = []
         
-        # Try to generate users one by one for better reliability with uniqueness
-        for i in range(count):
-            try:
-                # Build list of already generated names to avoid duplicates
-                existing_names = [user.name for user in users]
-                existing_emails = [user.email for user in users]
-                
-                if existing_names:
-                    uniqueness_instruction = f"\n\nIMPORTANT: Do NOT use these already generated names: {', '.join(existing_names)}\nDo NOT use these emails: {', '.join(existing_emails)}\nGenerate a completely different person with a unique name and email."
-                else:
-                    uniqueness_instruction = "\n\nGenerate a unique person with realistic name and email."
-                
-                user_prompt = f"Generate 1 realistic user profile. Return a JSON array with exactly 1 user:\n\n{prompt}{uniqueness_instruction}"
-                response = client.generate_text(user_prompt)
-                self.stats.total_api_calls += 1
-                
-                print(f" Generating user {i+1}/{count}...")
-                
-                parsed_data = client._parse_json_response(response) #This is the function that is used to parse the response from the client
-                if isinstance(parsed_data, dict): #This is the condition that is used to check if the response is a dictionary
-                    parsed_data = [parsed_data]
-                
-                if parsed_data and len(parsed_data) > 0:
-                    data = parsed_data[0]  # Take the first user #This is the data that is used to create the user
-                    try:
-                        user = User(**data)
-                        user.user_id = f"user_{uuid.uuid4().hex[:8]}" #This is the user id that is used to identify the user
-                        user.created_at = datetime.now() #This is the date and time when the user was created
-                        users.append(user) #This is the list of users that are created
-                        self.stats.users_generated += 1
-                        print(f" Created user: {user.name}") #This is the message that is printed when the user is created
-                    except Exception as e:
-                        print(f" Failed to create user: {e}") #This is the message that is printed when the user is not created
-                        self.stats.failed_generations += 1 #This is the counter that is used to track the number of failed generations
-                else:
-                    print(f" No user data returned for user {i+1}") #This is the message that is printed when the user is not created
-                    self.stats.failed_generations += 1 #This is the counter that is used to track the number of failed generations
-                
-            except Exception as e:
-                print(f" Failed to generate user {i+1}: {e}")
-                self.stats.failed_generations += 1
+        for batch_index, batch_start in enumerate(range(0, count, batch_size)):
+            batch_count = min(batch_size, count - batch_start)
+            print(f" Generating users {batch_start+1}-{batch_start+batch_count}/{count}...")
+            self._generate_user_batch(client, prompt, batch_count, users, batch_index)
         
         print(f" Generated {len(users)} users using {provider_name}")
         return users
     
-    def generate_events_for_user(self, user: User, count: int = None, provider: str = None) -> List[CalendarEvent]:
-        """Generate events for a specific user.
+    def _build_event_prompt(self, user: User, count: int,
+                            existing: Optional[List[CalendarEvent]] = None, attempt: int = 0) -> str:
+        """Format the event generation prompt for a user.
         
         Args:
-            user: User object to generate events for
-            count: Number of events to generate (random if None)
-            provider: Preferred LLM provider
-            
+            user: User the events belong to
+            count: Number of events to request
+            existing: Events already generated for the user (follow-up requests
+                      for the remainder list them so they are not repeated)
+            attempt: Attempt number; retries are tagged so they are distinct
+                     requests and a cached or deterministic reply that failed
+                     is not replayed
+        
         Returns:
-            List of generated CalendarEvent objects
+            Prompt with the user's profile filled in
         """
-        if count is None:
-            count = random.randint(2, 4)  # Reduced to be more reliable #This is the number of events that are generated for each user
-        
-        provider_name, client = self._get_client(provider)
         prompt_template = self.config.get_prompts().get('event_generation', '') #This is the prompt that is used to generate the events
         
         if not prompt_template:
@@ -172,126 +458,552 @@ class DataGenerator:
             working_hours=f"{user.preferences.working_hours.start} - {user.preferences.working_hours.end}" #This is the working hours of the user
         )
         
-        # Try with retries and fallback to smaller batches
-        max_retries = 2
-        for attempt in range(max_retries):
+        window = self.time_normalizer.window
+        if window:
+            prompt += f"\n\nSchedule the events between {window[0]} and {window[1]} ({user.timezone} local time)."
+        
+        if existing:
+            titles = ", ".join(f'"{event.title}"' for event in existing)
+            prompt += f"\n\nThe user already has these events, do not repeat them: {titles}"
+        if attempt:
+            prompt += f"\n\n(Request {attempt + 1} for this user.)"
+        return prompt
+    
+    def _event_context(self, user: User) -> Dict[str, Any]:
+        """Validation context for a user's normalized events (bare times left over get the window start)."""
+        return {'user_id': user.user_id, TIMESTAMPS_NORMALIZED: True, EVENT_DATE: self.time_normalizer.event_date}
+    
+    def _stamp_event(self, event: CalendarEvent):
+        """Assign the system fields of a freshly validated event."""
+        serial = self._event_serials.get(event.user_id, 0)
+        self._event_serials[event.user_id] = serial + 1
+        event.event_id = self.run_seed.make_id('event_', 'event', event.user_id, serial) #This is the event id that is used to identify the event
+        event.created_at = self.run_seed.now() #This is the date and time when the event was created
+        self.stats.events_generated += 1
+    
+    def _build_event(self, event_data: Dict[str, Any], user: User, position: int = 0) -> Optional[CalendarEvent]:
+        """Validate one event object from an LLM response (streaming path).
+        
+        Args:
+            event_data: Parsed event dictionary
+            user: User the event belongs to
+            position: Index of the event in the response (spreads bare times over the date window)
+        
+        Returns:
+            CalendarEvent, or None if the data is invalid (counted as a failure)
+        """
+        records, invalid = self.time_normalizer.normalize([event_data], user.timezone, position)
+        if invalid:
+            print(f" Failed to create event: {invalid[0][1]}")
+            self.stats.failed_generations += 1
+            return None
+        
+        try:
+            # user_id comes from the context; times were parsed and checked by the normalizer
+            event = CalendarEvent.model_validate(records[0], context=self._event_context(user))
+        except ValidationError as e:
+            print(f" Failed to create event: {e.errors()[0].get('msg') if e.errors() else e}")
+            self.stats.failed_generations += 1
+            return None
+        
+        self._stamp_event(event)
+        return event
+    
+    def _events_from_response(self, client: LLMClient, response: str, user: User) -> List[CalendarEvent]:
+        """Parse and validate the events in an LLM response.
+        
+        The response is parsed with json.loads (extract_json and the
+        truncation salvage if that fails), the timestamps of all events are
+        normalized and checked in one batch, and the rest of each event is
+        validated by EVENT_LIST_ADAPTER.
+        
+        Args:
+            client: Client that produced the response (used for JSON parsing)
+            response: Raw LLM response text
+            user: User the events belong to
+        
+        Returns:
+            List of valid CalendarEvent objects (invalid ones are counted and skipped)
+        
+        Raises:
+            ValueError: If the response does not contain an event array
+        """
+        print(f" Raw response for {user.name}: {response[:100]}...")
+        
+        try:
+            parsed_data = unwrap_items(json.loads(response))
+        except json.JSONDecodeError as e:
+            parsed_data = self._parse_response(client, response, e)
+        if not isinstance(parsed_data, list): #This is the condition that is used to check if the response is a list
+            if isinstance(parsed_data, dict): #This is the condition that is used to check if the response is a dictionary
+                parsed_data = [parsed_data]  # Single event case
+            else:
+                raise ValueError("Expected array of events") #This is the error message that is printed when the response is not a list
+        
+        records, invalid_times = self.time_normalizer.normalize(parsed_data, user.timezone)
+        events, invalid = validate_many(EVENT_LIST_ADAPTER, records, context=self._event_context(user))
+        
+        for _, message in invalid_times + invalid:
+            print(f" Failed to create event: {message}")
+            self.stats.failed_generations += 1
+        
+        for event in events:
+            self._stamp_event(event)
+        
+        self._collect_events(events)
+        return events
+    
+    def _collect_events(self, events: List[CalendarEvent]):
+        """Append validated events to the run's columnar store and export them right away.
+        
+        The store keeps the run's events as arrays instead of models; the
+        export file and Redis are written from its rows. Outside
+        generate_and_save there is no store and the models are exported as-is.
+        """
+        if not events:
+            return
+        if self.event_store is None:
+            if self.exporter:
+                self.exporter.write_events(events)
+            if self.ingest:
+                self.ingest.publish_events(events)
+            return
+        
+        start = len(self.event_store)
+        self.event_store.extend(events)
+        if self.exporter:
+            self.exporter.write_event_store(self.event_store, start)
+        if self.ingest:
+            self.ingest.publish_event_store(self.event_store, start)
+    
+    def _accept_streamed_event(self, event_data: Dict[str, Any], user: User, events: List[CalendarEvent],
+                               started: float, position: int = 0):
+        """Validate and export one event as soon as the stream closes it."""
+        event = self._build_event(event_data, user, position)
+        if event is None:
+            return
+        if not events:
+            self.stats.first_record_latencies.append(time.perf_counter() - started)
+        events.append(event)
+        self._collect_events([event])
+    
+    def _finish_event_stream(self, client: LLMClient, parser: IncrementalArrayParser, chunks: List[str],
+                             events: List[CalendarEvent], user: User, started: float,
+                             error: Optional[Exception]) -> Tuple[List[CalendarEvent], bool]:
+        """Record the streamed call and decide what to keep from it.
+        
+        Returns:
+            Tuple of (events, whether the reply was cut off before the array closed)
+        """
+        if not (chunks and isinstance(chunks[0], CachedChunk)):  # Cache hits are not API latency
+            self.stats.call_latencies.append(time.perf_counter() - started)
+        self.stats.total_api_calls += 1
+        
+        if error is not None:
+            if not events:
+                raise error
+            # Events already validated (and exported) are kept
+            print(f" Stream for {user.name} failed after {len(events)} events: {str(error)[:80]}")
+            return events, False
+        
+        if not parser.items_parsed:
+            # No array in the reply (e.g. a single event object): parse it whole
+            return self._events_from_response(client, ''.join(chunks), user), False
+        
+        if not parser.done:
+            # The stream ended normally with the array still open: max_tokens was reached.
+            # A strict parser would have rejected the whole response.
+            self.stats.truncated_responses += 1
+            self.stats.retries_avoided += 1
+            print(f" Response for {user.name} was cut off: kept {len(events)} complete events")
+            return events, True
+        return events, False
+    
+    def _stream_events(self, client: LLMClient, prompt: str, user: User,
+                       max_retries: int = 2) -> Tuple[List[CalendarEvent], bool]:
+        """Generate events through a streamed completion.
+        
+        Each event object is validated and written to the export file as soon
+        as its closing brace arrives, while the LLM is still writing the next
+        one. A completion cut off by max_tokens keeps every complete event.
+        
+        Args:
+            client: LLM client to stream from
+            prompt: Event generation prompt
+            user: User the events belong to
+            max_retries: Retries before the first chunk arrives
+        
+        Returns:
+            Tuple of (valid CalendarEvent objects, whether the reply was cut off)
+        """
+        parser = IncrementalArrayParser()
+        chunks: List[str] = []
+        events: List[CalendarEvent] = []
+        error = None
+        started = time.perf_counter()
+        
+        try:
+            for chunk in client.stream_text(prompt, max_retries=max_retries, output_spec=EVENT_OUTPUT):
+                chunks.append(chunk)
+                items = parser.feed(chunk)
+                for position, event_data in enumerate(items, parser.items_parsed - len(items)):
+                    self._accept_streamed_event(event_data, user, events, started, position)
+        except Exception as e:
+            error = e
+        
+        return self._finish_event_stream(client, parser, chunks, events, user, started, error)
+    
+    def generate_events_for_user(self, user: User, count: int = None, provider: str = None) -> List[CalendarEvent]:
+        """Generate events for a specific user.
+        
+        A reply cut off by max_tokens keeps every complete event, and only
+        the missing remainder is requested again, in requests small enough
+        to fit. Events that failed validation are re-requested the same way.
+        
+        Args:
+            user: User object to generate events for
+            count: Number of events to generate (random if None)
+            provider: Preferred LLM provider
+        
+        Returns:
+            List of generated CalendarEvent objects
+        """
+        if count is None:
+            count = self.run_seed.random('event_count', user.user_id).randint(2, 4)  # Reduced to be more reliable #This is the number of events that are generated for each user
+        
+        _, client = self._get_client(provider)
+        
+        # Events that arrive are kept; only the missing remainder is requested again
+        events: List[CalendarEvent] = []
+        request_size = count
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            missing = count - len(events)
+            if missing <= 0:
+                break
+            
+            requested = min(request_size, missing)
+            prompt = self._build_event_prompt(user, requested, events, attempt)
             try:
-                response = client.generate_text(prompt, max_retries=2)
-                self.stats.total_api_calls += 1
-                
-                print(f" Raw response for {user.name}: {response[:100]}...")
-                
-                parsed_data = client._parse_json_response(response) #This is the function that is used to parse the response from the client
-                if not isinstance(parsed_data, list): #This is the condition that is used to check if the response is a list
-                    if isinstance(parsed_data, dict): #This is the condition that is used to check if the response is a dictionary
-                        parsed_data = [parsed_data]  # Single event case
-                    else:
-                        raise ValueError("Expected array of events") #This is the error message that is printed when the response is not a list
-                
-                events = [] #This is the list of events that are created
-                for event_data in parsed_data: #This is the loop that is used to create the events
-                    try:
-                        event_data['user_id'] = user.user_id #This is the user id that is used to identify the user
-                        event_data['event_id'] = f"event_{uuid.uuid4().hex[:8]}" #This is the event id that is used to identify the event
-                        event_data['created_at'] = datetime.now() #This is the date and time when the event was created
-                        
-                        # Parse datetime strings more robustly
-                        for time_field in ['start_time', 'end_time']: #This is the list of time fields that are used to parse the datetime strings
-                            if time_field in event_data and isinstance(event_data[time_field], str): #This is the condition that is used to check if the time field is a string
-                                time_str = event_data[time_field].replace('Z', '+00:00') #This is the function that is used to replace the Z with +00:00
-                                if 'T' not in time_str:
-                                    time_str = f"2024-12-26T{time_str}"
-                                event_data[time_field] = datetime.fromisoformat(time_str)
-                        
-                        event = CalendarEvent(**event_data)
-                        events.append(event)
-                        self.stats.events_generated += 1
-                        
-                    except Exception as e:
-                        print(f" Failed to create event: {e}")
-                        self.stats.failed_generations += 1
-                
-                if events:  # Success if we got at least one event
-                    return events
-                    
+                if self.streaming:
+                    new_events, truncated = self._stream_events(client, prompt, user)
+                else:
+                    completion = self._call_llm(client, prompt, max_retries=2, output_spec=EVENT_OUTPUT)
+                    new_events = self._events_from_response(client, completion.text, user)
+                    truncated = completion.finish_reason == 'length'
             except Exception as e:
                 print(f" Attempt {attempt + 1} failed for {user.name}: {str(e)[:100]}")
-                if attempt < max_retries - 1:
-                    # Try again with simpler request
-                    count = min(count, 2)
-                    continue
+                self.stats.failed_generations += requested
+                # Try again with simpler request
+                request_size = min(requested, 2)
+                continue
+            
+            events.extend(new_events)
+            if truncated:
+                # The reply did not fit in max_tokens: ask for the rest in pieces that do
+                request_size = max(1, len(new_events))
+        
+        if not events:
+            print(f" All attempts failed for {user.name}")
+        return events
+    
+    # Async generation engine
+    def _get_concurrency(self, concurrency: int = None) -> int:
+        """Resolve the number of LLM calls allowed in flight at once."""
+        if concurrency is None:
+            concurrency = self.config.get_generation_config().get('concurrency', 1)
+        return max(1, int(concurrency))
+    
+    def _create_async_clients(self) -> Dict[str, AsyncLLMClient]:
+        """Create async twins of the initialized sync clients."""
+        async_clients = {}
+        for provider in self.clients:
+            client = LLMClientFactory.create_async_client(provider, self._api_config(provider))
+            if self.cache is not None:
+                client = AsyncCachedLLMClient(client, provider, self.cache, self.stats)
+            async_clients[provider] = client
+        return async_clients
+    
+    async def _generate_user_batch_async(self, client: AsyncLLMClient, prompt: str, count: int,
+                                         users: List[User], semaphore: asyncio.Semaphore,
+                                         batch_index: int = 0, max_attempts: int = 3) -> List[User]:
+        """Async twin of _generate_user_batch, holding a slot only for each LLM call."""
+        accepted = []
+        for attempt in range(max_attempts):
+            missing = count - len(accepted)
+            if missing <= 0:
+                break
+            
+            try:
+                variant = f"{self.run_nonce}.{batch_index + 1}.{attempt + 1}"
+                user_prompt = self._build_user_prompt(prompt, missing, variant)
+                completion = await self._call_llm_async(client, user_prompt, semaphore, output_spec=USER_OUTPUT)
+                new_users = self._users_from_response(client, completion.text, missing, users)
+            except Exception as e:
+                print(f" Failed to generate {missing} user(s) (attempt {attempt + 1}): {e}")
+                self.stats.failed_generations += missing
+                continue
+            
+            users.extend(new_users)
+            accepted.extend(new_users)
+        
+        return accepted
+    
+    async def _stream_events_async(self, client: AsyncLLMClient, prompt: str, user: User,
+                                   semaphore: asyncio.Semaphore,
+                                   max_retries: int = 2) -> Tuple[List[CalendarEvent], bool]:
+        """Async twin of _stream_events, holding a concurrency slot for the whole stream."""
+        parser = IncrementalArrayParser()
+        chunks: List[str] = []
+        events: List[CalendarEvent] = []
+        error = None
+        
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async for chunk in client.stream_text(prompt, max_retries=max_retries,
+                                                      output_spec=EVENT_OUTPUT):
+                    chunks.append(chunk)
+                    items = parser.feed(chunk)
+                    for position, event_data in enumerate(items, parser.items_parsed - len(items)):
+                        self._accept_streamed_event(event_data, user, events, started, position)
+            except Exception as e:
+                error = e
+        
+        return self._finish_event_stream(client, parser, chunks, events, user, started, error)
+    
+    async def _generate_events_for_user_async(self, client: AsyncLLMClient, user: User,
+                                              semaphore: asyncio.Semaphore, count: int = None) -> List[CalendarEvent]:
+        """Async twin of generate_events_for_user (same retry and remainder rules)."""
+        if count is None:
+            count = self.run_seed.random('event_count', user.user_id).randint(2, 4)
+        
+        events: List[CalendarEvent] = []
+        request_size = count
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            missing = count - len(events)
+            if missing <= 0:
+                break
+            
+            requested = min(request_size, missing)
+            prompt = self._build_event_prompt(user, requested, events, attempt)
+            try:
+                if self.streaming:
+                    new_events, truncated = await self._stream_events_async(client, prompt, user, semaphore)
                 else:
-                    self.stats.failed_generations += count
-                    print(f" All attempts failed for {user.name}")
-                    return []
+                    completion = await self._call_llm_async(client, prompt, semaphore, max_retries=2,
+                                                            output_spec=EVENT_OUTPUT)
+                    new_events = self._events_from_response(client, completion.text, user)
+                    truncated = completion.finish_reason == 'length'
+            except Exception as e:
+                print(f" Attempt {attempt + 1} failed for {user.name}: {str(e)[:100]}")
+                self.stats.failed_generations += requested
+                request_size = min(requested, 2)
+                continue
+            
+            events.extend(new_events)
+            if truncated:
+                request_size = max(1, len(new_events))
+        
+        if not events:
+            print(f" All attempts failed for {user.name}")
+        return events
+    
+    async def generate_dataset_async(self, user_count: int, provider: str = None,
+                                     concurrency: int = None) -> Tuple[List[User], EventStore]:
+        """Generate users and their events concurrently.
+        
+        Every user batch gets its own task that generates the users and then
+        immediately generates each user's events. All tasks run together and
+        share one semaphore, so at most `concurrency` LLM calls are in flight
+        at any time. Wall-clock time is therefore driven by the concurrency
+        level rather than by the total number of calls.
+        
+        Args:
+            user_count: Number of users to generate
+            provider: Preferred LLM provider
+            concurrency: Maximum number of in-flight LLM calls
+        
+        Returns:
+            Tuple of (users, event store holding every generated event)
+        """
+        concurrency = self._get_concurrency(concurrency)
+        if self.event_store is None:
+            self.event_store = EventStore()
+        prompt = self.config.get_prompts().get('user_generation', '')
         
-        return []
+        if not prompt:
+            raise ValueError("User generation prompt not found in config")
+        
+        print(f" Generating {user_count} users with up to {concurrency} concurrent requests...")
+        
+        async_clients = self._create_async_clients()
+        provider_name, _ = self._get_client(provider)
+        if provider_name == 'balanced':
+            client = AsyncLoadBalancedLLMClient(async_clients, self.scheduler)
+        else:
+            client = async_clients[provider_name]
+        semaphore = asyncio.Semaphore(concurrency)
+        users: List[User] = []
+        
+        async def batch_pipeline(batch_index: int, batch_count: int):
+            # Events land in self.event_store as they are accepted
+            batch_users = await self._generate_user_batch_async(client, prompt, batch_count, users, semaphore,
+                                                                batch_index)
+            await asyncio.gather(
+                *(self._generate_events_for_user_async(client, user, semaphore) for user in batch_users)
+            )
+        
+        batch_size = self._get_user_batch_size()
+        batch_counts = [min(batch_size, user_count - start) for start in range(0, user_count, batch_size)]
+        
+        try:
+            await asyncio.gather(*(batch_pipeline(i, n) for i, n in enumerate(batch_counts)))
+        finally:
+            for async_client in async_clients.values():
+                await async_client.aclose()
+        
+        print(f" Generated {len(users)} users and {len(self.event_store)} events using {provider_name}")
+        return users, self.event_store
     
-    def generate_and_save(self, user_count: int = None, provider: str = None) -> Dict[str, Any]:
-        """Generate complete dataset and save to Redis and files."""
+    def generate_and_save(self, user_count: int = None, provider: str = None, concurrency: int = None,
+                          ingest: Optional[bool] = None) -> Dict[str, Any]:
+        """Generate complete dataset and save to Redis and files.
+        
+        Args:
+            user_count: Number of users to generate (config default if None)
+            provider: Preferred LLM provider
+            concurrency: Maximum in-flight LLM calls (generation.concurrency if None).
+                         Values above 1 use the asyncio engine.
+            ingest: Queue records on the ingest stream as they are accepted
+                    instead of saving them here (ingest.enabled if None)
+        """
         self.stats.start_time = datetime.now()
+        self._event_serials = {}
+        self.run_nonce = self._make_run_nonce()
+        self._unsaved_claims = []
+        if self.scheduler is not None:
+            # Seeded runs draw the same sequence of provider picks every time
+            self.scheduler.rng = self.run_seed.random('scheduler')
+        
+        ingest_config = self.config.get_ingest_config()
+        if ingest is None:
+            ingest = bool(ingest_config.get('enabled', False))
+        self.ingest = IngestStream.from_config(ingest_config, self.redis) if ingest else None
+        
+        # Records are written to the export files as they are generated
+        self.exporter = self._open_exporter()
+        # Events are kept as columns rather than models until they reach Redis
+        self.event_store = EventStore()
         
         try:
             if user_count is None:
                 user_count = self.config.get_generation_config().get('users', {}).get('count', 50)
             
-            # Generate users
-            users = self.generate_users(user_count, provider)
+            concurrency = self._get_concurrency(concurrency)
+            if concurrency > 1:
+                users, event_store = asyncio.run(self.generate_dataset_async(user_count, provider, concurrency))
+            else:
+                # Generate users
+                users = self.generate_users(user_count, provider)
+                
+                # Generate events (collected in self.event_store)
+                for user in users:
+                    self.generate_events_for_user(user, provider=provider)
+                event_store = self.event_store
             
             if not users:
                 raise ValueError("No users were successfully generated")
             
-            # Generate events
-            all_events = []
-            for user in users:
-                events = self.generate_events_for_user(user, provider=provider)
-                all_events.extend(events)
+            backlog = None
+            if self.ingest:
+                # Already queued as generated; the `ingest` writers persist them
+                backlog = self.ingest.backlog()
+                print(f" Queued {len(users)} users and {len(event_store)} events on {self.ingest.stream} "
+                      f"(backlog: {backlog['length']})")
+            else:
+                # Save to Redis (pipelined bulk writes)
+                write_started = time.perf_counter()
+                self.redis.save_users(users)
+                self._unsaved_claims = []
+                self.redis.save_event_store(event_store)
+                self.stats.redis_write_seconds += time.perf_counter() - write_started
             
-            # Save to Redis
-            for user in users:
-                self.redis.save_user(user)
-            for event in all_events:
-                self.redis.save_event(event)
-            
-            # Export to files
-            file_paths = self._export_to_files(users, all_events)
+            # Close export files
+            file_paths = self.exporter.close()
             
             self.stats.end_time = datetime.now()
+            batch = self.record_batch(provider, len(users), len(event_store),
+                                      [user.user_id for user in users], event_store.event_ids)
             
             return {
+                'batch_id': batch.batch_id,
+                'seed': batch.seed,
                 'users_generated': len(users),
-                'events_generated': len(all_events),
+                'events_generated': len(event_store),
+                'event_store_bytes': event_store.nbytes,
                 'duration_seconds': self.stats.duration_seconds,
-                'api_calls': self.stats.total_api_calls,
+                'api_calls': self.stats.total_api_calls - self.stats.cache_hits,  # Hits never reach the API
+                'cache_hits': self.stats.cache_hits,
+                'cache_misses': self.stats.cache_misses,
+                'providers': self.scheduler.snapshot() if self.scheduler else {},
                 'failed_generations': self.stats.failed_generations,
+                'duplicates_rejected': self.stats.duplicates_rejected,
+                'parse_failures': self.stats.parse_failures,
+                'retries_avoided': self.stats.retries_avoided,
+                'truncated_responses': self.stats.truncated_responses,
+                'redis_write_seconds': self.stats.redis_write_seconds,
+                'ingest_backlog': backlog,
                 'exported_files': file_paths
             }
-            
+        
         except Exception as e:
             self.stats.end_time = datetime.now()
             # Re-raise with more context
             raise Exception(f"Data generation failed: {str(e)[:200]}")  # Limit error message length
-    
-    def _export_to_files(self, users: List[User], events: List[CalendarEvent]) -> Dict[str, str]:
-        """Export data to JSON files."""
-        from pathlib import Path
-        
-        output_dir = Path("data/generated")
-        output_dir.mkdir(parents=True, exist_ok=True)
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        finally:
+            # Claims of users that never reached Redis (LLM or write errors, Ctrl-C)
+            # would otherwise block their emails until the next `clear`
+            if self._unsaved_claims:
+                print(f" Releasing {len(self._unsaved_claims)} unsaved uniqueness claim(s)")
+                self.uniqueness.release(self._unsaved_claims)
+                self._unsaved_claims = []
+            self.exporter.close()
+            self.exporter = None
+            self.ingest = None
+            if self.cache is not None:
+                self.cache.flush()
+    
+    def record_batch(self, provider: Optional[str], user_count: int, event_count: int,
+                     user_ids: Optional[List[str]] = None, event_ids: Optional[List[str]] = None) -> GenerationBatch:
+        """Save the metadata of a finished run (seed, stats, ids) as a batch in Redis.
         
-        # Export users
-        users_file = output_dir / f"users_{timestamp}.json"
-        with open(users_file, 'w', encoding='utf-8') as f:
-            json.dump([user.dict() for user in users], f, indent=2, default=str)
+        Args:
+            provider: Preferred provider of the run
+            user_count / event_count: Records generated
+            user_ids / event_ids: Their ids (None to store counts only)
         
-        # Export events
-        events_file = output_dir / f"events_{timestamp}.json"
-        with open(events_file, 'w', encoding='utf-8') as f:
-            json.dump([event.dict() for event in events], f, indent=2, default=str)
+        Returns:
+            The saved GenerationBatch (without records)
+        """
+        batch = GenerationBatch(
+            batch_id=self.run_seed.make_id('batch_', 'batch'),
+            stats=self.stats,
+            provider_used=self._get_client(provider)[0],
+            seed=self.run_seed.seed,
+            created_at=self.run_seed.now()
+        )
+        return self.redis.save_batch_metadata(batch, user_count, event_count, user_ids, event_ids)
+    
+    def _open_exporter(self) -> DatasetExporter:
+        """Open streaming export files configured under generation.output."""
+        output_config = self.config.get_generation_config().get('output', {})
         
-        return {
-            'users_file': str(users_file),
-            'events_file': str(events_file)
-        } 
\ No newline at end of file
+        return DatasetExporter(
+            Path(output_config.get('directory', 'data/generated')),
+            datetime.now().strftime("%Y%m%d_%H%M%S"),
+            export_format=output_config.get('export_format', 'jsonl'),
+            flush_every=output_config.get('flush_every', 500)
+        )
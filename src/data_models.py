@@ -14,12 +14,59 @@ Architecture Pattern: Domain Models
 - Each class represents a real-world entity
 - Validation rules ensure data integrity
 - Relationships between entities are clearly defined
+
+Validation cost:
+- USER_LIST_ADAPTER / EVENT_LIST_ADAPTER validate a whole LLM response in
+  one call (validate_json parses the raw string in pydantic-core directly)
+- validate_many falls back to item-by-item only when a batch has bad items
+- Attendee emails are validated once per distinct address (CachedEmailStr)
+- from_trusted() rebuilds models read back from Redis with model_construct,
+  skipping validation of data that was validated before it was stored
 """
 #This file is used to clean and validate the data that is generated by the LLM 
 
+import json
 from datetime import datetime
-from typing import List, Optional, Literal
-from pydantic import BaseModel, EmailStr, Field, validator
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Literal, Tuple
+from typing_extensions import Annotated
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, TypeAdapter, ValidationError, ValidationInfo, \
+    WithJsonSchema, field_validator, model_validator
+from pydantic.networks import validate_email
+
+
+# Date used for event times returned without one (e.g. "10:00:00") when the
+# validation context does not give one (EVENT_DATE)
+DEFAULT_EVENT_DATE = "2024-12-26"
+
+# Validation context key: ISO date for bare times, normally the start of
+# generation.events.date_window, so every path dates them like the normalizer
+EVENT_DATE = 'event_date'
+
+# Validation context flag: start/end were already parsed and checked as a
+# batch (time_normalizer.EventTimeNormalizer), so per-object checks are skipped
+TIMESTAMPS_NORMALIZED = 'timestamps_normalized'
+
+
+@lru_cache(maxsize=4096)
+def _validate_email_cached(value: str) -> str:
+    """EmailStr validation, memoized: the same attendees appear in many events."""
+    return validate_email(value)[1]
+
+
+# Same checks and normalization as EmailStr, without re-validating repeats
+CachedEmailStr = Annotated[str, AfterValidator(_validate_email_cached),
+                           WithJsonSchema({'type': 'string', 'format': 'email'})]
+
+
+def _parse_stored_datetime(value: Optional[str]) -> Optional[datetime]:
+    """ISO string from Redis -> datetime (None if missing or malformed)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
 
 
 class WorkingHours(BaseModel):
@@ -27,7 +74,8 @@ class WorkingHours(BaseModel):
     start: str = Field(..., description="Start time in HH:MM format")
     end: str = Field(..., description="End time in HH:MM format")
     
-    @validator('start', 'end')
+    @field_validator('start', 'end')
+    @classmethod
     def validate_time_format(cls, v):
         """Validate time format is HH:MM."""
         try:
@@ -72,6 +120,25 @@ class User(BaseModel):
     # Metadata (auto-generated)
     created_at: Optional[datetime] = None  # When this user was created
     
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "User":
+        """Build a User from a stored Redis hash without validation.
+        
+        Only for data this application validated before storing it: nested
+        models are constructed explicitly because model_construct does not
+        recurse into them.
+        """
+        data = dict(data)
+        preferences = data.get('preferences')
+        if isinstance(preferences, str):
+            preferences = json.loads(preferences)
+        if isinstance(preferences, dict):
+            preferences = dict(preferences)
+            preferences['working_hours'] = WorkingHours.model_construct(**preferences.get('working_hours', {}))
+            data['preferences'] = UserPreferences.model_construct(**preferences)
+        data['created_at'] = _parse_stored_datetime(data.get('created_at'))
+        return cls.model_construct(**data)
+    
     def __str__(self):
         """Human-readable representation for debugging and logging."""
         return f"User({self.name}, {self.email})"
@@ -86,29 +153,102 @@ class CalendarEvent(BaseModel):
     start_time: datetime = Field(..., description="Event start time")
     end_time: datetime = Field(..., description="Event end time")
     location: Optional[str] = Field(None, max_length=200)
-    attendees: List[EmailStr] = Field(default_factory=list)
+    attendees: List[CachedEmailStr] = Field(default_factory=list)
     category: Literal["meeting", "appointment", "personal", "work"] = "meeting"
     priority: Literal["high", "medium", "low"] = "medium"
     recurrence: Optional[str] = Field(None, description="Recurrence pattern")
     created_at: Optional[datetime] = None
     
-    @validator('end_time')
-    def end_time_after_start_time(cls, v, values):
-        """Ensure end time is after start time."""
-        if 'start_time' in values and v <= values['start_time']:
-            raise ValueError('End time must be after start time')
+    @model_validator(mode='before')
+    @classmethod
+    def apply_context_defaults(cls, data: Any, info: ValidationInfo) -> Any:
+        """Fill user_id from the validation context (LLM output never has it)."""
+        if isinstance(data, dict) and info.context and 'user_id' not in data:
+            data = {**data, 'user_id': info.context.get('user_id')}
+        return data
+    
+    @field_validator('start_time', 'end_time', mode='before')
+    @classmethod
+    def normalize_time(cls, v, info: ValidationInfo):
+        """Accept 'Z' suffixes and times without a date (context EVENT_DATE, else DEFAULT_EVENT_DATE)."""
+        if isinstance(v, str):
+            v = v.strip().replace('Z', '+00:00')
+            if 'T' not in v and ' ' not in v:
+                event_date = (info.context or {}).get(EVENT_DATE) or DEFAULT_EVENT_DATE
+                v = f"{event_date}T{v}"
         return v
     
+    @model_validator(mode='after')
+    def end_time_after_start_time(self, info: ValidationInfo):
+        """Ensure end time is after start time."""
+        if info.context and info.context.get(TIMESTAMPS_NORMALIZED):
+            return self
+        try:
+            if self.end_time <= self.start_time:
+                raise ValueError('End time must be after start time')
+        except TypeError:
+            raise ValueError('Start and end time must both have a timezone offset or neither')
+        return self
+    
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "CalendarEvent":
+        """Build a CalendarEvent from a stored Redis hash without validation."""
+        data = dict(data)
+        for key in ('start_time', 'end_time', 'created_at'):
+            if key in data:
+                data[key] = _parse_stored_datetime(data[key])
+        attendees = data.get('attendees')
+        if isinstance(attendees, str):
+            try:
+                data['attendees'] = json.loads(attendees)
+            except json.JSONDecodeError:
+                data['attendees'] = []
+        return cls.model_construct(**data)
+    
     def __str__(self):
         return f"Event({self.title}, {self.start_time.strftime('%Y-%m-%d %H:%M')})"
 
 
+class EventTemplate(BaseModel):
+    """An event people in a profession typically have (hybrid mode template)."""
+    title: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = Field(None, max_length=1000)
+    category: Literal["meeting", "appointment", "personal", "work"] = "meeting"
+    priority: Literal["high", "medium", "low"] = "medium"
+    duration_minutes: int = Field(..., ge=5, le=720, description="Typical duration in minutes")
+    attendees: int = Field(0, ge=0, le=20, description="Typical number of other attendees")
+    location: Optional[str] = Field(None, max_length=200)
+    recurrence: Optional[str] = Field(None, description="Recurrence pattern")
+
+
+class ProfessionTemplate(BaseModel):
+    """
+    A profession with its working pattern and typical events.
+    
+    In hybrid mode the LLM writes a small pool of these, and a local Faker
+    engine expands them into any number of User/CalendarEvent records.
+    """
+    profession: str = Field(..., min_length=1, max_length=100, description="Job title")
+    working_hours: WorkingHours
+    meeting_duration_preference: str = Field(..., description="Preferred meeting duration")
+    events: List[EventTemplate] = Field(..., min_length=1)
+
+
 class GenerationStats(BaseModel):
     """Model for tracking generation statistics."""
     users_generated: int = 0
     events_generated: int = 0
     total_api_calls: int = 0
     failed_generations: int = 0
+    duplicates_rejected: int = 0  # Users rejected by the uniqueness index
+    parse_failures: int = 0  # Responses without recoverable JSON (each costs a new call)
+    retries_avoided: int = 0  # Responses that were not strict JSON but were recovered
+    truncated_responses: int = 0  # Completions cut off by max_tokens (finish_reason "length")
+    cache_hits: int = 0  # LLM responses served from the response cache
+    cache_misses: int = 0
+    redis_write_seconds: float = 0.0  # Time spent persisting to Redis
+    call_latencies: List[float] = Field(default_factory=list, exclude=True)  # Seconds per LLM call
+    first_record_latencies: List[float] = Field(default_factory=list, exclude=True)  # Seconds to first streamed event
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     
@@ -118,6 +258,59 @@ class GenerationStats(BaseModel):
         if self.start_time and self.end_time:
             return (self.end_time - self.start_time).total_seconds()
         return None
+    
+    def latency_percentile(self, percentile: float, first_record: bool = False) -> Optional[float]:
+        """Return the given percentile (0-100) of LLM call latency in seconds.
+        
+        With first_record=True, the time until the first event of a streamed
+        call was validated is used instead of the full call latency.
+        """
+        samples = self.first_record_latencies if first_record else self.call_latencies
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+# Batch validators, built once (building a TypeAdapter compiles a schema)
+USER_LIST_ADAPTER = TypeAdapter(List[User])
+EVENT_LIST_ADAPTER = TypeAdapter(List[CalendarEvent])
+TEMPLATE_LIST_ADAPTER = TypeAdapter(List[ProfessionTemplate])
+
+
+def validate_many(adapter: TypeAdapter, items: List[Any],
+                  context: Optional[Dict[str, Any]] = None) -> Tuple[List[Any], List[Tuple[Any, str]]]:
+    """Validate a list of records in one call, keeping the valid ones.
+    
+    The whole list goes through the adapter at once. If some items are
+    invalid, their indexes are read from the errors and the rest are
+    validated again as a batch, so one bad record costs one extra pass
+    instead of a per-record loop.
+    
+    Args:
+        adapter: USER_LIST_ADAPTER or EVENT_LIST_ADAPTER
+        items: Raw records (dicts)
+        context: Validation context (e.g. {'user_id': ...} for events)
+    
+    Returns:
+        Tuple of (valid models, [(invalid item, error message)])
+    """
+    try:
+        return adapter.validate_python(items, context=context), []
+    except ValidationError as e:
+        messages: Dict[int, List[str]] = {}
+        for error in e.errors():
+            loc = error.get('loc') or ()
+            if loc and isinstance(loc[0], int):
+                field = '.'.join(str(part) for part in loc[1:]) or 'item'
+                messages.setdefault(loc[0], []).append(f"{field}: {error['msg']}")
+        if not messages:
+            raise  # Not an item-level error (e.g. not a list at all)
+    
+    invalid = [(items[i], '; '.join(msgs)) for i, msgs in sorted(messages.items())]
+    remaining = [item for i, item in enumerate(items) if i not in messages]
+    return adapter.validate_python(remaining, context=context), invalid
 
 
 class GenerationBatch(BaseModel):
@@ -126,5 +319,6 @@ class GenerationBatch(BaseModel):
     users: List[User] = Field(default_factory=list)
     events: List[CalendarEvent] = Field(default_factory=list)
     stats: GenerationStats = Field(default_factory=GenerationStats)
-    provider_used: Literal["openai", "deepseek"]
+    provider_used: Literal["openai", "deepseek", "balanced"]
+    seed: Optional[int] = None  # Seed of a reproducible run
     created_at: datetime = Field(default_factory=datetime.now) 
\ No newline at end of file
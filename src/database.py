@@ -23,11 +23,73 @@ Architecture Pattern: Repository + Data Access Layer
 
 import json
 import redis
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+from datetime import datetime, timezone
 import uuid
 
 from .data_models import User, CalendarEvent, GenerationStats, GenerationBatch
+from .entity_codec import EntityCodec
+from .event_store import EventStore
+
+
+# Secondary indexes: idx:{entity}:{name}:{value} → Set of IDs with that field value
+USER_INDEXES = {'profession': 'profession', 'tz': 'timezone'}  # Index name → User field
+EVENT_INDEXES = {'category': 'category', 'priority': 'priority'}  # Index name → CalendarEvent field
+
+
+# write_mode "lua": one EVALSHA writes a batch of entities with all their index
+# entries. ARGV[1] is a JSON array of records, ARGV[2] the number of keys per
+# record. Every key a record touches is passed in KEYS, built by
+# _user_keys/_event_keys (the same layout the pipelined writes use), so the
+# scripts never construct key names. Needs Redis 4+ (multi-field HSET).
+SAVE_USERS_SCRIPT = """
+local records = cjson.decode(ARGV[1])
+local per = tonumber(ARGV[2])
+for i, r in ipairs(records) do
+    -- r = {user_id, field1, value1, ...}
+    -- KEYS: record hash, users set, email key, then the index sets
+    local k, id = (i - 1) * per, r[1]
+    redis.call('HSET', KEYS[k + 1], unpack(r, 2))
+    redis.call('SADD', KEYS[k + 2], id)
+    redis.call('SET', KEYS[k + 3], id)
+    for j = k + 4, k + per do
+        redis.call('SADD', KEYS[j], id)
+    end
+end
+return #records
+"""
+
+SAVE_EVENTS_SCRIPT = """
+local records = cjson.decode(ARGV[1])
+local per = tonumber(ARGV[2])
+for i, r in ipairs(records) do
+    -- r = {event_id, start score, field1, value1, ...}
+    -- KEYS: record hash, events set, user's event set, user's and global
+    -- time sorted sets, then the index sets
+    local k, id = (i - 1) * per, r[1]
+    redis.call('HSET', KEYS[k + 1], unpack(r, 3))
+    redis.call('SADD', KEYS[k + 2], id)
+    redis.call('SADD', KEYS[k + 3], id)
+    redis.call('ZADD', KEYS[k + 4], r[2], id)
+    redis.call('ZADD', KEYS[k + 5], r[2], id)
+    for j = k + 6, k + per do
+        redis.call('SADD', KEYS[j], id)
+    end
+end
+return #records
+"""
+
+
+def index_key(entity: str, name: str, value: str) -> str:
+    """'idx:user:tz:America/New_York' for entity 'user', index 'tz' and that value."""
+    return f"idx:{entity}:{name}:{value}"
+
+
+def time_score(value: datetime) -> float:
+    """Sorted-set score of a datetime: epoch seconds (naive values are read as UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
 
 
 class RedisManager:
@@ -43,11 +105,32 @@ class RedisManager:
     - users → Set of all user IDs (for indexing)
     - events → Set of all event IDs (for indexing)
     - user_events:{user_id} → Set of event IDs for that user
+    - user_events_by_time:{user_id} → Sorted set of the user's event IDs, scored by start time
+    - events_by_time → Sorted set of all event IDs, scored by start time
+    - idx:user:profession:{value}, idx:user:tz:{value} → Sets of user IDs
+    - idx:event:category:{value}, idx:event:priority:{value} → Sets of event IDs
+    - templates:{key} → JSON template pool for hybrid generation (expires)
+    
+    With codec "json"/"msgpack", user:{id}/event:{id} hold one blob per
+    entity instead of a hash, or with `buckets` the blobs are fields of
+    bucket:user:{n}/bucket:event:{n} hashes (see entity_codec.py). Index
+    keys are the same for every codec.
+    
+    Writes go through a non-transactional pipeline: each entity is one
+    HSET ... mapping plus its index updates, and the pipeline is flushed
+    every `pipeline_size` entities, so a bulk save costs a handful of round
+    trips instead of one per field. Bulk reads walk the index sets with SSCAN
+    and fetch the hashes with pipelined HGETALL in chunks of `scan_count`,
+    yielding entities as a generator so memory stays bounded.
     
     Why this structure?
     - Fast lookups by ID (O(1) operations)
     - Easy to get all users/events
     - Efficient user→events relationships
+    - Time ranges in O(log n + k) with ZRANGEBYSCORE instead of loading and
+      filtering every event of a user
+    - Filters (find_users/find_events) are combined server-side with
+      SINTER/SUNION/ZINTERSTORE, so only matching records are read
     - Memory efficient for Redis
     """
     
@@ -66,11 +149,36 @@ class RedisManager:
                    - db: Database number (0-15)
                    - password: Redis password (if any)
                    - decode_responses: Auto-decode bytes to strings
-                   
+                   - pipeline_size: Entities buffered per pipeline flush
+                     (entities per script call with write_mode "lua")
+                   - write_mode: "pipeline" (HSET mapping), "legacy"
+                     (one HSET per field, for Redis 3.x servers) or "lua"
+                     (atomic server-side script per batch, Redis 4+)
+                   - codec: Record layout, "hash" (default), "json" or
+                     "msgpack" (one blob per entity)
+                   - buckets: Hashes to group json/msgpack blobs into
+                     (0 = one key per entity)
+                   - scan_count: IDs fetched per SSCAN/pipelined read chunk
+                   - validate_reads: Re-validate entities read back (default
+                     false: stored data is rebuilt with model_construct)
+        
         Raises:
             redis.ConnectionError: If can't connect to Redis server
         """
         self.config = config
+        self.pipeline_size = max(1, int(config.get('pipeline_size', 500)))
+        self.write_mode = config.get('write_mode', 'pipeline')
+        self.scan_count = max(1, int(config.get('scan_count', 1000)))
+        # Everything stored here was validated on the way in
+        self.validate_reads = bool(config.get('validate_reads', False))
+        
+        if self.write_mode not in ('pipeline', 'legacy', 'lua'):
+            raise ValueError(f"Unsupported Redis write_mode: {self.write_mode}")
+        
+        self.codec = EntityCodec.from_config(config)
+        if self.write_mode == 'lua' and self.codec.name != 'hash':
+            raise ValueError("write_mode \"lua\" writes hashes; use it with codec \"hash\"")
+        self._binary_client = None
         
         # Create Redis client with configuration
         # decode_responses=True automatically converts bytes to strings
@@ -90,69 +198,260 @@ class RedisManager:
         except redis.ConnectionError as e:
             print(f" Failed to connect to Redis: {e}")
             raise  # Re-raise exception to stop application startup
+        
+        # Lua save scripts: loaded once (SCRIPT LOAD), then called by SHA (EVALSHA).
+        # redis-py reloads a script by itself if the server lost it (NOSCRIPT).
+        self._save_users_script = None
+        self._save_events_script = None
+        if self.write_mode == 'lua':
+            self._save_users_script = self.client.register_script(SAVE_USERS_SCRIPT)
+            self._save_events_script = self.client.register_script(SAVE_EVENTS_SCRIPT)
+            self.client.script_load(SAVE_USERS_SCRIPT)
+            self.client.script_load(SAVE_EVENTS_SCRIPT)
+    
+    def _reader(self, codec: EntityCodec):
+        """Client for reading records of a codec.
+        
+        msgpack blobs are not UTF-8, so they are read on a second connection
+        that does not decode responses. Writes can share the main client.
+        """
+        if not codec.binary:
+            return self.client
+        if self._binary_client is None:
+            self._binary_client = redis.Redis(
+                host=self.config.get('host', 'localhost'),
+                port=self.config.get('port', 6379),
+                db=self.config.get('db', 0),
+                password=self.config.get('password'),
+                decode_responses=False
+            )
+        return self._binary_client
     
     def _generate_id(self, prefix: str = "") -> str:
         """Generate unique ID with optional prefix."""
         return f"{prefix}{uuid.uuid4().hex[:8]}" if prefix else uuid.uuid4().hex[:8]
     
-    # User operations
-    def save_user(self, user: User) -> User:
-        """Save a user to Redis.
+    # Serialization helpers
+    @staticmethod
+    def _to_redis_hash(data: Dict[str, Any]) -> Dict[str, str]:
+        """Prepare model data for a Redis hash.
         
-        Args:
-            user: User object to save
-            
-        Returns:
-            User object with generated ID
+        None values are skipped, nested dicts/lists become JSON and
+        datetimes become ISO strings.
         """
+        redis_data = {}
+        for key, value in data.items():
+            if value is not None:  # Skip None values
+                if isinstance(value, (dict, list)):
+                    redis_data[key] = json.dumps(value)
+                elif isinstance(value, datetime):
+                    redis_data[key] = value.isoformat()
+                else:
+                    redis_data[key] = str(value)
+        return redis_data
+    
+    def _hset(self, pipe, key: str, mapping: Dict[str, str]):
+        """Queue a hash write on a pipeline using the configured write mode."""
+        if not mapping:  # Only call hset if we have data
+            return
+        
+        if self.write_mode == 'legacy':
+            # Redis 3.x compatible version (no multi-field HSET)
+            for field, value in mapping.items():
+                pipe.hset(key, field, value)
+        else:
+            pipe.hset(key, mapping=mapping)
+    
+    def _prepare_user(self, user: User) -> Dict[str, str]:
+        """Assign missing ID/timestamp and encode a user as a Redis hash."""
         if not user.user_id:
             user.user_id = self._generate_id("user_")
         
         if not user.created_at:
             user.created_at = datetime.now()
         
+        return self._to_redis_hash(user.model_dump())
+    
+    def _user_keys(self, mapping: Dict[str, str]) -> List[str]:
+        """Keys a user's save writes: its record, the users set, its email key, then its index sets."""
+        return [self.codec.key('user', mapping['user_id']), "users", f"email:{mapping['email']}",
+                *(index_key('user', name, mapping[field]) for name, field in USER_INDEXES.items())]
+    
+    def _queue_user_hash(self, pipe, mapping: Dict[str, str]):
+        """Queue the writes for a user already encoded as a Redis hash."""
+        user_id = mapping['user_id']
+        _, users_key, email_key, *index_keys = self._user_keys(mapping)
         # Store user data
-        user_key = f"user:{user.user_id}"
-        user_data = user.dict()
-        
-        # Prepare data for Redis (filter out None values and convert properly)
-        redis_data = {}
-        for k, v in user_data.items():
-            if v is not None:  # Skip None values
-                if isinstance(v, (dict, list)):
-                    redis_data[k] = json.dumps(v)
-                elif isinstance(v, datetime):
-                    redis_data[k] = v.isoformat()
-                else:
-                    redis_data[k] = str(v)
-        
-        if redis_data:  # Only call hset if we have data
-            # Redis 3.x compatible version (no mapping parameter)
-            for field, value in redis_data.items():
-                self.client.hset(user_key, field, value)
+        self.codec.queue_write(pipe, 'user', mapping, self._hset)
         
         # Add to user index
-        self.client.sadd("users", user.user_id)
+        pipe.sadd(users_key, user_id)
         
         # Add email index for quick lookups
-        self.client.set(f"email:{user.email}", user.user_id)
+        pipe.set(email_key, user_id)
+        
+        # Secondary indexes for filtered reads
+        for key in index_keys:
+            pipe.sadd(key, user_id)
+    
+    def _user_record(self, mapping: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """SAVE_USERS_SCRIPT input for a user: (its keys, [user_id, field1, value1, ...])."""
+        return self._user_keys(mapping), [mapping['user_id'], *(item for pair in mapping.items() for item in pair)]
+    
+    def _prepare_event(self, event: CalendarEvent) -> Tuple[Dict[str, str], float]:
+        """Assign missing ID/timestamp and encode an event as (Redis hash, start score)."""
+        if not event.event_id:
+            event.event_id = self._generate_id("event_")
+        
+        if not event.created_at:
+            event.created_at = datetime.now()
+        
+        return self._to_redis_hash(event.model_dump()), time_score(event.start_time)
+    
+    def _event_keys(self, mapping: Dict[str, str]) -> List[str]:
+        """Keys an event's save writes: its record, the events set, the user's event set,
+        the user's and the global time sorted sets, then its index sets."""
+        user_id = mapping['user_id']
+        return [self.codec.key('event', mapping['event_id']), "events", f"user_events:{user_id}",
+                f"user_events_by_time:{user_id}", "events_by_time",
+                *(index_key('event', name, mapping[field]) for name, field in EVENT_INDEXES.items())]
+    
+    def _event_record(self, mapping: Dict[str, str], start_score: float) -> Tuple[List[str], List[str]]:
+        """SAVE_EVENTS_SCRIPT input for an event: (its keys, [event_id, score, field1, value1, ...])."""
+        return self._event_keys(mapping), [mapping['event_id'], repr(start_score),
+                                           *(item for pair in mapping.items() for item in pair)]
+    
+    def _queue_event_hash(self, pipe, mapping: Dict[str, str], start_score: float):
+        """Queue the writes for an event already encoded as a Redis hash.
+        
+        Args:
+            pipe: Pipeline to queue on
+            mapping: Event hash
+            start_score: Start time as epoch seconds (time_score)
+        """
+        event_id = mapping['event_id']
+        _, events_key, user_events_key, user_time_key, time_key, *index_keys = self._event_keys(mapping)
+        # Store event data
+        self.codec.queue_write(pipe, 'event', mapping, self._hset)
+        
+        # Add to event index
+        pipe.sadd(events_key, event_id)
+        
+        # Add to user's events
+        pipe.sadd(user_events_key, event_id)
+        
+        # Time indexes for range queries
+        pipe.zadd(user_time_key, {event_id: start_score})
+        pipe.zadd(time_key, {event_id: start_score})
+        
+        # Secondary indexes for filtered reads
+        for key in index_keys:
+            pipe.sadd(key, event_id)
+    
+    def _save_many(self, items: Iterable, queue) -> int:
+        """Write entities through a non-transactional pipeline.
+        
+        The pipeline is flushed every `pipeline_size` entities so memory on
+        both sides stays bounded for arbitrarily large iterables.
+        
+        Args:
+            items: Entities to save
+            queue: Function queuing the writes for one entity on a pipeline
+        
+        Returns:
+            Number of entities saved
+        """
+        saved = 0
+        pipe = self.client.pipeline(transaction=False)
+        for item in items:
+            queue(pipe, item)
+            saved += 1
+            if saved % self.pipeline_size == 0:
+                pipe.execute()
+        
+        pipe.execute()
+        return saved
+    
+    def _save_many_lua(self, records: Iterable[Tuple[List[str], List[str]]], script) -> int:
+        """Write encoded records with a save script, `pipeline_size` records per call.
+        
+        Each call is one EVALSHA that Redis runs to the end before serving
+        anything else, so no reader ever sees an entity without its index
+        entries (or the reverse), and a client that dies mid-save leaves
+        only complete entities behind.
+        
+        Every key is declared in KEYS, as Redis requires of scripts. A batch
+        still spans many hash slots, so on Redis Cluster use the pipeline
+        write mode.
+        
+        Args:
+            records: (keys, record) pairs from _user_record/_event_record
+            script: Registered SAVE_USERS_SCRIPT or SAVE_EVENTS_SCRIPT
+        
+        Returns:
+            Number of entities saved
+        """
+        saved = 0
+        keys, batch = [], []
+        for record_keys, record in records:
+            keys.extend(record_keys)
+            batch.append(record)
+            if len(batch) == self.pipeline_size:
+                saved += script(keys=keys, args=[json.dumps(batch), len(record_keys)])
+                keys, batch = [], []
+        if batch:
+            saved += script(keys=keys, args=[json.dumps(batch), len(keys) // len(batch)])
+        return saved
+    
+    # User operations
+    def save_user(self, user: User) -> User:
+        """Save a user to Redis.
         
+        Args:
+            user: User object to save
+        
+        Returns:
+            User object with generated ID
+        """
+        self.save_users([user])
         return user
     
-    def get_user(self, user_id: str) -> Optional[User]:
-        """Get a user by ID.
+    def save_users(self, users: Iterable[User]) -> int:
+        """Save many users to Redis in pipelined round trips.
         
         Args:
-            user_id: User ID
-            
+            users: User objects to save (IDs are assigned in place if missing)
+        
         Returns:
-            User object or None if not found
+            Number of users saved
+        """
+        return self.save_user_hashes(self._prepare_user(user) for user in users)
+    
+    def user_hashes(self, users: Iterable[User]) -> Iterator[Dict[str, str]]:
+        """Encode users as save_users stores them (missing IDs/timestamps are assigned).
+        
+        For writers that hand records to another process, e.g. the ingest stream.
         """
-        user_key = f"user:{user_id}"
-        user_data = self.client.hgetall(user_key)
+        return (self._prepare_user(user) for user in users)
+    
+    def save_user_hashes(self, mappings: Iterable[Dict[str, str]]) -> int:
+        """Save users already encoded as Redis hashes (user_hashes), with all their indexes.
         
-        if not user_data:
-            return None
+        Args:
+            mappings: User hashes, each with its user_id
+        
+        Returns:
+            Number of users saved
+        """
+        if self.write_mode == 'lua':
+            return self._save_many_lua((self._user_record(mapping) for mapping in mappings),
+                                       self._save_users_script)
+        return self._save_many(mappings, self._queue_user_hash)
+    
+    def _parse_user_hash(self, user_data: Dict[str, str]) -> User:
+        """Convert a Redis user hash back into a User object."""
+        if not self.validate_reads:
+            return User.from_trusted(user_data)
         
         # Parse JSON fields
         for key, value in user_data.items():
@@ -167,14 +466,126 @@ class RedisManager:
                 except ValueError:
                     user_data[key] = None
         
-        return User(**user_data)
+        return User.model_validate(user_data)
+    
+    def _iter_id_chunks(self, set_key: str) -> Iterator[List[str]]:
+        """Walk an index set with SSCAN, yielding IDs in chunks of `scan_count`.
+        
+        Unlike SMEMBERS the full ID set is never held in memory. SSCAN may
+        return an ID twice if the set is resized during the scan, which only
+        happens when it is written to concurrently.
+        """
+        chunk = []
+        for member in self.client.sscan_iter(set_key, count=self.scan_count):
+            chunk.append(member)
+            if len(chunk) >= self.scan_count:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    def _fetch_hashes(self, prefix: str, ids: List[str],
+                      codec: Optional[EntityCodec] = None) -> List[Dict[str, str]]:
+        """Fetch many entity hashes in one pipelined round trip (missing entities are skipped).
+        
+        Args:
+            prefix: Entity type, "user" or "event"
+            ids: Entity IDs
+            codec: Codec the records are stored with (default: the configured one)
+        """
+        codec = codec or self.codec
+        pipe = self._reader(codec).pipeline(transaction=False)
+        for entity_id in ids:
+            codec.queue_read(pipe, prefix, entity_id)
+        decoded = (codec.decode(prefix, raw) for raw in pipe.execute())
+        return [data for data in decoded if data]
+    
+    def _iter_hashes(self, prefix: str, ids: List[str]) -> Iterator[Dict[str, str]]:
+        """Fetch hashes for a known ID list, one pipelined round trip per `scan_count` IDs."""
+        for chunk_start in range(0, len(ids), self.scan_count):
+            yield from self._fetch_hashes(prefix, ids[chunk_start:chunk_start + self.scan_count])
+    
+    def _query_ids(self, groups: List[List[str]], time_key: Optional[str] = None,
+                   start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   limit: Optional[int] = None) -> List[str]:
+        """Combine index keys server-side and return the matching IDs.
+        
+        Keys within a group are OR'ed (SUNIONSTORE into a temporary key),
+        groups are AND'ed (SINTERSTORE). With a time key the intersection is
+        a ZINTERSTORE that keeps the time scores (weight 0 for the sets), so
+        the range and order come from ZRANGEBYSCORE. Without one the IDs are
+        ordered by SORT ... ALPHA. Either way `limit` is applied by Redis, so
+        only the returned IDs cross the network. Everything runs in one
+        MULTI, so temporary keys are gone before anyone else could see them.
+        
+        Args:
+            groups: Lists of set keys (OR within a list, AND across lists)
+            time_key: Sorted set scored by start time (None = order by ID)
+            start / end: Time range [start, end) on the time key
+            limit: Maximum number of IDs
+        
+        Returns:
+            Matching IDs, ordered by time with a time key, else by ID
+        """
+        if any(not group for group in groups):
+            return []  # An empty OR group matches nothing
+        
+        pipe = self.client.pipeline(transaction=True)
+        keys, temporary = [], []
+        for group in groups:
+            if len(group) == 1:
+                keys.append(group[0])
+                continue
+            union_key = f"tmp:query:{uuid.uuid4().hex}"
+            pipe.sunionstore(union_key, group)
+            keys.append(union_key)
+            temporary.append(union_key)
+        
+        if time_key is not None:
+            range_key = time_key
+            if keys:
+                range_key = f"tmp:query:{uuid.uuid4().hex}"
+                pipe.zinterstore(range_key, {time_key: 1, **{key: 0 for key in keys}}, aggregate='SUM')
+                temporary.append(range_key)
+            low = time_score(start) if start is not None else '-inf'
+            high = f"({time_score(end)}" if end is not None else '+inf'
+            pipe.zrangebyscore(range_key, low, high, start=0, num=-1 if limit is None else limit)
+        else:
+            sort_key = keys[0]
+            if len(keys) > 1:
+                sort_key = f"tmp:query:{uuid.uuid4().hex}"
+                pipe.sinterstore(sort_key, keys)
+                temporary.append(sort_key)
+            pipe.sort(sort_key, alpha=True, **({'start': 0, 'num': limit} if limit is not None else {}))
+        
+        if temporary:
+            pipe.delete(*temporary)
+        results = pipe.execute()
+        ids = results[-2] if temporary else results[-1]
+        return list(ids)
+    
+    def get_user(self, user_id: str) -> Optional[User]:
+        """Get a user by ID.
+        
+        Args:
+            user_id: User ID
+        
+        Returns:
+            User object or None if not found
+        """
+        found = self._fetch_hashes("user", [user_id])
+        
+        if not found:
+            return None
+        
+        return self._parse_user_hash(found[0])
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get a user by email.
         
         Args:
             email: User email
-            
+        
         Returns:
             User object or None if not found
         """
@@ -183,36 +594,46 @@ class RedisManager:
             return self.get_user(user_id)
         return None
     
-    def get_all_users(self) -> List[User]:
-        """Get all users from Redis.
+    def get_users(self, user_ids: List[str]) -> Iterator[User]:
+        """Get users by ID in pipelined chunks (missing IDs are skipped)."""
+        for user_data in self._iter_hashes("user", user_ids):
+            yield self._parse_user_hash(user_data)
+    
+    def find_user_ids(self, professions: Optional[Iterable[str]] = None,
+                      timezones: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[str]:
+        """IDs of users matching every given filter (any of the values within one filter).
+        
+        For every user in no particular order, stream get_all_users instead.
+        
+        Args:
+            professions: Allowed professions (None = any)
+            timezones: Allowed timezones (None = any)
+            limit: Maximum number of IDs
         
         Returns:
-            List of User objects
+            Sorted user IDs (sorted and sliced by Redis)
         """
-        user_ids = self.client.smembers("users")
-        users = []
+        groups = [[index_key('user', name, value) for value in values]
+                  for name, values in (('profession', professions), ('tz', timezones)) if values is not None]
+        return self._query_ids(groups or [["users"]], limit=limit)
+    
+    def find_users(self, professions: Optional[Iterable[str]] = None,
+                   timezones: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> Iterator[User]:
+        """Users matching the filters of find_user_ids; only matching hashes are read."""
+        return self.get_users(self.find_user_ids(professions, timezones, limit))
+    
+    def get_all_users(self) -> Iterator[User]:
+        """Get all users from Redis.
         
-        for user_id in user_ids:
-            user_key = f"user:{user_id}"
-            user_data = self.client.hgetall(user_key)
-            
-            if user_data:
-                # Parse JSON fields
-                for key, value in user_data.items():
-                    if key in ['preferences']:
-                        try:
-                            user_data[key] = json.loads(value)
-                        except json.JSONDecodeError:
-                            pass
-                    elif key == 'created_at' and value:
-                        try:
-                            user_data[key] = datetime.fromisoformat(value)
-                        except ValueError:
-                            user_data[key] = None
-                
-                users.append(User(**user_data))
-        
-        return users
+        Users are streamed: IDs come from SSCAN and hashes are fetched with
+        one pipelined round trip per chunk.
+        
+        Returns:
+            Generator of User objects
+        """
+        for ids in self._iter_id_chunks("users"):
+            for user_data in self._fetch_hashes("user", ids):
+                yield self._parse_user_hash(user_data)
     
     # Event operations
     def save_event(self, event: CalendarEvent) -> CalendarEvent:
@@ -220,58 +641,64 @@ class RedisManager:
         
         Args:
             event: CalendarEvent object to save
-            
+        
         Returns:
             CalendarEvent object with generated ID
         """
-        if not event.event_id:
-            event.event_id = self._generate_id("event_")
-        
-        if not event.created_at:
-            event.created_at = datetime.now()
-        
-        # Store event data
-        event_key = f"event:{event.event_id}"
-        event_data = event.dict()
+        self.save_events([event])
+        return event
+    
+    def save_events(self, events: Iterable[CalendarEvent]) -> int:
+        """Save many events to Redis in pipelined round trips.
         
-        # Prepare data for Redis (filter out None values and convert properly)
-        redis_data = {}
-        for key, value in event_data.items():
-            if value is not None:  # Skip None values
-                if isinstance(value, datetime):
-                    redis_data[key] = value.isoformat()
-                elif isinstance(value, list):
-                    redis_data[key] = json.dumps(value)
-                else:
-                    redis_data[key] = str(value)
+        Args:
+            events: CalendarEvent objects to save (IDs are assigned in place if missing)
         
-        if redis_data:  # Only call hset if we have data
-            # Redis 3.x compatible version (no mapping parameter)
-            for field, value in redis_data.items():
-                self.client.hset(event_key, field, value)
+        Returns:
+            Number of events saved
+        """
+        return self._save_event_rows(self._prepare_event(event) for event in events)
+    
+    def event_hashes(self, events: Iterable[CalendarEvent]) -> Iterator[Dict[str, str]]:
+        """Encode events as save_events stores them (missing IDs/timestamps are assigned)."""
+        return (self._prepare_event(event)[0] for event in events)
+    
+    def save_event_hashes(self, mappings: Iterable[Dict[str, str]]) -> int:
+        """Save events already encoded as Redis hashes (event_hashes, EventStore.iter_redis_hashes).
         
-        # Add to event index
-        self.client.sadd("events", event.event_id)
+        Time-index scores are parsed from the start_time strings.
         
-        # Add to user's events
-        self.client.sadd(f"user_events:{event.user_id}", event.event_id)
+        Args:
+            mappings: Event hashes, each with its event_id
         
-        return event
+        Returns:
+            Number of events saved
+        """
+        return self._save_event_rows((mapping, time_score(datetime.fromisoformat(mapping['start_time'])))
+                                     for mapping in mappings)
     
-    def get_event(self, event_id: str) -> Optional[CalendarEvent]:
-        """Get an event by ID.
+    def _save_event_rows(self, rows: Iterable[Tuple[Dict[str, str], float]]) -> int:
+        """Save (event hash, start score) rows with the configured write mode."""
+        if self.write_mode == 'lua':
+            return self._save_many_lua((self._event_record(*row) for row in rows), self._save_events_script)
+        return self._save_many(rows, lambda pipe, row: self._queue_event_hash(pipe, *row))
+    
+    def save_event_store(self, store: EventStore, start: int = 0) -> int:
+        """Save the rows of a columnar EventStore (from `start` on) in pipelined round trips.
+        
+        Hashes are encoded straight from the columns; no models are built.
+        Every row already has its event_id and created_at. Time-index scores
+        come from the start_time column in one vectorized step.
         
-        Args:
-            event_id: Event ID
-            
         Returns:
-            CalendarEvent object or None if not found
+            Number of events saved
         """
-        event_key = f"event:{event_id}"
-        event_data = self.client.hgetall(event_key)
-        
-        if not event_data:
-            return None
+        return self._save_event_rows(zip(store.iter_redis_hashes(start), store.start_scores(start).tolist()))
+    
+    def _parse_event_hash(self, event_data: Dict[str, str]) -> CalendarEvent:
+        """Convert a Redis event hash back into a CalendarEvent object."""
+        if not self.validate_reads:
+            return CalendarEvent.from_trusted(event_data)
         
         # Parse fields
         for key, value in event_data.items():
@@ -286,57 +713,176 @@ class RedisManager:
                 except json.JSONDecodeError:
                     event_data[key] = []
         
-        return CalendarEvent(**event_data)
+        return CalendarEvent.model_validate(event_data)
     
-    def get_user_events(self, user_id: str) -> List[CalendarEvent]:
+    def get_event(self, event_id: str) -> Optional[CalendarEvent]:
+        """Get an event by ID.
+        
+        Args:
+            event_id: Event ID
+        
+        Returns:
+            CalendarEvent object or None if not found
+        """
+        found = self._fetch_hashes("event", [event_id])
+        
+        if not found:
+            return None
+        
+        return self._parse_event_hash(found[0])
+    
+    def get_user_events(self, user_id: str) -> Iterator[CalendarEvent]:
         """Get all events for a user.
         
         Args:
             user_id: User ID
-            
+        
+        Returns:
+            Generator of CalendarEvent objects
+        """
+        for ids in self._iter_id_chunks(f"user_events:{user_id}"):
+            for event_data in self._fetch_hashes("event", ids):
+                yield self._parse_event_hash(event_data)
+    
+    def get_events_in_range(self, user_id: Optional[str], start: datetime, end: datetime,
+                            limit: Optional[int] = None, offset: int = 0) -> List[CalendarEvent]:
+        """Get the events starting in [start, end), ordered by start time.
+        
+        Uses the time index: one ZRANGEBYSCORE (O(log n + k)) and one
+        pipelined fetch of the k matching hashes, instead of loading every
+        event and filtering in Python.
+        
+        Args:
+            user_id: User whose events to return (None = all users)
+            start: Range start (inclusive); naive values are read as UTC
+            end: Range end (exclusive)
+            limit: Maximum number of events (None = all)
+            offset: Matching events to skip first (paging)
+        
         Returns:
             List of CalendarEvent objects
         """
-        event_ids = self.client.smembers(f"user_events:{user_id}")
-        events = []
+        key = f"user_events_by_time:{user_id}" if user_id else "events_by_time"
+        # "(" makes the end exclusive; LIMIT offset -1 means no limit
+        ids = self.client.zrangebyscore(key, time_score(start), f"({time_score(end)}",
+                                        start=offset, num=-1 if limit is None else limit)
+        return list(self.get_events(ids))
+    
+    def get_events(self, event_ids: List[str]) -> Iterator[CalendarEvent]:
+        """Get events by ID in pipelined chunks (missing IDs are skipped)."""
+        for event_data in self._iter_hashes("event", event_ids):
+            yield self._parse_event_hash(event_data)
+    
+    def find_event_ids(self, categories: Optional[Iterable[str]] = None,
+                       priorities: Optional[Iterable[str]] = None,
+                       user_ids: Optional[Iterable[str]] = None,
+                       start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       limit: Optional[int] = None) -> List[str]:
+        """IDs of events matching every given filter (any of the values within one filter).
+        
+        Results always come from the events_by_time ZSET, so they are ordered
+        and `limit`ed by Redis. For every event in no particular order,
+        stream get_all_events instead.
+        
+        Args:
+            categories: Allowed categories (None = any)
+            priorities: Allowed priorities (None = any)
+            user_ids: Owners (None = any user, e.g. the result of find_user_ids)
+            start / end: Start time range [start, end); naive values are read as UTC
+            limit: Maximum number of IDs
+        
+        Returns:
+            Event IDs ordered by start time
+        """
+        groups = [[index_key('event', name, value) for value in values]
+                  for name, values in (('category', categories), ('priority', priorities)) if values is not None]
+        if user_ids is not None:
+            groups.append([f"user_events:{user_id}" for user_id in user_ids])
         
-        for event_id in event_ids:
-            event = self.get_event(event_id)
-            if event:
-                events.append(event)
+        return self._query_ids(groups, "events_by_time", start, end, limit)
+    
+    def find_events(self, categories: Optional[Iterable[str]] = None,
+                    priorities: Optional[Iterable[str]] = None,
+                    user_ids: Optional[Iterable[str]] = None,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    limit: Optional[int] = None) -> Iterator[CalendarEvent]:
+        """Events matching the filters of find_event_ids; only matching hashes are read."""
+        return self.get_events(self.find_event_ids(categories, priorities, user_ids, start, end, limit))
+    
+    def rebuild_indexes(self) -> Dict[str, int]:
+        """Rebuild the time and secondary indexes from the stored records.
         
-        return events
+        For data saved before the indexes existed. Reads the records in
+        SSCAN chunks and re-adds them in pipelined ZADD/SADD calls.
+        
+        Returns:
+            Dictionary with the number of users and events indexed
+        """
+        counts = {'users': 0, 'events': 0}
+        for ids in self._iter_id_chunks("users"):
+            pipe = self.client.pipeline(transaction=False)
+            for user_data in self._fetch_hashes("user", ids):
+                for name, field in USER_INDEXES.items():
+                    pipe.sadd(index_key('user', name, user_data[field]), user_data['user_id'])
+                counts['users'] += 1
+            pipe.execute()
+        
+        for ids in self._iter_id_chunks("events"):
+            pipe = self.client.pipeline(transaction=False)
+            for event_data in self._fetch_hashes("event", ids):
+                event_id = event_data['event_id']
+                score = time_score(datetime.fromisoformat(event_data['start_time']))
+                pipe.zadd(f"user_events_by_time:{event_data['user_id']}", {event_id: score})
+                pipe.zadd("events_by_time", {event_id: score})
+                for name, field in EVENT_INDEXES.items():
+                    pipe.sadd(index_key('event', name, event_data[field]), event_id)
+                counts['events'] += 1
+            pipe.execute()
+        return counts
     
-    def get_all_events(self) -> List[CalendarEvent]:
+    def get_all_events(self) -> Iterator[CalendarEvent]:
         """Get all events from Redis.
         
+        Events are streamed: IDs come from SSCAN and hashes are fetched with
+        one pipelined round trip per chunk.
+        
         Returns:
-            List of CalendarEvent objects
+            Generator of CalendarEvent objects
         """
-        event_ids = self.client.smembers("events")
-        events = []
+        for ids in self._iter_id_chunks("events"):
+            for event_data in self._fetch_hashes("event", ids):
+                yield self._parse_event_hash(event_data)
+    
+    def migrate_codec(self, codec: EntityCodec) -> Dict[str, int]:
+        """Rewrite every stored user and event with another codec.
         
-        for event_id in event_ids:
-            event_key = f"event:{event_id}"
-            event_data = self.client.hgetall(event_key)
-            
-            if event_data:
-                # Parse fields
-                for key, value in event_data.items():
-                    if key in ['start_time', 'end_time', 'created_at'] and value:
-                        try:
-                            event_data[key] = datetime.fromisoformat(value)
-                        except ValueError:
-                            event_data[key] = None
-                    elif key == 'attendees' and value:
-                        try:
-                            event_data[key] = json.loads(value)
-                        except json.JSONDecodeError:
-                            event_data[key] = []
-                
-                events.append(CalendarEvent(**event_data))
-        
-        return events
+        Records are read in SSCAN chunks with the current codec; each chunk's
+        old records are deleted and the new ones written in one MULTI, so no
+        entity is ever missing or stored twice. Indexes are not touched.
+        Afterwards this manager uses the new codec, but the config file is
+        not changed: set database.redis.codec/buckets to match before the
+        next run.
+        
+        Args:
+            codec: Target codec
+        
+        Returns:
+            Dictionary with the number of users and events migrated
+        """
+        old = self.codec
+        counts = {'users': 0, 'events': 0}
+        for entity, set_key in (('user', 'users'), ('event', 'events')):
+            for ids in self._iter_id_chunks(set_key):
+                records = self._fetch_hashes(entity, ids, old)
+                pipe = self.client.pipeline(transaction=True)
+                for mapping in records:
+                    old.queue_delete(pipe, entity, mapping[f"{entity}_id"])
+                    codec.queue_write(pipe, entity, mapping, self._hset)
+                pipe.execute()
+                counts[set_key] += len(records)
+        
+        self.codec = codec
+        return counts
     
     # Batch operations
     def save_batch(self, batch: GenerationBatch) -> GenerationBatch:
@@ -344,37 +890,76 @@ class RedisManager:
         
         Args:
             batch: GenerationBatch object to save
-            
+        
         Returns:
             Saved GenerationBatch object
         """
         # Save users and events first
-        for user in batch.users:
-            self.save_user(user)
+        self.save_users(batch.users)
+        self.save_events(batch.events)
         
-        for event in batch.events:
-            self.save_event(event)
+        return self.save_batch_metadata(batch, len(batch.users), len(batch.events),
+                                        [u.user_id for u in batch.users], [e.event_id for e in batch.events])
+    
+    def save_batch_metadata(self, batch: GenerationBatch, user_count: int, event_count: int,
+                            user_ids: Optional[List[str]] = None,
+                            event_ids: Optional[List[str]] = None) -> GenerationBatch:
+        """Save the metadata of a batch whose records are already saved.
         
-        # Save batch metadata
+        Why separate from save_batch? generate_and_save writes users and the
+        event store itself (pipelined, timed); the batch record only adds the
+        run's seed, stats and ids. Hybrid runs with millions of records pass
+        no id lists and store counts only.
+        
+        Args:
+            batch: Batch (users/events lists may be empty)
+            user_count: Number of users in the batch
+            event_count: Number of events in the batch
+            user_ids: Ids of the users (omitted if None)
+            event_ids: Ids of the events (omitted if None)
+        
+        Returns:
+            Saved GenerationBatch object
+        """
         batch_key = f"batch:{batch.batch_id}"
         batch_data = {
             'batch_id': batch.batch_id,
-            'user_count': len(batch.users),
-            'event_count': len(batch.events),
-            'user_ids': json.dumps([u.user_id for u in batch.users]),
-            'event_ids': json.dumps([e.event_id for e in batch.events]),
-            'stats': json.dumps(batch.stats.dict()),
+            'user_count': user_count,
+            'event_count': event_count,
+            'stats': batch.stats.model_dump_json(),
             'provider_used': batch.provider_used,
+            'seed': '' if batch.seed is None else batch.seed,
             'created_at': batch.created_at.isoformat()
         }
+        if user_ids is not None:
+            batch_data['user_ids'] = json.dumps(user_ids)
+        if event_ids is not None:
+            batch_data['event_ids'] = json.dumps(event_ids)
         
-        # Redis 3.x compatible version (no mapping parameter)
-        for field, value in batch_data.items():
-            self.client.hset(batch_key, field, value)
-        self.client.sadd("batches", batch.batch_id)
+        pipe = self.client.pipeline(transaction=False)
+        # A seeded run reuses its batch id: replace the old record instead of merging into it
+        pipe.delete(batch_key)
+        self._hset(pipe, batch_key, {field: str(value) for field, value in batch_data.items()})
+        pipe.sadd("batches", batch.batch_id)
+        pipe.execute()
         
         return batch
     
+    # Hybrid generation templates
+    def save_template_pool(self, key: str, templates_json: str, ttl_seconds: Optional[int] = None):
+        """Cache an LLM-written template pool (hybrid mode) as JSON.
+        
+        Args:
+            key: Pool key (derived from the template prompt and pool size)
+            templates_json: JSON array of ProfessionTemplate objects
+            ttl_seconds: Expiry (None = keep until cleared)
+        """
+        self.client.set(f"templates:{key}", templates_json, ex=ttl_seconds or None)
+    
+    def get_template_pool(self, key: str) -> Optional[str]:
+        """Return a cached template pool as JSON (None if missing or expired)."""
+        return self.client.get(f"templates:{key}")
+    
     # Statistics and cleanup
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics.
@@ -382,30 +967,100 @@ class RedisManager:
         Returns:
             Dictionary with database statistics
         """
+        users = self._storage_stats('user', 'users')
+        events = self._storage_stats('event', 'events')
         return {
             'users_count': self.client.scard("users"),
             'events_count': self.client.scard("events"),
             'batches_count': self.client.scard("batches"),
             'memory_usage': self.client.info('memory')['used_memory_human'],
+            'codec': str(self.codec),
+            'bytes_per_user': users['bytes'],
+            'bytes_per_event': events['bytes'],
+            'payload_bytes_per_user': users['payload_bytes'],
+            'payload_bytes_per_event': events['payload_bytes'],
             'connection_status': 'connected' if self.client.ping() else 'disconnected'
         }
     
-    def clear_all_data(self) -> bool:
+    def _storage_stats(self, entity: str, set_key: str, sample_size: int = 200) -> Dict[str, Optional[float]]:
+        """Average stored size of an entity, measured on a random sample.
+        
+        'bytes' is what Redis allocates for the record (MEMORY USAGE of its
+        key, or of its bucket divided by the entities in it), so the codecs
+        can be compared directly; index entries are the same for all codecs
+        and not counted. None on servers without MEMORY USAGE (Redis < 4).
+        'payload_bytes' counts only the stored field names and values.
+        
+        Args:
+            entity: "user" or "event"
+            set_key: Index set of the entity's IDs
+            sample_size: Entities to sample
+        
+        Returns:
+            Dictionary with 'bytes' and 'payload_bytes' (None if there are no entities)
+        """
+        ids = self.client.srandmember(set_key, sample_size) or []
+        if not ids:
+            return {'bytes': None, 'payload_bytes': None}
+        
+        pipe = self._reader(self.codec).pipeline(transaction=False)
+        for entity_id in ids:
+            self.codec.queue_read(pipe, entity, entity_id)
+        payload = sum(self.codec.payload_size(raw) for raw in pipe.execute())
+        
+        keys = sorted({self.codec.key(entity, entity_id) for entity_id in ids})
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key, samples=0)
+            if self.codec.buckets:
+                pipe.hlen(key)
+        try:
+            results = pipe.execute()
+        except redis.ResponseError:
+            allocated = None
+        else:
+            if self.codec.buckets:
+                allocated = sum(results[0::2]) / max(1, sum(results[1::2]))
+            else:
+                allocated = sum(results) / len(keys)
+        
+        return {
+            'bytes': round(allocated, 1) if allocated is not None else None,
+            'payload_bytes': round(payload / len(ids), 1)
+        }
+    
+    def clear_all_data(self, stream_keys: Iterable[str] = ()) -> bool:
         """Clear all calendar data from Redis.
         
+        Records, their indexes, the uniqueness index, batch metadata and the
+        given ingest streams (with their consumer groups) are deleted, so
+        `stats`, `export` and `ingest` see an empty database afterwards.
+        Hybrid template pools (templates:*) are kept: like the LLM response
+        cache they hold LLM output, not generated records, and they expire
+        on their own (--refresh-templates replaces one).
+        
+        Args:
+            stream_keys: Ingest stream keys to delete (queued records would
+                         otherwise be written back by the next `ingest`)
+        
         Returns:
             True if successful
         """
         try:
             # Clear main data
-            keys_pattern = ["user:*", "event:*", "user_events:*", "users", "events"]
+            keys_pattern = ["user:*", "event:*", "user_events:*", "user_events_by_time:*", "users", "events",
+                            "events_by_time", "idx:*", "bucket:*", "email:*", "uniq:*", "batch:*", "batches"]
             for pattern in keys_pattern:
                 for key in self.client.scan_iter(match=pattern):
                     self.client.delete(key)
             
+            # Deleting a stream also drops its consumer groups and pending entries
+            for key in stream_keys:
+                self.client.delete(key)
+            
             print(" Cleared all data from Redis")
             return True
-            
+        
         except Exception as e:
             print(f" Error clearing Redis data: {e}")
             return False 
\ No newline at end of file
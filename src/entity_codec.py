@@ -0,0 +1,152 @@
+"""
+Storage layout of user and event records in Redis (database.redis.codec).
+
+- hash (default): one Redis hash per entity, one field per model field.
+  Readable with HGETALL, but every entity pays for its own key and stores
+  every field name again.
+- json / msgpack: one blob per entity holding the field values in model
+  field order; field names are not stored. Values keep the string form of
+  the hash codec (nested fields as JSON, datetimes as ISO strings with
+  their offset), so reads rebuild exactly the mapping HGETALL would return.
+- buckets > 0 (json/msgpack only): blobs are grouped into `buckets` hashes,
+  bucket:{entity}:{n} with the entity ID as field, instead of one key per
+  entity. A small hash is stored as one compact listpack, which saves the
+  per-key overhead (keyspace entry, key string, object header) of every
+  record.
+
+Why positional values? In a record of ~15 short fields the names are a
+large part of the payload. The cost is that model fields may only be
+appended: a blob written before a field existed decodes without it, but a
+reordered or removed field would shift every value after it.
+
+Redis keeps a hash as a listpack only while it has at most
+hash-max-listpack-entries fields (128 by default) of at most
+hash-max-listpack-value bytes (64 by default, less than one record). For
+the bucketed layout, choose `buckets` so each holds about 100 entities and
+raise hash-max-listpack-value above the blob size (e.g. 512).
+
+Usage:
+    codec = EntityCodec.from_config(redis_config)
+    codec.queue_write(pipe, 'user', mapping, redis_manager._hset)
+    codec.queue_read(pipe, 'user', user_id)
+    mapping = codec.decode('user', pipe.execute()[0])
+"""
+
+import json
+import zlib
+from typing import Any, Dict, Optional
+
+from .data_models import User, CalendarEvent
+
+CODECS = ('hash', 'json', 'msgpack')
+
+# Blob value order; only ever append (see module docstring)
+ENTITY_FIELDS = {
+    'user': tuple(User.model_fields),
+    'event': tuple(CalendarEvent.model_fields),
+}
+
+
+class EntityCodec:
+    """Encodes entity hashes and knows where they live in Redis."""
+    
+    def __init__(self, name: str = 'hash', buckets: int = 0):
+        """
+        Args:
+            name: "hash", "json" or "msgpack"
+            buckets: Hashes to group blobs into (0 = one key per entity)
+        """
+        if name not in CODECS:
+            raise ValueError(f"Unsupported Redis codec: {name}")
+        if buckets < 0:
+            raise ValueError("database.redis.buckets must not be negative")
+        if buckets and name == 'hash':
+            raise ValueError("database.redis.buckets needs codec json or msgpack")
+        
+        self.name = name
+        self.buckets = buckets
+        self._msgpack = None
+        if name == 'msgpack':
+            import msgpack  # Only needed for this codec
+            self._msgpack = msgpack
+    
+    @staticmethod
+    def from_config(config: Dict[str, Any]) -> "EntityCodec":
+        """Create from database.redis (codec, buckets)."""
+        return EntityCodec(config.get('codec', 'hash'), int(config.get('buckets', 0) or 0))
+    
+    @property
+    def binary(self) -> bool:
+        """Whether stored values are bytes (need a client without decode_responses)."""
+        return self.name == 'msgpack'
+    
+    def __str__(self):
+        return f"{self.name} ({self.buckets} buckets)" if self.buckets else self.name
+    
+    def key(self, entity: str, entity_id: str) -> str:
+        """Redis key holding an entity: its own key, or its bucket."""
+        if self.buckets:
+            return f"bucket:{entity}:{zlib.crc32(entity_id.encode('utf-8')) % self.buckets}"
+        return f"{entity}:{entity_id}"
+    
+    def encode(self, entity: str, mapping: Dict[str, str]) -> Any:
+        """Blob for an entity hash (json/msgpack codecs)."""
+        values = [mapping.get(field) for field in ENTITY_FIELDS[entity]]
+        while values and values[-1] is None:
+            values.pop()
+        if self._msgpack is not None:
+            return self._msgpack.packb(values, use_bin_type=True)
+        return json.dumps(values, separators=(',', ':'), ensure_ascii=False)
+    
+    def decode(self, entity: str, raw: Any) -> Optional[Dict[str, str]]:
+        """Entity hash from what queue_read returned (None if the entity is missing)."""
+        if not raw:
+            return None
+        if self.name == 'hash':
+            return raw
+        if self._msgpack is not None:
+            values = self._msgpack.unpackb(raw, raw=False)
+        else:
+            values = json.loads(raw)
+        return {field: value for field, value in zip(ENTITY_FIELDS[entity], values) if value is not None}
+    
+    def queue_write(self, pipe, entity: str, mapping: Dict[str, str], hset):
+        """Queue the write of an entity hash.
+        
+        Args:
+            pipe: Pipeline to queue on
+            entity: "user" or "event"
+            mapping: Entity hash (from RedisManager._to_redis_hash)
+            hset: RedisManager._hset, used by the hash codec (honors write_mode)
+        """
+        entity_id = mapping[f"{entity}_id"]
+        if self.name == 'hash':
+            hset(pipe, self.key(entity, entity_id), mapping)
+        elif self.buckets:
+            pipe.hset(self.key(entity, entity_id), entity_id, self.encode(entity, mapping))
+        else:
+            pipe.set(self.key(entity, entity_id), self.encode(entity, mapping))
+    
+    def queue_read(self, pipe, entity: str, entity_id: str):
+        """Queue the read of an entity; pass the result to decode()."""
+        if self.name == 'hash':
+            pipe.hgetall(self.key(entity, entity_id))
+        elif self.buckets:
+            pipe.hget(self.key(entity, entity_id), entity_id)
+        else:
+            pipe.get(self.key(entity, entity_id))
+    
+    def queue_delete(self, pipe, entity: str, entity_id: str):
+        """Queue the removal of an entity's stored record (indexes are untouched)."""
+        if self.buckets:
+            pipe.hdel(self.key(entity, entity_id), entity_id)
+        else:
+            pipe.delete(self.key(entity, entity_id))
+    
+    def payload_size(self, raw: Any) -> int:
+        """Bytes of field names and values in what queue_read returned."""
+        if not raw:
+            return 0
+        if self.name == 'hash':
+            return sum(len(field.encode('utf-8')) + len(value.encode('utf-8')) for field, value in raw.items())
+        return len(raw) if isinstance(raw, bytes) else len(raw.encode('utf-8'))
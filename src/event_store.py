@@ -0,0 +1,434 @@
+"""
+Columnar in-memory buffer for generated calendar events.
+
+A run used to keep every CalendarEvent model in a list until the end so it
+could be written to Redis. Each model is a Python object with its own
+__dict__, a datetime object per timestamp and a string object per field,
+which is several times the size of the data itself. EventStore keeps the
+same events as columns instead:
+
+- start_time / end_time / created_at: NumPy datetime64[us] arrays (wall
+  clock) plus an int16 UTC offset in minutes, so aware and naive values
+  round-trip exactly
+- category / priority: uint8 codes into the Literal values of the model
+- user_id, title, location, recurrence and attendee emails: int32 codes
+  into string tables, so a value repeated across events is stored once
+- event_id / description: plain lists (unique per event); ids are interned
+
+Why columns?
+- Memory per event drops to the size of its values
+- Bulk operations are NumPy operations: sorting by start time and time
+  range filters run over whole arrays instead of Python loops
+- The exporters and RedisManager read rows straight from the columns, so no
+  model objects are built again on the way out
+
+Usage:
+    store = EventStore()
+    store.extend(events)                  # validated CalendarEvent models
+    for row in store.sorted_by_start():   # row indices in start order
+        ...
+    redis_manager.save_event_store(store)
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic_core import to_json
+
+from .data_models import CalendarEvent
+
+
+CATEGORIES = ("meeting", "appointment", "personal", "work")
+PRIORITIES = ("high", "medium", "low")
+
+_NONE = -1  # String code of None
+_NAIVE = np.iinfo(np.int16).min  # Offset of a datetime without tzinfo
+_CATEGORY_CODES = {value: code for code, value in enumerate(CATEGORIES)}
+_PRIORITY_CODES = {value: code for code, value in enumerate(PRIORITIES)}
+
+
+class StringTable:
+    """Stores each distinct string once and hands out int32 codes for it."""
+    
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+    
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NONE
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+    
+    def value(self, code: int) -> Optional[str]:
+        return None if code == _NONE else self.values[code]
+    
+    def codes(self, values: Sequence[Optional[str]], index: Optional[np.ndarray] = None) -> np.ndarray:
+        """int32 codes of `values`, or of values[index] (distinct values are looked up once)."""
+        codes = np.array([self.code(value) for value in values], dtype=np.int32)
+        return codes if index is None else codes[index]
+    
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class _Column:
+    """Growable NumPy array (capacity doubles, like a list)."""
+    
+    def __init__(self, dtype, capacity: int = 256):
+        self._data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+    
+    def append(self, value):
+        if self.size == len(self._data):
+            grown = np.empty(len(self._data) * 2, dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size] = value
+        self.size += 1
+    
+    def extend(self, values: np.ndarray):
+        needed = self.size + len(values)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, len(self._data) * 2), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:needed] = values
+        self.size = needed
+    
+    @property
+    def values(self) -> np.ndarray:
+        """View of the filled part of the column."""
+        return self._data[:self.size]
+    
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+
+class _DatetimeColumn:
+    """Wall-clock datetime64[us] values plus their UTC offsets in minutes."""
+    
+    def __init__(self):
+        self.wall = _Column('datetime64[us]')
+        self.offset = _Column(np.int16)
+    
+    def append(self, value: Optional[datetime]):
+        if value is None:
+            self.wall.append(np.datetime64('NaT'))
+            self.offset.append(_NAIVE)
+            return
+        utcoffset = value.utcoffset()
+        self.wall.append(np.datetime64(value.replace(tzinfo=None), 'us'))
+        self.offset.append(_NAIVE if utcoffset is None else int(utcoffset.total_seconds() // 60))
+    
+    def extend(self, wall: np.ndarray, offset: Optional[np.ndarray] = None):
+        """Append wall-clock datetime64[us] values with their offsets in minutes (None = naive)."""
+        self.wall.extend(wall)
+        self.offset.extend(np.full(len(wall), _NAIVE, dtype=np.int16) if offset is None else offset)
+    
+    def instants(self) -> np.ndarray:
+        """UTC instants for aware values, wall clock for naive ones (for sorting and ranges)."""
+        offsets = self.offset.values
+        shift = np.where(offsets == _NAIVE, 0, offsets).astype('timedelta64[m]')
+        return self.wall.values - shift
+    
+    def to_datetime(self, row: int) -> Optional[datetime]:
+        wall = self.wall.values[row]
+        if np.isnat(wall):
+            return None
+        value = wall.astype(datetime)
+        offset = int(self.offset.values[row])
+        if offset != _NAIVE:
+            value = value.replace(tzinfo=timezone(timedelta(minutes=offset)))
+        return value
+    
+    def format(self, rows: np.ndarray, utc_suffix: str = '+00:00') -> List[Optional[str]]:
+        """ISO 8601 strings for the given rows, formatted like datetime.isoformat().
+        
+        Args:
+            rows: Row indices
+            utc_suffix: Suffix for offset 0 ('Z' matches pydantic's JSON output)
+        """
+        wall = self.wall.values[rows]
+        offsets = self.offset.values[rows]
+        # isoformat() omits the fraction when it is zero
+        whole_seconds = (wall.astype('int64') % 1_000_000 == 0).tolist()
+        
+        suffixes: Dict[int, str] = {}
+        result = []
+        for value, whole, offset in zip(np.datetime_as_string(wall, unit='us').tolist(), whole_seconds,
+                                        offsets.tolist()):
+            if value == 'NaT':
+                result.append(None)
+                continue
+            if offset not in suffixes:
+                suffixes[offset] = _offset_suffix(offset, utc_suffix)
+            result.append((value[:19] if whole else value) + suffixes[offset])
+        return result
+    
+    @property
+    def nbytes(self) -> int:
+        return self.wall.nbytes + self.offset.nbytes
+
+
+def _offset_suffix(offset: int, utc_suffix: str) -> str:
+    if offset == _NAIVE:
+        return ''
+    if offset == 0:
+        return utc_suffix
+    sign = '+' if offset > 0 else '-'
+    hours, minutes = divmod(abs(offset), 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+class EventStore:
+    """
+    Append-only columnar buffer of CalendarEvents.
+    
+    Rows are appended from validated models (the models can be dropped right
+    after) and read back as Redis hashes, JSON lines or, when a model is
+    really needed, rebuilt CalendarEvents.
+    """
+    
+    def __init__(self):
+        self.event_ids: List[str] = []
+        self.descriptions: List[Optional[str]] = []
+        self.strings = StringTable()  # user ids, titles, locations, recurrences, attendees
+        self.user_id = _Column(np.int32)
+        self.title = _Column(np.int32)
+        self.location = _Column(np.int32)
+        self.recurrence = _Column(np.int32)
+        self.category = _Column(np.uint8)
+        self.priority = _Column(np.uint8)
+        self.start_time = _DatetimeColumn()
+        self.end_time = _DatetimeColumn()
+        self.created_at = _DatetimeColumn()
+        # Attendees of row i: attendee_codes[attendee_offsets[i]:attendee_offsets[i + 1]]
+        self.attendee_codes = _Column(np.int32)
+        self.attendee_offsets = _Column(np.int64)
+        self.attendee_offsets.append(0)
+    
+    def __len__(self) -> int:
+        return len(self.event_ids)
+    
+    def append(self, event: CalendarEvent):
+        """Copy one validated event into the columns."""
+        strings = self.strings
+        self.event_ids.append(sys.intern(event.event_id) if event.event_id else event.event_id)
+        self.descriptions.append(event.description)
+        self.user_id.append(strings.code(event.user_id))
+        self.title.append(strings.code(event.title))
+        self.location.append(strings.code(event.location))
+        self.recurrence.append(strings.code(event.recurrence))
+        self.category.append(_CATEGORY_CODES[event.category])
+        self.priority.append(_PRIORITY_CODES[event.priority])
+        self.start_time.append(event.start_time)
+        self.end_time.append(event.end_time)
+        self.created_at.append(event.created_at)
+        for email in event.attendees:
+            self.attendee_codes.append(strings.code(email))
+        self.attendee_offsets.append(self.attendee_codes.size)
+    
+    def extend(self, events: Iterable[CalendarEvent]) -> int:
+        """Append many events.
+        
+        Returns:
+            Number of events appended
+        """
+        added = 0
+        for event in events:
+            self.append(event)
+            added += 1
+        return added
+    
+    def extend_columns(self, event_ids: List[str], user_ids: Tuple[Sequence[str], np.ndarray],
+                       titles: Tuple[Sequence[str], np.ndarray], descriptions: List[Optional[str]],
+                       start_wall: np.ndarray, start_offset: Optional[np.ndarray],
+                       end_wall: np.ndarray, end_offset: Optional[np.ndarray],
+                       locations: Tuple[Sequence[Optional[str]], np.ndarray],
+                       attendees: Tuple[List[str], np.ndarray],
+                       categories: Tuple[Sequence[str], np.ndarray],
+                       priorities: Tuple[Sequence[str], np.ndarray],
+                       recurrences: Tuple[Sequence[Optional[str]], np.ndarray],
+                       created_at: Optional[datetime] = None) -> int:
+        """Append rows given as columns, without building models.
+        
+        For bulk producers (hybrid generation) that already hold their data
+        as arrays. The caller guarantees the values are valid CalendarEvent
+        fields. Repeated strings are passed as (distinct values, row index)
+        pairs, so each distinct value is interned once.
+        
+        Args:
+            event_ids: One id per row
+            user_ids / titles / locations / categories / priorities / recurrences:
+                (distinct values, int index per row)
+            descriptions: One description per row
+            start_wall / end_wall: Wall-clock datetime64[us] per row
+            start_offset / end_offset: int16 UTC offsets in minutes (None = naive)
+            attendees: (flat list of emails, number of emails per row)
+            created_at: Shared creation time of all rows
+        
+        Returns:
+            Number of rows appended
+        """
+        count = len(event_ids)
+        strings = self.strings
+        self.event_ids.extend(sys.intern(event_id) for event_id in event_ids)
+        self.descriptions.extend(descriptions)
+        self.user_id.extend(strings.codes(*user_ids))
+        self.title.extend(strings.codes(*titles))
+        self.location.extend(strings.codes(*locations))
+        self.recurrence.extend(strings.codes(*recurrences))
+        values, index = categories
+        self.category.extend(np.array([_CATEGORY_CODES[value] for value in values], dtype=np.uint8)[index])
+        values, index = priorities
+        self.priority.extend(np.array([_PRIORITY_CODES[value] for value in values], dtype=np.uint8)[index])
+        self.start_time.extend(start_wall, start_offset)
+        self.end_time.extend(end_wall, end_offset)
+        
+        if created_at is None:
+            self.created_at.extend(np.full(count, np.datetime64('NaT'), dtype='datetime64[us]'))
+        else:
+            created = _DatetimeColumn()
+            created.append(created_at)
+            self.created_at.extend(np.repeat(created.wall.values, count), np.repeat(created.offset.values, count))
+        
+        emails, per_row = attendees
+        self.attendee_codes.extend(strings.codes(emails))
+        self.attendee_offsets.extend(self.attendee_offsets.values[-1] + np.cumsum(per_row, dtype=np.int64))
+        return count
+    
+    # Vectorized queries
+    def start_instants(self) -> np.ndarray:
+        """Start times as datetime64[us] (UTC for aware values)."""
+        return self.start_time.instants()
+    
+    def start_scores(self, start: int = 0) -> np.ndarray:
+        """Start times from row `start` on as epoch seconds (sorted-set scores, naive read as UTC)."""
+        return self.start_instants()[start:].astype('datetime64[us]').astype(np.int64) / 1_000_000
+    
+    def sorted_by_start(self) -> np.ndarray:
+        """Row indices ordered by start time (stable)."""
+        return np.argsort(self.start_instants(), kind='stable')
+    
+    def in_range(self, start: datetime, end: datetime) -> np.ndarray:
+        """Row indices of events that overlap [start, end).
+        
+        Aware bounds are compared in UTC, naive bounds as wall clock,
+        like the stored values.
+        """
+        def bound(value: datetime) -> np.datetime64:
+            if value.utcoffset() is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return np.datetime64(value, 'us')
+        
+        mask = (self.start_instants() < bound(end)) & (self.end_time.instants() > bound(start))
+        return np.flatnonzero(mask)
+    
+    def rows_for_category(self, category: str) -> np.ndarray:
+        """Row indices of one category."""
+        return np.flatnonzero(self.category.values == _CATEGORY_CODES[category])
+    
+    # Row access
+    def _row_values(self, rows: np.ndarray, utc_suffix: str) -> Iterator[Dict[str, Any]]:
+        """Field dicts (model_dump order, Python values, datetimes as ISO strings)."""
+        strings = self.strings.values
+        starts = self.start_time.format(rows, utc_suffix)
+        ends = self.end_time.format(rows, utc_suffix)
+        created = self.created_at.format(rows, utc_suffix)
+        user_ids = self.user_id.values[rows].tolist()
+        titles = self.title.values[rows].tolist()
+        locations = self.location.values[rows].tolist()
+        recurrences = self.recurrence.values[rows].tolist()
+        categories = self.category.values[rows].tolist()
+        priorities = self.priority.values[rows].tolist()
+        first_attendee = self.attendee_offsets.values[rows].tolist()
+        last_attendee = self.attendee_offsets.values[rows + 1].tolist()
+        codes = self.attendee_codes.values
+        
+        for i, row in enumerate(rows.tolist()):
+            yield {
+                'event_id': self.event_ids[row],
+                'user_id': strings[user_ids[i]],
+                'title': strings[titles[i]],
+                'description': self.descriptions[row],
+                'start_time': starts[i],
+                'end_time': ends[i],
+                'location': None if locations[i] == _NONE else strings[locations[i]],
+                'attendees': ([strings[code] for code in codes[first_attendee[i]:last_attendee[i]].tolist()]
+                              if last_attendee[i] > first_attendee[i] else []),
+                'category': CATEGORIES[categories[i]],
+                'priority': PRIORITIES[priorities[i]],
+                'recurrence': None if recurrences[i] == _NONE else strings[recurrences[i]],
+                'created_at': created[i]
+            }
+    
+    def _rows(self, start: int = 0, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+        if rows is not None:
+            return np.asarray(rows, dtype=np.int64)
+        return np.arange(start, len(self), dtype=np.int64)
+    
+    def iter_json(self, start: int = 0, rows: Optional[Sequence[int]] = None) -> Iterator[str]:
+        """Rows serialized exactly like CalendarEvent.model_dump_json().
+        
+        Args:
+            start: First row (ignored when `rows` is given)
+            rows: Explicit row indices, e.g. from sorted_by_start() or in_range()
+        """
+        for values in self._row_values(self._rows(start, rows), utc_suffix='Z'):
+            # pydantic-core's serializer is the one model_dump_json uses (and much faster than json.dumps)
+            yield to_json(values).decode('utf-8')
+    
+    def iter_redis_hashes(self, start: int = 0, rows: Optional[Sequence[int]] = None) -> Iterator[Dict[str, str]]:
+        """Rows as Redis hash mappings (same fields and encoding as RedisManager._to_redis_hash)."""
+        for values in self._row_values(self._rows(start, rows), utc_suffix='+00:00'):
+            mapping = {}
+            for key, value in values.items():
+                if value is None:
+                    continue
+                mapping[key] = json.dumps(value) if isinstance(value, list) else value
+            yield mapping
+    
+    def iter_events(self, start: int = 0, rows: Optional[Sequence[int]] = None) -> Iterator[CalendarEvent]:
+        """Rebuild CalendarEvent models (without validation) for callers that need objects."""
+        for row in self._rows(start, rows).tolist():
+            offsets = self.attendee_offsets.values
+            codes = self.attendee_codes.values[offsets[row]:offsets[row + 1]].tolist()
+            yield CalendarEvent.model_construct(
+                event_id=self.event_ids[row],
+                user_id=self.strings.value(int(self.user_id.values[row])),
+                title=self.strings.value(int(self.title.values[row])),
+                description=self.descriptions[row],
+                start_time=self.start_time.to_datetime(row),
+                end_time=self.end_time.to_datetime(row),
+                location=self.strings.value(int(self.location.values[row])),
+                attendees=[self.strings.values[code] for code in codes],
+                category=CATEGORIES[self.category.values[row]],
+                priority=PRIORITIES[self.priority.values[row]],
+                recurrence=self.strings.value(int(self.recurrence.values[row])),
+                created_at=self.created_at.to_datetime(row)
+            )
+    
+    def __iter__(self) -> Iterator[CalendarEvent]:
+        return self.iter_events()
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the store (arrays, lists and distinct strings)."""
+        arrays = sum(column.nbytes for column in (
+            self.user_id, self.title, self.location, self.recurrence, self.category, self.priority,
+            self.start_time, self.end_time, self.created_at, self.attendee_codes, self.attendee_offsets
+        ))
+        lists = sys.getsizeof(self.event_ids) + sys.getsizeof(self.descriptions) + sys.getsizeof(self.strings.values)
+        strings = sum(sys.getsizeof(value) for value in self.event_ids)
+        strings += sum(sys.getsizeof(value) for value in self.descriptions if value is not None)
+        strings += sum(sys.getsizeof(value) for value in self.strings.values)
+        return arrays + lists + strings
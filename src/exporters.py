@@ -0,0 +1,207 @@
+"""
+Streaming file exporters for generated calendar data.
+
+This module writes users and events to disk one record at a time instead of
+building the whole dataset as a list of dicts and dumping it at the end.
+
+Why streaming?
+- Peak memory no longer includes a full dict copy of the dataset
+- Records reach disk while generation is still running
+- Pydantic's model_dump_json serializes straight to JSON (no dict step)
+- Rows of the columnar EventStore are written as-is (already serialized)
+
+Formats:
+- jsonl: one compact JSON object per line (default, easy to append/stream)
+- json:  a single JSON array, written incrementally so it stays valid
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from pydantic import BaseModel
+
+from .event_store import EventStore
+
+
+class StreamingWriter:
+    """
+    Base class for buffered, record-at-a-time writers.
+    
+    Serialized records are collected in a small buffer and written in one
+    call every `flush_every` records, which keeps the number of write
+    syscalls low without holding the dataset in memory.
+    """
+    
+    extension = ""
+    
+    def __init__(self, path: Path, flush_every: int = 500):
+        """
+        Args:
+            path: Output file path
+            flush_every: Number of records buffered before each write
+        """
+        self.path = Path(path)
+        self.flush_every = max(1, flush_every)
+        self.count = 0
+        self._buffer: List[str] = []
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write_header()
+    
+    def _write_header(self):
+        """Write anything that must precede the first record."""
+        pass
+    
+    def _write_footer(self):
+        """Write anything that must follow the last record."""
+        pass
+    
+    def _format(self, record_json: str) -> str:
+        """Frame one serialized record for this format."""
+        raise NotImplementedError
+    
+    def write(self, record: BaseModel):
+        """Serialize and buffer a single record."""
+        self.write_json(record.model_dump_json())
+    
+    def write_json(self, record_json: str):
+        """Buffer a record that is already serialized to JSON."""
+        self._buffer.append(self._format(record_json))
+        self.count += 1
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+    
+    def write_many(self, records: Iterable[BaseModel]) -> int:
+        """Write every record from an iterable (consumed lazily).
+        
+        Returns:
+            Number of records written by this call
+        """
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+    
+    def flush(self):
+        """Write buffered records to the file."""
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+    
+    def close(self):
+        """Flush remaining records and close the file."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._write_footer()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonLinesWriter(StreamingWriter):
+    """Writes one compact JSON object per line (JSON Lines)."""
+    
+    extension = ".jsonl"
+    
+    def _format(self, record_json: str) -> str:
+        return record_json + "\n"
+
+
+class JsonArrayWriter(StreamingWriter):
+    """Writes a JSON array incrementally, one element at a time."""
+    
+    extension = ".json"
+    
+    def _write_header(self):
+        self._file.write("[")
+    
+    def _write_footer(self):
+        self._file.write("\n]\n" if self.count else "]\n")
+    
+    def _format(self, record_json: str) -> str:
+        # The separator goes before every element except the first
+        separator = "\n" if self.count == 0 else ",\n"
+        return separator + record_json
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'json': JsonArrayWriter,
+}
+
+
+def create_writer(directory: Path, stem: str, export_format: str = 'jsonl',
+                  flush_every: int = 500) -> StreamingWriter:
+    """Create a streaming writer for the given format.
+    
+    Args:
+        directory: Output directory (created if missing)
+        stem: File name without extension
+        export_format: 'jsonl' or 'json'
+        flush_every: Records buffered before each write
+    
+    Returns:
+        Open StreamingWriter
+    """
+    if export_format not in WRITERS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    
+    writer_class = WRITERS[export_format]
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    return writer_class(directory / f"{stem}{writer_class.extension}", flush_every)
+
+
+class DatasetExporter:
+    """
+    Pair of streaming writers (users + events) for one generation run.
+    
+    The generator calls write_users / write_events as soon as records are
+    validated, so the files fill up while the run is in progress.
+    """
+    
+    def __init__(self, directory: Path, timestamp: str, export_format: str = 'jsonl',
+                 flush_every: int = 500, suffix: str = ""):
+        """
+        Args:
+            directory: Output directory
+            timestamp: Timestamp used in the file names
+            export_format: 'jsonl' or 'json'
+            flush_every: Records buffered before each write
+            suffix: Optional name suffix (e.g. '_export')
+        """
+        self.users = create_writer(directory, f"users{suffix}_{timestamp}", export_format, flush_every)
+        self.events = create_writer(directory, f"events{suffix}_{timestamp}", export_format, flush_every)
+    
+    def write_users(self, users: Iterable[BaseModel]) -> int:
+        return self.users.write_many(users)
+    
+    def write_events(self, events: Iterable[BaseModel]) -> int:
+        return self.events.write_many(events)
+    
+    def write_event_store(self, store: EventStore, start: int = 0) -> int:
+        """Write the rows of an EventStore from `start` on, without building models."""
+        written = 0
+        for record_json in store.iter_json(start):
+            self.events.write_json(record_json)
+            written += 1
+        return written
+    
+    def close(self) -> Dict[str, str]:
+        """Close both files.
+        
+        Returns:
+            Dictionary of exported file paths
+        """
+        self.users.close()
+        self.events.close()
+        return {
+            'users_file': str(self.users.path),
+            'events_file': str(self.events.path)
+        }
@@ -0,0 +1,569 @@
+"""
+Hybrid generation: LLM-written templates expanded locally with Faker.
+
+In LLM mode every user and every event costs part of an API call, which
+caps realistic dataset sizes at a few thousand records. Hybrid mode only
+asks the LLM for what it is good at and does the rest locally:
+
+1. Templates (LLM): a small pool of professions, each with working hours
+   and the events people in that job typically have (title, description,
+   category, typical duration and number of attendees). The pool is cached
+   in Redis, so later runs make no API calls at all.
+2. Expansion (local): FakerExpander turns the pool into any number of
+   User/CalendarEvent records. Names come from per-locale Faker name pools,
+   emails and attendees are built from them, timezones match the locale,
+   and event times fall inside the user's working hours (work events) or
+   around them (personal events) within the configured date window.
+
+Nothing is validated per record: the templates were validated once, and the
+expander only produces values that satisfy the models. Users are built with
+model_construct, events are written straight into EventStore columns. Users and events are expanded and
+written in chunks (generation.hybrid.chunk_size), so memory stays bounded
+however large the dataset is.
+
+Usage:
+    python -m src.main generate --mode hybrid --users 1000000
+"""
+
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from faker import Faker
+from pydantic import ValidationError
+
+from .data_models import User, UserPreferences, WorkingHours, ProfessionTemplate, TEMPLATE_LIST_ADAPTER, \
+    validate_many
+from .event_store import EventStore
+from .ingest_stream import IngestStream
+from .structured_output import TEMPLATE_OUTPUT, unwrap_items
+from .time_normalizer import utc_offset_minutes
+
+
+# Timezones people in each locale live in (Faker's own timezone() is global)
+LOCALE_TIMEZONES = {
+    'en_US': ["America/New_York", "America/Chicago", "America/Denver", "America/Los_Angeles"],
+    'en_GB': ["Europe/London"],
+    'en_CA': ["America/Toronto", "America/Vancouver"],
+    'en_AU': ["Australia/Sydney", "Australia/Melbourne", "Australia/Perth"],
+    'en_IN': ["Asia/Kolkata"],
+    'de_DE': ["Europe/Berlin"],
+    'fr_FR': ["Europe/Paris"],
+    'es_ES': ["Europe/Madrid"],
+    'es_MX': ["America/Mexico_City"],
+    'it_IT': ["Europe/Rome"],
+    'pt_BR': ["America/Sao_Paulo"],
+    'nl_NL': ["Europe/Amsterdam"],
+    'pl_PL': ["Europe/Warsaw"],
+    'sv_SE': ["Europe/Stockholm"],
+}
+
+DEFAULT_LOCALES = ["en_US", "en_GB", "de_DE", "fr_FR", "es_ES"]
+
+# Personal events and appointments are placed between these hours (local time)
+DAY_START_MINUTES = 7 * 60
+DAY_END_MINUTES = 21 * 60
+
+CALENDAR_VIEWS = ("day", "week", "month")
+
+
+def _ascii_slug(text: str) -> str:
+    """'José María' -> 'josemaria' (for the local part of email addresses)."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return re.sub(r'[^a-z0-9]', '', decomposed.encode('ascii', 'ignore').decode('ascii').lower())
+
+
+def _minutes(clock: str) -> int:
+    """'09:30' -> 570."""
+    hours, minutes = clock.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def _parse_range(value: Any, default: Tuple[int, int]) -> Tuple[int, int]:
+    """'2-3' -> (2, 3), 4 -> (4, 4)."""
+    if value is None:
+        return default
+    if isinstance(value, int):
+        return value, value
+    low, _, high = str(value).partition('-')
+    low = int(low)
+    return low, int(high) if high else low
+
+
+class _LocalePool:
+    """Names, email domains and timezones drawn from one Faker locale."""
+    
+    def __init__(self, faker: Faker, locale: str, size: int):
+        """
+        Args:
+            faker: Faker instance for the locale
+            locale: Locale name (e.g. 'de_DE')
+            size: Number of first and last names to draw
+        """
+        self.first_names = [faker.first_name() for _ in range(size)]
+        self.last_names = [faker.last_name() for _ in range(size)]
+        # ASCII forms for email addresses, computed once per name
+        self.first_slugs = [_ascii_slug(name) or 'user' for name in self.first_names]
+        self.last_slugs = [_ascii_slug(name) or 'user' for name in self.last_names]
+        self.domains = list(dict.fromkeys(faker.domain_name() for _ in range(max(1, size // 20))))
+        self.timezones = LOCALE_TIMEZONES.get(locale, ["UTC"])
+
+
+class FakerExpander:
+    """
+    Expands profession templates into User/CalendarEvent records locally.
+    
+    Faker is only called while building the name pools. After that a chunk
+    is a few NumPy draws (pool, template, name, day and slot indices for all
+    rows at once); events go straight into the EventStore columns without a
+    CalendarEvent per row, and only users and attendee emails are built as
+    Python objects.
+    """
+    
+    def __init__(self, templates: List[ProfessionTemplate], locales: List[str],
+                 window_start: date, window_days: int = 1, events_per_user: Tuple[int, int] = (2, 3),
+                 seed: Optional[int] = None, name_pool_size: int = 500, time_base: Optional[datetime] = None):
+        """
+        Args:
+            templates: Validated profession templates (at least one)
+            locales: Faker locales users are drawn from
+            window_start: First date events are scheduled on
+            window_days: Number of days in the window
+            events_per_user: Inclusive range of events per user
+            seed: Seed for reproducible output (random if None)
+            name_pool_size: First/last names drawn per locale
+            time_base: created_at of every record (the clock if None)
+        """
+        if not templates:
+            raise ValueError("Hybrid generation needs at least one profession template")
+        
+        self.templates = templates
+        self.window_start = np.datetime64(window_start, 'D')
+        self.window_days = max(1, window_days)
+        self.events_per_user = events_per_user
+        self.time_base = time_base
+        self.rng = np.random.default_rng(seed)
+        
+        faker = Faker(locales)
+        faker.seed_instance(seed)
+        self.pools = [_LocalePool(faker[locale], locale, name_pool_size) for locale in locales]
+        self.name_pool_size = name_pool_size
+        # Timezones of all pools in one list; a pool's zones start at zone_offsets[pool]
+        self.zones = [zone for pool in self.pools for zone in pool.timezones]
+        self.zone_infos = [ZoneInfo(zone) for zone in self.zones]
+        self.zone_offsets = np.cumsum([0] + [len(pool.timezones) for pool in self.pools[:-1]])
+        self.zone_counts = np.array([len(pool.timezones) for pool in self.pools])
+        self.domain_counts = np.array([len(pool.domains) for pool in self.pools])
+        
+        # Preferences are identical for a template and view, so users share the objects
+        self.preferences = [
+            [UserPreferences.model_construct(
+                working_hours=WorkingHours.model_construct(start=template.working_hours.start,
+                                                           end=template.working_hours.end),
+                meeting_duration_preference=template.meeting_duration_preference,
+                calendar_view=view
+            ) for view in CALENDAR_VIEWS]
+            for template in templates
+        ]
+        
+        # Event templates of all professions flattened into columns
+        event_templates = [event for template in templates for event in template.events]
+        self.event_offsets = np.cumsum([0] + [len(template.events) for template in templates[:-1]])
+        self.event_counts = np.array([len(template.events) for template in templates])
+        self.titles = [event.title for event in event_templates]
+        self.descriptions = [event.description for event in event_templates]
+        self.locations = [event.location for event in event_templates]
+        self.categories = [event.category for event in event_templates]
+        self.priorities = [event.priority for event in event_templates]
+        self.recurrences = [event.recurrence for event in event_templates]
+        self.durations = np.array([event.duration_minutes for event in event_templates])
+        self.attendee_counts = np.array([event.attendees for event in event_templates])
+        self.work_events = np.array([event.category in ("meeting", "work") for event in event_templates])
+        self.work_start = np.array([_minutes(template.working_hours.start) for template in templates])
+        self.work_end = np.array([_minutes(template.working_hours.end) for template in templates])
+        
+        # Ids and emails carry a random run tag, so records from different runs do not collide
+        self.run_tag = f"{int(self.rng.integers(1 << 20)):05x}"
+        self._users = 0
+        self._events = 0
+    
+    def _pick(self, counts: np.ndarray) -> np.ndarray:
+        """One random index below counts[i] for every i."""
+        return (self.rng.random(len(counts)) * counts).astype(np.int64)
+    
+    def expand(self, count: int, claim: Optional[Callable[[List[User]], List[bool]]] = None,
+               max_attempts: int = 5) -> Tuple[List[User], EventStore]:
+        """Create `count` users and their events.
+        
+        Args:
+            count: Number of users to create
+            claim: Uniqueness check (UniquenessIndex.claim). Users it rejects
+                   are replaced by new draws before any events are made.
+            max_attempts: Draws per chunk; fewer than `count` users are
+                          returned if rejects remain after the last one
+        
+        Returns:
+            Tuple of (users, event store with every user's events)
+        """
+        rng = self.rng
+        created_at = self.time_base or datetime.now()
+        users: List[User] = []
+        domains: List[str] = []
+        pool_parts, template_parts, zone_parts = [], [], []
+        
+        for _ in range(max_attempts):
+            missing = count - len(users)
+            if missing <= 0:
+                break
+            pool_index = rng.integers(len(self.pools), size=missing)
+            template_index = rng.integers(len(self.templates), size=missing)
+            zone_index = self.zone_offsets[pool_index] + self._pick(self.zone_counts[pool_index])
+            domain_index = self._pick(self.domain_counts[pool_index])
+            
+            drawn, drawn_domains = self._make_users(pool_index, template_index, zone_index, domain_index, created_at)
+            keep = np.array(claim(drawn), dtype=bool) if claim else np.ones(missing, dtype=bool)
+            users.extend(user for user, kept in zip(drawn, keep) if kept)
+            domains.extend(domain for domain, kept in zip(drawn_domains, keep) if kept)
+            pool_parts.append(pool_index[keep])
+            template_parts.append(template_index[keep])
+            zone_parts.append(zone_index[keep])
+        
+        store = EventStore()
+        if users:
+            self._make_events(store, users, domains, np.concatenate(pool_parts), np.concatenate(template_parts),
+                              np.concatenate(zone_parts), created_at)
+        return users, store
+    
+    def _make_users(self, pool_index: np.ndarray, template_index: np.ndarray, zone_index: np.ndarray,
+                    domain_index: np.ndarray, created_at: datetime) -> Tuple[List[User], List[str]]:
+        rng = self.rng
+        count = len(pool_index)
+        first_index = rng.integers(self.name_pool_size, size=count).tolist()
+        last_index = rng.integers(self.name_pool_size, size=count).tolist()
+        view_index = rng.integers(len(CALENDAR_VIEWS), size=count).tolist()
+        
+        users = []
+        domains = []
+        for n, (pool, template, zone, domain, first, last, view) in enumerate(zip(
+                pool_index.tolist(), template_index.tolist(), zone_index.tolist(), domain_index.tolist(),
+                first_index, last_index, view_index), start=self._users + 1):
+            pool = self.pools[pool]
+            domain = pool.domains[domain]
+            users.append(User.model_construct(
+                user_id=f"user_{self.run_tag}{n:07x}",
+                name=f"{pool.first_names[first]} {pool.last_names[last]}",
+                email=f"{pool.first_slugs[first]}.{pool.last_slugs[last]}.{self.run_tag}{n:x}@{domain}",
+                timezone=self.zones[zone],
+                profession=self.templates[template].profession,
+                preferences=self.preferences[template][view],
+                created_at=created_at
+            ))
+            domains.append(domain)
+        self._users += count
+        return users, domains
+    
+    def _make_events(self, store: EventStore, users: List[User], domains: List[str], pool_index: np.ndarray,
+                     template_index: np.ndarray, zone_index: np.ndarray, created_at: datetime):
+        rng = self.rng
+        low, high = self.events_per_user
+        per_user = rng.integers(low, high + 1, size=len(users))
+        owner = np.repeat(np.arange(len(users)), per_user)
+        count = len(owner)
+        
+        template = template_index[owner]
+        event = self.event_offsets[template] + self._pick(self.event_counts[template])
+        duration = self.durations[event]
+        
+        # Work events inside working hours, personal ones during the day, on 15-minute slots
+        work_start, work_end = self.work_start[template], self.work_end[template]
+        in_hours = self.work_events[event] & (work_end - duration > work_start)
+        first = np.where(in_hours, work_start, DAY_START_MINUTES)
+        last = np.where(in_hours, work_end - duration, np.maximum(DAY_START_MINUTES, DAY_END_MINUTES - duration))
+        slots = np.maximum(last - first, 0) // 15 + 1
+        start_minute = first + 15 * self._pick(slots)
+        day = self.window_start + rng.integers(self.window_days, size=count)
+        start_wall = day.astype('datetime64[us]') + start_minute.astype('timedelta64[m]')
+        end_wall = start_wall + duration.astype('timedelta64[m]')
+        
+        zone = zone_index[owner]
+        offsets = [utc_offset_minutes(wall, zone, self.zone_infos).astype(np.int16)
+                   for wall in (start_wall, end_wall)]
+        
+        # Attendees: colleagues at the user's company domain, typical count +/- 1
+        typical = self.attendee_counts[event]
+        attendees = np.where(typical > 0, np.maximum(0, typical + rng.integers(-1, 2, size=count)), 0)
+        attendee_owner = np.repeat(owner, attendees)
+        attendee_count = len(attendee_owner)
+        pools, user_pools = self.pools, pool_index.tolist()
+        emails = []
+        for user, first, last in zip(attendee_owner.tolist(),
+                                     rng.integers(self.name_pool_size, size=attendee_count).tolist(),
+                                     rng.integers(self.name_pool_size, size=attendee_count).tolist()):
+            pool = pools[user_pools[user]]
+            emails.append(f"{pool.first_slugs[first]}.{pool.last_slugs[last]}@{domains[user]}")
+        
+        event_list = event.tolist()
+        store.extend_columns(
+            event_ids=[f"event_{self.run_tag}{n:09x}" for n in range(self._events + 1, self._events + count + 1)],
+            user_ids=([user.user_id for user in users], owner),
+            titles=(self.titles, event),
+            descriptions=[self.descriptions[i] for i in event_list],
+            start_wall=start_wall, start_offset=offsets[0],
+            end_wall=end_wall, end_offset=offsets[1],
+            locations=(self.locations, event),
+            attendees=(emails, attendees),
+            categories=(self.categories, event),
+            priorities=(self.priorities, event),
+            recurrences=(self.recurrences, event),
+            created_at=created_at
+        )
+        self._events += count
+
+
+class HybridGenerator:
+    """
+    Hybrid mode orchestrator: template pool from the LLM (or Redis), local expansion.
+    
+    Shares the DataGenerator's clients, statistics, Redis manager, exporter
+    settings and date window, so results look exactly like an LLM-mode run.
+    """
+    
+    def __init__(self, data_generator):
+        """
+        Args:
+            data_generator: DataGenerator providing clients, stats and storage
+        """
+        self.generator = data_generator
+        self.config = data_generator.config
+        self.redis = data_generator.redis
+        self.stats = data_generator.stats
+        
+        hybrid_config = self.config.get_generation_config().get('hybrid', {})
+        self.profession_count = int(hybrid_config.get('professions', 20))
+        self.events_per_profession = int(hybrid_config.get('events_per_profession', 8))
+        self.professions_per_call = max(1, int(hybrid_config.get('professions_per_call', 5)))
+        self.template_ttl = hybrid_config.get('template_ttl_seconds', 7 * 24 * 3600)
+        self.chunk_size = max(1, int(hybrid_config.get('chunk_size', 10000)))
+        self.locales = hybrid_config.get('locales') or DEFAULT_LOCALES
+        
+        unknown = [locale for locale in self.locales if locale not in LOCALE_TIMEZONES]
+        if unknown:
+            raise ValueError(f"Unsupported hybrid locales: {', '.join(unknown)}")
+    
+    def _claim(self, users: List[User]) -> List[bool]:
+        """Claim expanded users in the generator's uniqueness index, counting rejects."""
+        claimed = self.generator.uniqueness.claim(users)
+        rejected = claimed.count(False)
+        if rejected:
+            self.stats.duplicates_rejected += rejected
+            print(f" {rejected} duplicate user(s) rejected, drawing replacements")
+        return claimed
+    
+    def _template_key(self, prompt: str) -> str:
+        """Cache key of a pool: same prompt and pool size -> same templates."""
+        material = json.dumps([prompt, self.profession_count, self.events_per_profession])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+    
+    def load_templates(self, provider: str = None, refresh: bool = False) -> List[ProfessionTemplate]:
+        """Return the template pool, from Redis if cached, otherwise from the LLM.
+        
+        Args:
+            provider: Preferred LLM provider for a new pool
+            refresh: Ignore a cached pool and request a new one
+        """
+        prompt = self.config.get_prompts().get('template_generation', '')
+        if not prompt:
+            raise ValueError("Template generation prompt not found in config")
+        
+        key = self._template_key(prompt)
+        cached = None if refresh else self.redis.get_template_pool(key)
+        if cached:
+            templates = TEMPLATE_LIST_ADAPTER.validate_json(cached)
+            print(f" Using {len(templates)} cached profession templates")
+            return templates
+        
+        templates = self._request_templates(prompt, provider)
+        if not templates:
+            raise ValueError("No profession templates were generated")
+        self.redis.save_template_pool(key, TEMPLATE_LIST_ADAPTER.dump_json(templates).decode('utf-8'),
+                                      self.template_ttl)
+        return templates
+    
+    def _build_template_prompt(self, prompt: str, count: int, existing: List[ProfessionTemplate]) -> str:
+        noun = "template" if count == 1 else "templates"
+        request = f"Generate {count} profession {noun} with {self.events_per_profession} events each."
+        if existing:
+            professions = ", ".join(f'"{template.profession}"' for template in existing)
+            request += f" These professions are already covered, choose different ones: {professions}"
+        return f"{request}\n\n{prompt}"
+    
+    def _request_templates(self, prompt: str, provider: str = None) -> List[ProfessionTemplate]:
+        """Ask the LLM for the pool, a few professions per call."""
+        generator = self.generator
+        provider_name, client = generator._get_client(provider)
+        print(f" Requesting {self.profession_count} profession templates from {provider_name}...")
+        
+        templates: List[ProfessionTemplate] = []
+        seen = set()
+        max_calls = 2 * -(-self.profession_count // self.professions_per_call)
+        for _ in range(max_calls):
+            missing = self.profession_count - len(templates)
+            if missing <= 0:
+                break
+            
+            count = min(self.professions_per_call, missing)
+            request = self._build_template_prompt(prompt, count, templates)
+            try:
+                response = generator._call_llm(client, request, max_retries=2, output_spec=TEMPLATE_OUTPUT).text
+                try:
+                    candidates, invalid = TEMPLATE_LIST_ADAPTER.validate_json(response), []
+                except ValidationError as e:
+                    parsed_data = generator._parse_response(client, response, e)
+                    if isinstance(parsed_data, dict):
+                        parsed_data = [parsed_data]
+                    candidates, invalid = validate_many(TEMPLATE_LIST_ADAPTER, unwrap_items(parsed_data) or [])
+            except Exception as e:
+                print(f" Template request failed: {str(e)[:100]}")
+                self.stats.failed_generations += 1
+                continue
+            
+            for _, message in invalid:
+                print(f" Failed to create template: {message}")
+                self.stats.failed_generations += 1
+            for template in candidates[:count]:
+                if template.profession.casefold() not in seen:
+                    seen.add(template.profession.casefold())
+                    templates.append(template)
+        
+        print(f" Received {len(templates)} profession templates")
+        return templates
+    
+    def generate_and_save(self, user_count: int = None, provider: str = None,
+                          refresh_templates: bool = False, ingest: Optional[bool] = None) -> Dict[str, Any]:
+        """Generate a dataset from templates and save it to Redis and files.
+        
+        The expansion is seeded from the generator's run seed, so a seeded
+        run with the same (cached) templates writes the same records. Emails
+        are claimed in the generator's uniqueness index like LLM-mode users;
+        rejected users are redrawn.
+        
+        Args:
+            user_count: Number of users to generate (config default if None)
+            provider: Preferred LLM provider for the template pool
+            refresh_templates: Request a new pool even if one is cached
+            ingest: Queue each chunk on the ingest stream instead of saving
+                    it here (ingest.enabled if None)
+        
+        Returns:
+            The same summary as DataGenerator.generate_and_save
+        """
+        generator = self.generator
+        self.stats.start_time = datetime.now()
+        if user_count is None:
+            user_count = self.config.get_generation_config().get('users', {}).get('count', 50)
+        
+        api_calls_before = self.stats.total_api_calls
+        cache_hits_before = self.stats.cache_hits
+        cache_misses_before = self.stats.cache_misses
+        templates = self.load_templates(provider, refresh_templates)
+        
+        normalizer = generator.time_normalizer
+        window_start = normalizer.window_start.astype(date)
+        events_config = self.config.get_generation_config().get('events', {})
+        expander = FakerExpander(
+            templates, self.locales,
+            window_start=window_start,
+            window_days=normalizer.window_days or 1,
+            events_per_user=_parse_range(events_config.get('count_per_user'), (2, 3)),
+            seed=generator.run_seed.derive('hybrid'),
+            time_base=generator.run_seed.time_base if generator.run_seed.seeded else None
+        )
+        
+        ingest_config = self.config.get_ingest_config()
+        if ingest is None:
+            ingest = bool(ingest_config.get('enabled', False))
+        stream = IngestStream.from_config(ingest_config, self.redis) if ingest else None
+        
+        uniqueness = generator.uniqueness
+        claim = self._claim if uniqueness is not None else None
+        unsaved: List[User] = []  # Claimed users of the chunk being written
+        
+        exporter = generator._open_exporter()
+        users_generated = 0
+        events_generated = 0
+        event_bytes = 0
+        backlog = None
+        try:
+            print(f" Expanding {len(templates)} templates into {user_count} users...")
+            for chunk_start in range(0, user_count, self.chunk_size):
+                users, store = expander.expand(min(self.chunk_size, user_count - chunk_start), claim)
+                if claim:
+                    unsaved = users
+                
+                exporter.write_users(users)
+                exporter.write_event_store(store)
+                
+                write_started = time.perf_counter()
+                if stream:
+                    # The `ingest` writers persist the chunk
+                    stream.publish_users(users)
+                    unsaved = []
+                    stream.publish_event_store(store)
+                else:
+                    self.redis.save_users(users)
+                    unsaved = []
+                    self.redis.save_event_store(store)
+                self.stats.redis_write_seconds += time.perf_counter() - write_started
+                
+                users_generated += len(users)
+                events_generated += len(store)
+                event_bytes = max(event_bytes, store.nbytes)
+                print(f" {users_generated}/{user_count} users, {events_generated} events")
+            
+            self.stats.users_generated += users_generated
+            self.stats.events_generated += events_generated
+            if stream:
+                backlog = stream.backlog()
+                print(f" Queued {users_generated} users and {events_generated} events on {stream.stream} "
+                      f"(backlog: {backlog['length']})")
+            file_paths = exporter.close()
+        except Exception as e:
+            self.stats.end_time = datetime.now()
+            raise Exception(f"Hybrid generation failed: {str(e)[:200]}")
+        finally:
+            if unsaved:
+                # Emails of a chunk that never reached Redis stay available
+                uniqueness.release(unsaved)
+            exporter.close()
+        
+        self.stats.end_time = datetime.now()
+        api_calls = self.stats.total_api_calls - api_calls_before
+        cache_hits = self.stats.cache_hits - cache_hits_before
+        batch = generator.record_batch(provider, users_generated, events_generated)
+        return {
+            'batch_id': batch.batch_id,
+            'seed': batch.seed,
+            'users_generated': users_generated,
+            'events_generated': events_generated,
+            'templates': len(templates),
+            'event_store_bytes': event_bytes,
+            'duration_seconds': self.stats.duration_seconds,
+            'api_calls': api_calls - cache_hits,
+            'cache_hits': cache_hits,
+            'cache_misses': self.stats.cache_misses - cache_misses_before,
+            'providers': generator.scheduler.snapshot() if generator.scheduler and api_calls else {},
+            'failed_generations': self.stats.failed_generations,
+            'duplicates_rejected': self.stats.duplicates_rejected,
+            'parse_failures': self.stats.parse_failures,
+            'retries_avoided': self.stats.retries_avoided,
+            'truncated_responses': self.stats.truncated_responses,
+            'redis_write_seconds': self.stats.redis_write_seconds,
+            'ingest_backlog': backlog,
+            'exported_files': file_paths
+        }
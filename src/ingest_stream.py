@@ -0,0 +1,240 @@
+"""
+Redis Streams queue between the generators and the Redis writers.
+
+By default generate_and_save produces the whole dataset first and then
+writes it in one loop, so generation and persistence share one process
+and one pace. With ingestion enabled (`generate --ingest` or
+ingest.enabled), the generator XADDs every validated record to a stream as
+soon as it is accepted. One or more writers (`ingest` command) read it
+through a consumer group and persist the records:
+
+- XREADGROUP hands each entry to exactly one writer of the group
+- A batch of entries is saved with RedisManager's pipelined (or Lua) writes,
+  then XACK'ed and XDEL'ed in one MULTI, so the stream holds only records
+  that are not persisted yet and its length is the backlog
+- A writer that dies keeps its unacknowledged entries pending: restarted
+  under the same name it reads them again first, and other writers take
+  them over (XCLAIM) once they have been idle for claim_idle_ms
+
+Delivery is at-least-once. A batch saved just before a crash is saved
+again, which is harmless: every write is keyed by the record's ID (HSET,
+SADD, ZADD, SET), so replaying it leaves the same data.
+
+Entries are the record's Redis hash (as RedisManager stores it) plus an
+`_entity` field, "user" or "event". Users are saved before the events of
+the same batch.
+
+Why XDEL after XACK? Without it the stream keeps every record forever and
+its length says nothing about the work left. This assumes the writers are
+the stream's only consumer group.
+
+Usage:
+    stream = IngestStream.from_config(config_loader.get_ingest_config(), redis_manager)
+    stream.publish_users(users)                  # producer
+    stream.consume("writer-1", drain=True)       # writer
+    stream.backlog()                             # {'length': ..., 'pending': ..., 'waiting': ...}
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+from .data_models import User, CalendarEvent
+from .database import RedisManager
+from .event_store import EventStore
+
+ENTITY_FIELD = '_entity'
+
+# Fields a record needs to be saved with its indexes
+REQUIRED_FIELDS = {
+    'user': ('user_id', 'email', 'profession', 'timezone'),
+    'event': ('event_id', 'user_id', 'start_time', 'category', 'priority'),
+}
+
+
+class IngestStream:
+    """Producer and consumer-group writer of the ingest stream."""
+    
+    def __init__(self, redis_manager: RedisManager, stream: str = "ingest:records", group: str = "writers",
+                 batch_size: int = 500, block_ms: int = 2000, claim_idle_ms: int = 60000):
+        """
+        Args:
+            redis_manager: Manager whose client holds the stream and whose writes persist records
+            stream: Stream key
+            group: Consumer group of the writers
+            batch_size: Entries per XADD pipeline and per XREADGROUP/save
+            block_ms: How long an idle writer waits for new entries per read
+            claim_idle_ms: Pending entries idle this long are taken over from other writers
+        """
+        self.redis = redis_manager
+        self.client = redis_manager.client
+        self.stream = stream
+        self.group = group
+        self.batch_size = max(1, batch_size)
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+    
+    @staticmethod
+    def from_config(config: Dict[str, Any], redis_manager: RedisManager) -> "IngestStream":
+        """Create from the ingest config section."""
+        return IngestStream(
+            redis_manager,
+            stream=config.get('stream', "ingest:records"),
+            group=config.get('group', "writers"),
+            batch_size=int(config.get('batch_size', 500)),
+            block_ms=int(config.get('block_ms', 2000)),
+            claim_idle_ms=int(config.get('claim_idle_ms', 60000))
+        )
+    
+    # Producer
+    def publish(self, entity: str, mappings: Iterable[Dict[str, str]]) -> int:
+        """XADD records, one pipelined round trip per `batch_size` entries.
+        
+        Args:
+            entity: "user" or "event"
+            mappings: Records encoded as Redis hashes
+        
+        Returns:
+            Number of records queued
+        """
+        queued = 0
+        pipe = self.client.pipeline(transaction=False)
+        for mapping in mappings:
+            pipe.xadd(self.stream, {ENTITY_FIELD: entity, **mapping})
+            queued += 1
+            if queued % self.batch_size == 0:
+                pipe.execute()
+        
+        pipe.execute()
+        return queued
+    
+    def publish_users(self, users: Iterable[User]) -> int:
+        """Queue validated users (missing IDs/timestamps are assigned)."""
+        return self.publish('user', self.redis.user_hashes(users))
+    
+    def publish_events(self, events: Iterable[CalendarEvent]) -> int:
+        """Queue validated events (missing IDs/timestamps are assigned)."""
+        return self.publish('event', self.redis.event_hashes(events))
+    
+    def publish_event_store(self, store: EventStore, start: int = 0) -> int:
+        """Queue the rows of an EventStore from `start` on, encoded straight from its columns."""
+        return self.publish('event', store.iter_redis_hashes(start))
+    
+    # Writer
+    def ensure_group(self):
+        """Create the stream and its consumer group if missing (new writers start at the beginning)."""
+        try:
+            self.client.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+    
+    def _read(self, consumer: str, last_id: str, block: Optional[int] = None) -> List[Tuple[str, Dict[str, str]]]:
+        """XREADGROUP: '>' for new entries, '0' for this consumer's pending ones."""
+        response = self.client.xreadgroup(self.group, consumer, {self.stream: last_id},
+                                          count=self.batch_size, block=block)
+        return response[0][1] if response else []
+    
+    def _claim_stale(self, consumer: str) -> List[Tuple[str, Dict[str, str]]]:
+        """Take over the oldest pending entries of writers idle for claim_idle_ms (XPENDING + XCLAIM)."""
+        pending = self.client.xpending_range(self.stream, self.group, min='-', max='+', count=self.batch_size)
+        stale = [entry['message_id'] for entry in pending
+                 if entry['consumer'] != consumer and entry['time_since_delivered'] >= self.claim_idle_ms]
+        if not stale:
+            return []
+        return self.client.xclaim(self.stream, self.group, consumer, self.claim_idle_ms, stale)
+    
+    def _save(self, entries: List[Tuple[str, Dict[str, str]]]) -> Dict[str, int]:
+        """Persist a batch of entries, then acknowledge and delete them.
+        
+        Entries without a known entity or its required fields can never be
+        saved; they are reported and dropped instead of being retried forever.
+        If a save fails the entries stay pending and are read again later.
+        """
+        records = {'user': [], 'event': []}
+        dropped = 0
+        for entry_id, fields in entries:
+            fields = dict(fields or {})  # Entries deleted while pending come back without fields
+            entity = fields.pop(ENTITY_FIELD, None)
+            if entity not in records or any(not fields.get(field) for field in REQUIRED_FIELDS[entity]):
+                print(f" Dropping malformed ingest entry {entry_id}")
+                dropped += 1
+                continue
+            records[entity].append(fields)
+        
+        counts = {
+            'users': self.redis.save_user_hashes(records['user']),
+            'events': self.redis.save_event_hashes(records['event']),
+            'dropped': dropped
+        }
+        
+        entry_ids = [entry_id for entry_id, _ in entries]
+        pipe = self.client.pipeline(transaction=True)
+        pipe.xack(self.stream, self.group, *entry_ids)
+        pipe.xdel(self.stream, *entry_ids)
+        pipe.execute()
+        return counts
+    
+    def consume(self, consumer: str, drain: bool = False, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Read batches through the consumer group and persist them.
+        
+        Pending entries come first: this consumer's own (from before a
+        restart), then stale ones of other writers. They are checked again
+        every claim_idle_ms and whenever the stream runs dry.
+        
+        Args:
+            consumer: Name of this writer within the group
+            drain: Stop once no entries are left instead of waiting for more
+            max_batches: Stop after this many batches (None = no limit)
+        
+        Returns:
+            Dictionary with the number of users and events saved and entries dropped
+        """
+        self.ensure_group()
+        totals = {'users': 0, 'events': 0, 'dropped': 0}
+        batches = 0
+        recovering = True
+        next_recovery = time.monotonic() + self.claim_idle_ms / 1000
+        
+        while max_batches is None or batches < max_batches:
+            if not recovering and time.monotonic() >= next_recovery:
+                recovering = True
+                next_recovery = time.monotonic() + self.claim_idle_ms / 1000
+            
+            if recovering:
+                entries = self._read(consumer, '0') or self._claim_stale(consumer)
+                if not entries:
+                    recovering = False
+                    continue
+            else:
+                entries = self._read(consumer, '>', block=None if drain else self.block_ms)
+                if not entries:
+                    if drain:
+                        break
+                    recovering = True  # Idle: look for entries left by writers that died
+                    continue
+            
+            counts = self._save(entries)
+            for key, value in counts.items():
+                totals[key] += value
+            batches += 1
+            print(f" Saved {counts['users']} users and {counts['events']} events "
+                  f"(backlog: {self.backlog()['length']})")
+        
+        return totals
+    
+    def backlog(self) -> Dict[str, int]:
+        """Records not persisted yet.
+        
+        Returns:
+            Dictionary with 'length' (entries in the stream), 'pending'
+            (delivered to a writer, not acknowledged) and 'waiting' (not
+            delivered yet)
+        """
+        length = self.client.xlen(self.stream)
+        try:
+            pending = self.client.xpending(self.stream, self.group)['pending']
+        except redis.ResponseError:
+            pending = 0  # No group yet: nothing was delivered
+        return {'length': length, 'pending': pending, 'waiting': max(0, length - pending)}
@@ -0,0 +1,277 @@
+"""
+Single-pass, string-aware extraction of JSON from LLM responses.
+
+LLMs wrap JSON in markdown fences, prepend prose ("Here are the events:")
+or append explanations. The extractor finds the JSON value in such text:
+
+- Scans the text once, jumping between interesting characters with regexes
+  (brackets and string literals) instead of a Python loop per character
+- Tracks string and escape state, so brackets inside values such as
+  "title": "Sync [Q3]" do not end the value early
+- Picks the outermost value: an array of objects is returned whole rather
+  than just its first element
+- Falls back to json.JSONDecoder.raw_decode at each opening bracket, and to
+  a trailing-comma repair, before giving up
+
+Every parse failure costs a full LLM retry, so being lenient here saves
+real round trips. salvage_array goes one step further for completions cut
+off by max_tokens: it keeps every element that was closed before the cut.
+"""
+
+import json
+import re
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+# Outside JSON only opening brackets matter (prose quotes are ignored)
+_OPENER = re.compile(r'[\[{]')
+# Inside JSON: complete string literals (with escapes) or a bracket
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.DOTALL)
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+_CLOSERS = {']': '[', '}': '{'}
+
+_decoder = json.JSONDecoder()
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove a surrounding ```json ... ``` markdown fence, if any."""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text[3:]
+        if text[:4].lower() == 'json':
+            text = text[4:]
+    if text.endswith('```'):
+        text = text[:-3]
+    return text.strip()
+
+
+def iter_json_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) of every balanced top-level [...] / {...} in text.
+    
+    Spans are found in one left-to-right pass. A span whose brackets do not
+    match is abandoned and scanning resumes after its opening bracket.
+    """
+    pos = 0
+    length = len(text)
+    while pos < length:
+        opener = _OPENER.search(text, pos)
+        if opener is None:
+            return
+        
+        start = opener.start()
+        stack = [text[start]]
+        scan = start + 1
+        end = None
+        for token in _TOKEN.finditer(text, scan):
+            char = token.group()
+            if char in '[{':
+                stack.append(char)
+            elif char in _CLOSERS:
+                if stack[-1] != _CLOSERS[char]:
+                    break  # Mismatched bracket: not a JSON value
+                stack.pop()
+                if not stack:
+                    end = token.end()
+                    break
+            # String literals are skipped whole, brackets inside them ignored
+        
+        if end is None:
+            pos = start + 1
+            continue
+        
+        yield start, end
+        pos = end
+
+
+def _loads_lenient(candidate: str) -> Any:
+    """json.loads with a trailing-comma repair as a second chance."""
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        return json.loads(_TRAILING_COMMA.sub(r'\1', candidate))
+
+
+def _is_structured(value: Any) -> bool:
+    """True for objects and arrays of objects/arrays (what generators expect)."""
+    if isinstance(value, dict):
+        return True
+    if isinstance(value, list):
+        return not value or all(isinstance(item, (dict, list)) for item in value)
+    return False
+
+
+def extract_json(text: str) -> Any:
+    """Extract the outermost JSON array/object from an LLM response.
+    
+    Args:
+        text: Raw completion text
+    
+    Returns:
+        Decoded JSON value (usually a list of dicts or a dict)
+    
+    Raises:
+        ValueError: If no JSON value can be recovered
+    """
+    text = strip_code_fences(text)
+    
+    # Fast path: the whole response is the JSON value
+    if text[:1] in ('[', '{'):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    
+    first_valid = None
+    for start, end in iter_json_spans(text):
+        try:
+            value = _loads_lenient(text[start:end])
+        except json.JSONDecodeError:
+            continue
+        if _is_structured(value):
+            return value
+        if first_valid is None:
+            first_valid = (value,)
+    
+    if first_valid is not None:
+        return first_valid[0]
+    
+    # Last resort: let the stdlib decoder find a value at each opening bracket
+    for opener in _OPENER.finditer(text):
+        try:
+            value, _ = _decoder.raw_decode(text, opener.start())
+            return value
+        except json.JSONDecodeError:
+            continue
+    
+    raise ValueError(f"No valid JSON found in LLM response: {text[:100]!r}")
+
+
+def salvage_array(text: str) -> Tuple[List[Any], bool]:
+    """Recover the complete objects of a possibly truncated JSON array.
+    
+    extract_json needs a balanced value, so for "[{...}, {...}, {..." it
+    can only return the first object. Here the text is run through
+    IncrementalArrayParser in one piece, which keeps every closed element.
+    
+    Args:
+        text: Raw completion text (fences, prose and a {"key": [...]} wrapper are fine)
+    
+    Returns:
+        Tuple of (complete objects, whether the array was closed)
+    """
+    parser = IncrementalArrayParser()
+    items = parser.feed(text)
+    return items, parser.done
+
+
+class IncrementalArrayParser:
+    """Yields the objects of a streamed JSON array as soon as each one closes.
+    
+    Feed completion chunks as they arrive; every call returns the elements
+    completed by that chunk. Only the text after the last completed element
+    is kept, and scanning resumes where the previous chunk stopped, so the
+    total work stays linear in the response length.
+    
+    A response cut off mid-array (e.g. by max_tokens) still yields every
+    element that was closed before the cut.
+    
+    Example:
+        parser = IncrementalArrayParser()
+        for chunk in client.stream_text(prompt):
+            for item in parser.feed(chunk):
+                handle(item)
+    """
+    
+    # Outside strings: quotes and brackets. Inside strings: quote or escape.
+    _STRUCTURE = re.compile(r'["\[\]{}]')
+    _STRING_END = re.compile(r'["\\]')
+    
+    def __init__(self):
+        self.buffer = ''
+        self.items_parsed = 0
+        self.invalid_items = 0
+        self.done = False  # The top-level array has been closed
+        self._pos = 0
+        self._depth = 0  # 0 = before the array, 1 = between elements
+        self._in_string = False
+        self._element_start: Optional[int] = None
+    
+    def feed(self, chunk: str) -> List[Any]:
+        """Add a chunk of the response and return the newly completed elements."""
+        if self.done:
+            return []
+        
+        self.buffer += chunk
+        items = []
+        buffer = self.buffer
+        pos = self._pos
+        
+        while True:
+            if self._in_string:
+                match = self._STRING_END.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match.group() == '\\':
+                    if match.end() >= len(buffer):
+                        pos = match.start()  # Escaped character not received yet
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                continue
+            
+            if self._depth == 0:
+                # Before the array: prose and fences are skipped
+                start = buffer.find('[', pos)
+                if start == -1:
+                    pos = len(buffer)
+                    break
+                self._depth = 1
+                pos = start + 1
+                continue
+            
+            match = self._STRUCTURE.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match.group()
+            pos = match.end()
+            
+            if char == '"':
+                self._in_string = True
+            elif char in '[{':
+                if self._depth == 1:
+                    self._element_start = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 1 and self._element_start is not None:
+                    items.extend(self._decode(buffer[self._element_start:pos]))
+                    self._element_start = None
+                    # Completed text is no longer needed
+                    buffer = buffer[pos:]
+                    pos = 0
+                elif self._depth == 0:
+                    if self.items_parsed or self.invalid_items:
+                        self.done = True
+                        break
+                    # An empty or scalar-only [...] (e.g. "[Note]" in prose):
+                    # keep looking for the real array
+        
+        self.buffer = buffer
+        self._pos = pos
+        return items
+    
+    def _decode(self, text: str) -> List[Any]:
+        try:
+            item = _loads_lenient(text)
+        except json.JSONDecodeError:
+            self.invalid_items += 1
+            return []
+        if not isinstance(item, dict):
+            self.invalid_items += 1
+            return []
+        self.items_parsed += 1
+        return [item]
@@ -0,0 +1,396 @@
+"""
+Content-addressed cache for LLM responses.
+
+Repeated runs with the same prompts (dev loops, benchmarks, CI) would
+otherwise pay for identical completions again. This module stores each
+completion under a hash of everything that determines it, in two tiers:
+
+1. Memory: a small LRU dictionary for hits within the same process
+2. Disk:   SQLite file (default) or Redis keys, shared between runs
+
+Design Pattern: Decorator
+- CachedLLMClient wraps any LLMClient and exposes the same interface
+- The generator does not need to know whether caching is on
+
+Eviction:
+- Entries older than `ttl_seconds` are treated as misses and purged
+- SQLite keeps at most `max_entries` rows (least recently used go first)
+- Redis entries expire via EX; size is bounded by the server's maxmemory policy
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from .llm_clients import LLMClient, AsyncLLMClient, Completion
+from .structured_output import StructuredOutput
+from .data_models import GenerationStats
+
+
+def make_cache_key(provider: str, model: str, temperature: float, prompt: str,
+                   output_format: Optional[str] = None, seed: Optional[int] = None) -> str:
+    """Hash the inputs that determine a completion into a cache key.
+    
+    output_format (structured output spec and mode) and seed are only part
+    of the material when set, so keys of plain requests stay unchanged.
+    """
+    parts = [provider, model, temperature, prompt]
+    if output_format:
+        parts.append(output_format)
+    if seed is not None:
+        parts.append(f"seed:{seed}")
+    material = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class SQLiteCacheBackend:
+    """On-disk cache tier backed by a single SQLite file."""
+    
+    # Prune expired/excess rows every N writes instead of on every write
+    PRUNE_EVERY = 100
+    # Write buffered access times after this many hits (also on set/flush/close)
+    FLUSH_EVERY = 100
+    
+    def __init__(self, path: str, ttl_seconds: int = 604800, max_entries: int = 100000):
+        """
+        Args:
+            path: SQLite database file (parent directory is created)
+            ttl_seconds: Entry lifetime
+            max_entries: Maximum number of stored responses
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._writes = 0
+        self._accessed: Dict[str, float] = {}  # Hits whose accessed_at is not written yet
+        self._lock = threading.Lock()
+        
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed_at)")
+        self.conn.commit()
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            # Track recency so size eviction drops the least recently used rows.
+            # A commit per hit would fsync under the lock and serialize
+            # cache-heavy runs, so access times are written in batches.
+            self._accessed[key] = now
+            if len(self._accessed) >= self.FLUSH_EVERY:
+                self._write_accessed()
+                self.conn.commit()
+            return row[0]
+    
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._write_accessed()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            self.conn.commit()
+    
+    def _write_accessed(self):
+        """Queue the buffered access times on the current transaction (caller holds the lock)."""
+        if self._accessed:
+            self.conn.executemany("UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                                  [(accessed_at, key) for key, accessed_at in self._accessed.items()])
+            self._accessed.clear()
+    
+    def flush(self):
+        """Write buffered access times now."""
+        with self._lock:
+            if self._accessed:
+                self._write_accessed()
+                self.conn.commit()
+    
+    def _prune(self, now: float):
+        """Delete expired rows, then the least recently used rows over max_entries."""
+        self.conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        self.conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+    
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.conn.close()
+
+
+class RedisCacheBackend:
+    """On-disk cache tier stored as plain Redis string keys with a TTL."""
+    
+    def __init__(self, client, ttl_seconds: int = 604800, prefix: str = "llm_cache:"):
+        """
+        Args:
+            client: redis.Redis client (e.g. RedisManager.client)
+            ttl_seconds: Entry lifetime (EX)
+            prefix: Key prefix for cache entries
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+    
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(f"{self.prefix}{key}")
+    
+    def set(self, key: str, value: str):
+        self.client.set(f"{self.prefix}{key}", value, ex=self.ttl_seconds)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+class LLMResponseCache:
+    """
+    Two-tier response cache: in-memory LRU in front of an optional backend.
+    
+    Hits in the backend are promoted into the memory tier, so a prompt
+    repeated within one run never leaves the process.
+    """
+    
+    def __init__(self, memory_entries: int = 1024, backend=None):
+        """
+        Args:
+            memory_entries: Size of the in-memory LRU tier
+            backend: SQLiteCacheBackend, RedisCacheBackend or None (memory only)
+        """
+        self.memory_entries = max(0, memory_entries)
+        self.backend = backend
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        
+        if self.backend is None:
+            return None
+        
+        value = self.backend.get(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+    
+    def put(self, key: str, value: str):
+        self._remember(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value)
+    
+    def _remember(self, key: str, value: str):
+        """Insert into the memory tier, evicting the least recently used entry."""
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+    
+    def flush(self):
+        """Write anything the backend buffers (e.g. SQLite access times)."""
+        if self.backend is not None:
+            self.backend.flush()
+    
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], redis_client=None) -> "LLMResponseCache":
+        """Build a cache from the `cache` config section.
+        
+        Args:
+            config: Cache configuration (backend, path, ttl_seconds, ...)
+            redis_client: Redis client used when backend is 'redis'
+        
+        Returns:
+            Configured LLMResponseCache
+        """
+        backend_name = config.get('backend', 'sqlite')
+        ttl_seconds = config.get('ttl_seconds', 604800)
+        
+        if backend_name == 'sqlite':
+            backend = SQLiteCacheBackend(
+                config.get('path', 'data/cache/llm_cache.sqlite3'),
+                ttl_seconds=ttl_seconds,
+                max_entries=config.get('max_entries', 100000)
+            )
+        elif backend_name == 'redis':
+            if redis_client is None:
+                raise ValueError("Redis cache backend requires a Redis client")
+            backend = RedisCacheBackend(redis_client, ttl_seconds=ttl_seconds)
+        elif backend_name in (None, 'none', 'memory'):
+            backend = None
+        else:
+            raise ValueError(f"Unsupported cache backend: {backend_name}")
+        
+        return cls(memory_entries=config.get('memory_entries', 1024), backend=backend)
+
+
+class CachedChunk(str):
+    """A stream chunk replayed from the cache rather than received from the API."""
+
+
+def _finished_stream(text: str) -> bool:
+    """Whether a streamed reply is worth caching.
+    
+    Stream chunks carry no finish_reason, but a reply cut off by max_tokens
+    is never a complete JSON document, so only replies that parse are kept.
+    """
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+class CachedLLMClient(LLMClient):
+    """LLMClient decorator that serves repeated prompts from the cache."""
+    
+    def __init__(self, client: LLMClient, provider: str, cache: LLMResponseCache,
+                 stats: Optional[GenerationStats] = None):
+        """
+        Args:
+            client: Client that performs real API calls on a miss
+            provider: Provider name (part of the cache key)
+            cache: Response cache
+            stats: Generation stats receiving hit/miss counters
+        """
+        super().__init__(client.config)
+        self.client = client
+        self.provider = provider
+        self.cache = cache
+        self.stats = stats
+    
+    def _key(self, prompt: str, output_spec: Optional[StructuredOutput] = None) -> str:
+        mode = getattr(self.client, 'structured_output', 'none')
+        return make_cache_key(
+            self.provider,
+            getattr(self.client, 'model', ''),
+            getattr(self.client, 'temperature', None),
+            prompt,
+            f"{output_spec.name}:{mode}" if output_spec is not None and mode != 'none' else None,
+            getattr(self.client, 'seed', None)
+        )
+    
+    def _record(self, hit: bool):
+        if self.stats is not None:
+            if hit:
+                self.stats.cache_hits += 1
+            else:
+                self.stats.cache_misses += 1
+    
+    def complete(self, prompt: str, max_retries: int = 3,
+                 output_spec: Optional[StructuredOutput] = None) -> Completion:
+        key = self._key(prompt, output_spec)
+        cached = self.cache.get(key)
+        self._record(cached is not None)
+        if cached is not None:
+            return Completion(cached, cached=True)
+        
+        response = self.client.complete(prompt, max_retries=max_retries, output_spec=output_spec)
+        # A reply cut off by max_tokens would be replayed cut off on every later request
+        if response.finish_reason != 'length':
+            self.cache.put(key, response.text)
+        return response
+    
+    def stream_text(self, prompt: str, max_retries: int = 3,
+                    output_spec: Optional[StructuredOutput] = None) -> Iterator[str]:
+        """Replay a cached completion as one chunk, or stream and cache a fresh one.
+        
+        Only completions streamed to the end that parse as JSON are cached.
+        """
+        key = self._key(prompt, output_spec)
+        cached = self.cache.get(key)
+        self._record(cached is not None)
+        if cached is not None:
+            yield CachedChunk(cached)
+            return
+        
+        chunks = []
+        for chunk in self.client.stream_text(prompt, max_retries=max_retries,
+                                             output_spec=output_spec):
+            chunks.append(chunk)
+            yield chunk
+        text = ''.join(chunks).strip()
+        if _finished_stream(text):
+            self.cache.put(key, text)
+
+
+class AsyncCachedLLMClient(AsyncLLMClient):
+    """AsyncLLMClient decorator that serves repeated prompts from the cache."""
+    
+    def __init__(self, client: AsyncLLMClient, provider: str, cache: LLMResponseCache,
+                 stats: Optional[GenerationStats] = None):
+        super().__init__(client.config)
+        self.client = client
+        self.provider = provider
+        self.cache = cache
+        self.stats = stats
+    
+    # Key building and counters are identical to the sync decorator
+    _key = CachedLLMClient._key
+    _record = CachedLLMClient._record
+    
+    async def complete(self, prompt: str, max_retries: int = 3,
+                       output_spec: Optional[StructuredOutput] = None) -> Completion:
+        key = self._key(prompt, output_spec)
+        cached = self.cache.get(key)
+        self._record(cached is not None)
+        if cached is not None:
+            return Completion(cached, cached=True)
+        
+        response = await self.client.complete(prompt, max_retries=max_retries, output_spec=output_spec)
+        if response.finish_reason != 'length':
+            self.cache.put(key, response.text)
+        return response
+    
+    async def stream_text(self, prompt: str, max_retries: int = 3,
+                          output_spec: Optional[StructuredOutput] = None) -> AsyncIterator[str]:
+        key = self._key(prompt, output_spec)
+        cached = self.cache.get(key)
+        self._record(cached is not None)
+        if cached is not None:
+            yield CachedChunk(cached)
+            return
+        
+        chunks = []
+        async for chunk in self.client.stream_text(prompt, max_retries=max_retries,
+                                                   output_spec=output_spec):
+            chunks.append(chunk)
+            yield chunk
+        text = ''.join(chunks).strip()
+        if _finished_stream(text):
+            self.cache.put(key, text)
+    
+    async def aclose(self):
+        await self.client.aclose()
@@ -9,6 +9,8 @@ Architecture Benefits:
 - Consistent interface regardless of provider
 - Error handling and retry logic in one place
 - Rate limiting and API quota management
+- Optional streaming (stream_text) so output can be processed while it is generated
+- Optional structured output (JSON mode / JSON schema) with automatic fallback
 
 Design Pattern: Strategy + Factory
 - Strategy: Common interface for all LLM clients
@@ -17,11 +19,65 @@ Design Pattern: Strategy + Factory
 
 import json
 import time
+import asyncio
 import requests
-from typing import Dict, Any, Optional
+import aiohttp
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, Iterator, AsyncIterator, List, NamedTuple
 from abc import ABC, abstractmethod
 import openai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+from .json_extractor import extract_json
+from .structured_output import STRUCTURED_OUTPUT_MODES, StructuredOutput
+from .rate_limiter import get_rate_limiter, parse_retry_after
+
+
+# System message shared by every provider (sync and async)
+SYSTEM_PROMPT = "You are a helpful assistant that generates realistic data for calendar applications. Always return valid JSON as requested."
+
+
+class Completion(NamedTuple):
+    """Text of a completion and why the model stopped writing it.
+    
+    finish_reason is "stop" for a finished answer and "length" when the
+    max_tokens budget cut it off (None if unknown, e.g. a cached reply).
+    cached is True for replies served by the response cache.
+    """
+    text: str
+    finish_reason: Optional[str] = None
+    cached: bool = False
+
+
+def build_messages(prompt: str) -> List[Dict[str, str]]:
+    """Chat messages sent for a prompt (system prompt + user prompt)."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_sse_line(line: str) -> Optional[Dict[str, Any]]:
+    """Decode one server-sent events line of a streamed completion.
+    
+    Returns the JSON payload of `data:` lines, or None for blank lines,
+    comments/keep-alives and the final `data: [DONE]` marker.
+    """
+    line = line.strip()
+    if not line.startswith('data:'):
+        return None
+    data = line[5:].strip()
+    if not data or data == '[DONE]':
+        return None
+    return json.loads(data)
+
+
+def stream_delta(event: Dict[str, Any]) -> Optional[str]:
+    """Text added by one streamed completion chunk (None if the chunk carries none)."""
+    choices = event.get('choices') or []
+    if not choices:
+        return None
+    return (choices[0].get('delta') or {}).get('content')
 
 
 class LLMClient(ABC):
@@ -54,71 +110,109 @@ class LLMClient(ABC):
         # Validate that we have an API key - fail fast if not
         if not self.api_key:
             raise ValueError(f"API key not found in config: {config}")
+        
+        # Constrained decoding mode; lowered automatically if the model rejects it
+        self.structured_output = config.get('structured_output', 'none') or 'none'
+        if self.structured_output not in STRUCTURED_OUTPUT_MODES:
+            raise ValueError(f"Unsupported structured_output mode: {self.structured_output}")
+        
+        # Sampling seed of a reproducible run (sent where the API supports it)
+        self.seed = config.get('seed')
+    
+    def _response_format(self, output_spec: Optional[StructuredOutput]) -> Optional[Dict[str, Any]]:
+        """`response_format` request parameter for the current mode (None = plain request)."""
+        return output_spec.response_format(self.structured_output) if output_spec else None
+    
+    def _prepare_prompt(self, prompt: str, output_spec: Optional[StructuredOutput]) -> str:
+        """JSON mode only guarantees an object, so the wrapper key is spelled out."""
+        if output_spec is not None and self.structured_output == 'json_object':
+            return prompt + output_spec.instruction
+        return prompt
+    
+    def _downgrade_structured_output(self, rejected: str, error: Any) -> bool:
+        """Step down json_schema -> json_object -> none after the API rejected response_format.
+        
+        Only a 400 whose detail names response_format or json_schema is
+        taken as a rejection of the mode; any other bad request fails as usual.
+        
+        Args:
+            rejected: Mode of the rejected request. Concurrent calls can all be
+                      rejected for the same mode; only the first one steps down.
+            error: The API error or 400 response body
+        
+        Returns:
+            True if the request should be sent again with the current mode
+        """
+        detail = str(error)
+        if 'response_format' not in detail and 'json_schema' not in detail:
+            return False
+        if self.structured_output != rejected:
+            return True  # Already lowered by another call
+        index = STRUCTURED_OUTPUT_MODES.index(rejected)
+        if index >= len(STRUCTURED_OUTPUT_MODES) - 1:
+            return False
+        self.structured_output = STRUCTURED_OUTPUT_MODES[index + 1]
+        print(f" {type(self).__name__}: {rejected} not supported ({str(error)[:80]}), "
+              f"falling back to {self.structured_output}")
+        return True
+    
+    def _estimate_tokens(self, prompt: str) -> int:
+        """Rough token reservation for the rate limiter (~4 characters per token).
+        
+        The completion budget (max_tokens) is reserved up front and corrected
+        with the real usage once the API responds.
+        """
+        return (len(SYSTEM_PROMPT) + len(prompt)) // 4 + getattr(self, 'max_tokens', 0)
     
     @abstractmethod
-    def generate_text(self, prompt: str, max_retries: int = 3) -> str:
+    def complete(self, prompt: str, max_retries: int = 3,
+                 output_spec: Optional[StructuredOutput] = None) -> Completion:
         """
         Generate text using the LLM - must be implemented by each provider.
         
         Args:
             prompt: The text prompt to send to the LLM
             max_retries: Number of times to retry on failure
-            
+            output_spec: Expected output shape, sent as response_format when
+                         the client's structured_output mode allows it
+        
         Returns:
-            Generated text response from the LLM
-            
+            Completion with the generated text and the finish_reason
+        
         Raises:
             Exception: If generation fails after all retries
         """
         pass
     
-    def _parse_json_response(self, response: str) -> Dict[str, Any]:
-        """Parse JSON response from LLM, handling common formatting issues."""
-        # Remove markdown formatting if present
-        response = response.strip()
-        if response.startswith('```json'):
-            response = response[7:]
-        if response.startswith('```'):
-            response = response[3:]
-        if response.endswith('```'):
-            response = response[:-3]
-        
-        response = response.strip()
-        
-        # Try to extract JSON from response if it contains other text
-        start_markers = ['{', '[']
-        end_markers = ['}', ']']
-        
-        for start_marker, end_marker in zip(start_markers, end_markers):
-            start_idx = response.find(start_marker)
-            if start_idx != -1:
-                # Find the matching closing bracket/brace
-                bracket_count = 0
-                for i, char in enumerate(response[start_idx:], start_idx):
-                    if char == start_marker:
-                        bracket_count += 1
-                    elif char == end_marker:
-                        bracket_count -= 1
-                        if bracket_count == 0:
-                            response = response[start_idx:i+1]
-                            break
-                break
+    def generate_text(self, prompt: str, max_retries: int = 3,
+                      output_spec: Optional[StructuredOutput] = None) -> str:
+        """Text of complete() for callers that do not need the finish_reason."""
+        return self.complete(prompt, max_retries=max_retries, output_spec=output_spec).text
+    
+    def stream_text(self, prompt: str, max_retries: int = 3,
+                    output_spec: Optional[StructuredOutput] = None) -> Iterator[str]:
+        """
+        Generate text as a stream of chunks, yielded while the LLM is still writing.
+        
+        Consumers can start parsing and validating records before the
+        completion ends. Retries only happen before the first chunk; once
+        output has been yielded, errors are raised to the caller.
+        
+        The default implementation yields the whole completion as one chunk,
+        so every client can be used in streaming mode.
+        """
+        yield self.generate_text(prompt, max_retries=max_retries, output_spec=output_spec)
+    
+    def _parse_json_response(self, response: str) -> Any:
+        """Parse JSON response from LLM, handling common formatting issues.
         
+        Extraction (markdown fences, surrounding prose, brackets inside
+        strings, trailing commas) lives in json_extractor.extract_json.
+        """
         try:
-            return json.loads(response)
-        except json.JSONDecodeError as e:
+            return extract_json(response)
+        except ValueError as e:
             print(f"Failed to parse JSON: {e}")
-            print(f"Response excerpt: {response[:200]}...")
-            
-            # Try to fix common JSON issues
-            try:
-                # Fix trailing commas
-                import re
-                fixed_response = re.sub(r',(\s*[}\]])', r'\1', response)
-                return json.loads(fixed_response)
-            except:
-                pass
-                
             raise ValueError(f"Invalid JSON response from LLM: {str(e)[:100]}")
 
 
@@ -127,40 +221,57 @@ class OpenAIClient(LLMClient):
     
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are handled here (through the shared rate limiter), not by the SDK
+        self.client = OpenAI(api_key=self.api_key, base_url=config.get('base_url'), max_retries=0)
         self.model = config.get('model', 'gpt-3.5-turbo')
         self.max_tokens = config.get('max_tokens', 1000)
         self.temperature = config.get('temperature', 0.7)
+        self.rate_limiter = get_rate_limiter('openai', config)
     
-    def generate_text(self, prompt: str, max_retries: int = 3) -> str:
-        """Generate text using OpenAI API."""
+    def _create_completion(self, prompt: str, estimated_tokens: int, max_retries: int,
+                           output_spec: Optional[StructuredOutput] = None, **kwargs):
+        """Send a chat completion request, retrying through the rate limiter.
+        
+        Every attempt goes through the shared provider rate limiter, which
+        also owns the backoff after a 429 (honouring Retry-After). The slot
+        of the successful attempt is still held on return: the caller
+        releases it once the response has been consumed.
+        """
+        response_format = self._response_format(output_spec)
+        if response_format:
+            kwargs['response_format'] = response_format
+        if self.seed is not None:
+            kwargs['seed'] = self.seed
+        
         for attempt in range(max_retries):
+            self.rate_limiter.acquire(estimated_tokens)
             try:
-                response = self.client.chat.completions.create(
+                return self.client.chat.completions.create(
                     model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that generates realistic data for calendar applications. Always return valid JSON as requested."},
-                        {"role": "user", "content": prompt}
-                    ],
+                    messages=build_messages(self._prepare_prompt(prompt, output_spec)),
                     max_tokens=self.max_tokens,
-                    temperature=self.temperature
+                    temperature=self.temperature,
+                    **kwargs
                 )
-                
-                content = response.choices[0].message.content
-                if not content:
-                    raise ValueError("Empty response from OpenAI")
-                
-                return content.strip()
-                
-            except openai.RateLimitError:
+            
+            except openai.BadRequestError as e:
+                self.rate_limiter.release(estimated_tokens, success=False)
+                # The model does not support this response_format: retry one mode lower
+                if response_format and self._downgrade_structured_output(response_format['type'], e):
+                    kwargs.pop('response_format')
+                    return self._create_completion(prompt, estimated_tokens, max_retries, output_spec, **kwargs)
+                raise
+            
+            except openai.RateLimitError as e:
+                # The limiter pauses every caller of this provider
+                self.rate_limiter.release(estimated_tokens, tokens_used=0, rate_limited=True,
+                                          retry_after=parse_retry_after(getattr(e.response, 'headers', None)))
                 if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"Rate limit hit, waiting {wait_time} seconds...")
-                    time.sleep(wait_time)
                     continue
                 raise
             
             except Exception as e:
+                self.rate_limiter.release(estimated_tokens, success=False)
                 if attempt < max_retries - 1:
                     print(f"OpenAI API error (attempt {attempt + 1}): {e}")
                     time.sleep(1)
@@ -168,10 +279,55 @@ class OpenAIClient(LLMClient):
                 raise
         
         raise Exception(f"Failed to generate text after {max_retries} attempts")
+    
+    def complete(self, prompt: str, max_retries: int = 3,
+                 output_spec: Optional[StructuredOutput] = None) -> Completion:
+        """Generate text using OpenAI API."""
+        estimated_tokens = self._estimate_tokens(prompt)
+        response = self._create_completion(prompt, estimated_tokens, max_retries, output_spec)
+        
+        usage = getattr(response, 'usage', None)
+        self.rate_limiter.release(estimated_tokens, tokens_used=getattr(usage, 'total_tokens', None))
+        
+        choice = response.choices[0]
+        if not choice.message.content:
+            raise ValueError("Empty response from OpenAI")
+        
+        return Completion(choice.message.content.strip(), choice.finish_reason)
+    
+    def stream_text(self, prompt: str, max_retries: int = 3,
+                    output_spec: Optional[StructuredOutput] = None) -> Iterator[str]:
+        """Stream text from OpenAI API (stream=True)."""
+        estimated_tokens = self._estimate_tokens(prompt)
+        stream = self._create_completion(prompt, estimated_tokens, max_retries, output_spec,
+                                         stream=True, stream_options={'include_usage': True})
+        
+        tokens_used = None
+        completed = False
+        try:
+            for chunk in stream:
+                # The final chunk carries usage and no choices
+                if getattr(chunk, 'usage', None):
+                    tokens_used = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            completed = True
+        finally:
+            # Also runs when the consumer stops early: frees the connection
+            stream.close()
+            self.rate_limiter.release(estimated_tokens, tokens_used=tokens_used, success=completed)
 
 
 class DeepSeekClient(LLMClient):
-    """Client for DeepSeek API."""
+    """
+    Client for DeepSeek API.
+    
+    All requests go through one pooled requests.Session, so connections are
+    kept alive and reused instead of paying a TCP+TLS handshake per call.
+    The session is configured once in __init__ and never mutated afterwards,
+    which makes it safe to share between threads; the urllib3 pool blocks
+    when all `pool_size` connections are busy instead of opening extras.
+    """
     
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
@@ -179,61 +335,419 @@ class DeepSeekClient(LLMClient):
         self.model = config.get('model', 'deepseek-chat')
         self.max_tokens = config.get('max_tokens', 1000)
         self.temperature = config.get('temperature', 0.7)
+        
+        # (connect, read) timeouts: fail fast on unreachable hosts while
+        # still allowing long completions to stream back
+        self.timeout = (config.get('connect_timeout', 5), config.get('read_timeout', 60))
+        self.url = f"{self.base_url}/chat/completions"
+        
+        # Request parts that never change are built once
+        self._base_payload = {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature
+        }
+        self.session = self._create_session(config.get('pool_size', 10))
+        self.rate_limiter = get_rate_limiter('deepseek', config)
     
-    def generate_text(self, prompt: str, max_retries: int = 3) -> str:
-        """Generate text using DeepSeek API."""
-        headers = {
+    def _create_session(self, pool_size: int) -> requests.Session:
+        """Create a keep-alive session with a bounded connection pool."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
-        }
+        })
+        return session
+    
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+    
+    def _payload(self, prompt: str, stream: bool = False,
+                 output_spec: Optional[StructuredOutput] = None) -> Dict[str, Any]:
+        payload = {**self._base_payload, 'messages': build_messages(self._prepare_prompt(prompt, output_spec))}
+        if stream:
+            payload['stream'] = True
+            payload['stream_options'] = {'include_usage': True}
+        response_format = self._response_format(output_spec)
+        if response_format:
+            payload['response_format'] = response_format
+        return payload
+    
+    def _post(self, prompt: str, estimated_tokens: int, max_retries: int, stream: bool = False,
+              output_spec: Optional[StructuredOutput] = None) -> requests.Response:
+        """POST a completion request, retrying 429s, 5xx and connection errors.
+        
+        A 400 rejecting the request's response_format lowers the structured
+        output mode and sends the request again.
+        
+        Returns a successful response with its rate limiter slot still held;
+        the caller releases it once the body has been read.
+        """
+        payload = self._payload(prompt, stream, output_spec)
+        for attempt in range(max_retries):
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout, stream=stream)
+            except requests.exceptions.RequestException as e:
+                self.rate_limiter.release(estimated_tokens, success=False)
+                if attempt < max_retries - 1:
+                    print(f"DeepSeek API error (attempt {attempt + 1}): {e}")
+                    time.sleep(1)
+                    continue
+                raise
+            
+            if response.status_code == 429:  # Rate limit
+                # The limiter pauses every caller of this provider
+                self.rate_limiter.release(estimated_tokens, tokens_used=0, rate_limited=True,
+                                          retry_after=parse_retry_after(response.headers))
+                response.close()
+                if attempt < max_retries - 1:
+                    continue
+                response.raise_for_status()
+            
+            if not response.ok:
+                self.rate_limiter.release(estimated_tokens, success=False)
+                detail = response.text if response.status_code == 400 else ''
+                response.close()
+                if (response.status_code == 400 and 'response_format' in payload
+                        and self._downgrade_structured_output(payload['response_format']['type'], detail)):
+                    return self._post(prompt, estimated_tokens, max_retries, stream, output_spec)
+                if response.status_code >= 500 and attempt < max_retries - 1:
+                    print(f"DeepSeek API error (attempt {attempt + 1}): HTTP {response.status_code}")
+                    time.sleep(1)
+                    continue
+                response.raise_for_status()
+            
+            return response
+        
+        raise Exception(f"Failed to generate text after {max_retries} attempts")
+    
+    def complete(self, prompt: str, max_retries: int = 3,
+                 output_spec: Optional[StructuredOutput] = None) -> Completion:
+        """Generate text using DeepSeek API."""
+        estimated_tokens = self._estimate_tokens(prompt)
+        response = self._post(prompt, estimated_tokens, max_retries, output_spec=output_spec)
+        
+        try:
+            data = response.json()
+        except ValueError:
+            self.rate_limiter.release(estimated_tokens, success=False)
+            raise
+        self.rate_limiter.release(estimated_tokens, tokens_used=(data.get('usage') or {}).get('total_tokens'))
+        
+        if 'choices' not in data or not data['choices']:
+            raise ValueError("Invalid response format from DeepSeek")
+        
+        choice = data['choices'][0]
+        content = choice['message']['content']
+        if not content:
+            raise ValueError("Empty response from DeepSeek")
         
+        return Completion(content.strip(), choice.get('finish_reason'))
+    
+    def stream_text(self, prompt: str, max_retries: int = 3,
+                    output_spec: Optional[StructuredOutput] = None) -> Iterator[str]:
+        """Stream text from DeepSeek API (server-sent events)."""
+        estimated_tokens = self._estimate_tokens(prompt)
+        response = self._post(prompt, estimated_tokens, max_retries, stream=True, output_spec=output_spec)
+        
+        tokens_used = None
+        completed = False
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                event = parse_sse_line(line)
+                if event is None:
+                    continue
+                if event.get('usage'):
+                    tokens_used = event['usage'].get('total_tokens')
+                content = stream_delta(event)
+                if content:
+                    yield content
+            completed = True
+        finally:
+            response.close()
+            self.rate_limiter.release(estimated_tokens, tokens_used=tokens_used, success=completed)
+
+
+class AsyncLLMClient(LLMClient):
+    """
+    Abstract base class for asyncio LLM clients.
+    
+    Async clients share the configuration handling and JSON parsing of
+    LLMClient, but complete/generate_text are coroutines. This lets the generator
+    keep many requests in flight at once instead of blocking on each one.
+    
+    Async clients own network resources bound to the running event loop,
+    so they must be closed with aclose() before the loop shuts down.
+    """
+    
+    @abstractmethod
+    async def complete(self, prompt: str, max_retries: int = 3,
+                       output_spec: Optional[StructuredOutput] = None) -> Completion:
+        """Generate text using the LLM without blocking the event loop."""
+        pass
+    
+    async def generate_text(self, prompt: str, max_retries: int = 3,
+                            output_spec: Optional[StructuredOutput] = None) -> str:
+        completion = await self.complete(prompt, max_retries=max_retries, output_spec=output_spec)
+        return completion.text
+    
+    async def stream_text(self, prompt: str, max_retries: int = 3,
+                          output_spec: Optional[StructuredOutput] = None) -> AsyncIterator[str]:
+        """Async twin of LLMClient.stream_text (default: one chunk with the whole completion)."""
+        yield await self.generate_text(prompt, max_retries=max_retries, output_spec=output_spec)
+    
+    async def aclose(self):
+        """Release network resources held by the client."""
+        pass
+
+
+class AsyncOpenAIClient(AsyncLLMClient):
+    """Async client for OpenAI GPT API (built on AsyncOpenAI)."""
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.client = AsyncOpenAI(api_key=self.api_key, base_url=config.get('base_url'), max_retries=0)
+        self.model = config.get('model', 'gpt-3.5-turbo')
+        self.max_tokens = config.get('max_tokens', 1000)
+        self.temperature = config.get('temperature', 0.7)
+        self.rate_limiter = get_rate_limiter('openai', config)
+    
+    async def _create_completion(self, prompt: str, estimated_tokens: int, max_retries: int,
+                                 output_spec: Optional[StructuredOutput] = None, **kwargs):
+        """Async twin of OpenAIClient._create_completion (shares the sync client's rate limiter)."""
+        response_format = self._response_format(output_spec)
+        if response_format:
+            kwargs['response_format'] = response_format
+        if self.seed is not None:
+            kwargs['seed'] = self.seed
+        
+        for attempt in range(max_retries):
+            await self.rate_limiter.acquire_async(estimated_tokens)
+            try:
+                return await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=build_messages(self._prepare_prompt(prompt, output_spec)),
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                    **kwargs
+                )
+            
+            except openai.BadRequestError as e:
+                self.rate_limiter.release(estimated_tokens, success=False)
+                # The model does not support this response_format: retry one mode lower
+                if response_format and self._downgrade_structured_output(response_format['type'], e):
+                    kwargs.pop('response_format')
+                    return await self._create_completion(prompt, estimated_tokens, max_retries, output_spec, **kwargs)
+                raise
+            
+            except openai.RateLimitError as e:
+                self.rate_limiter.release(estimated_tokens, tokens_used=0, rate_limited=True,
+                                          retry_after=parse_retry_after(getattr(e.response, 'headers', None)))
+                if attempt < max_retries - 1:
+                    continue
+                raise
+            
+            except Exception as e:
+                self.rate_limiter.release(estimated_tokens, success=False)
+                if attempt < max_retries - 1:
+                    print(f"OpenAI API error (attempt {attempt + 1}): {e}")
+                    await asyncio.sleep(1)
+                    continue
+                raise
+        
+        raise Exception(f"Failed to generate text after {max_retries} attempts")
+    
+    async def complete(self, prompt: str, max_retries: int = 3,
+                       output_spec: Optional[StructuredOutput] = None) -> Completion:
+        """Generate text using OpenAI API."""
+        estimated_tokens = self._estimate_tokens(prompt)
+        response = await self._create_completion(prompt, estimated_tokens, max_retries, output_spec)
+        
+        usage = getattr(response, 'usage', None)
+        self.rate_limiter.release(estimated_tokens, tokens_used=getattr(usage, 'total_tokens', None))
+        
+        choice = response.choices[0]
+        if not choice.message.content:
+            raise ValueError("Empty response from OpenAI")
+        
+        return Completion(choice.message.content.strip(), choice.finish_reason)
+    
+    async def stream_text(self, prompt: str, max_retries: int = 3,
+                          output_spec: Optional[StructuredOutput] = None) -> AsyncIterator[str]:
+        """Stream text from OpenAI API (stream=True)."""
+        estimated_tokens = self._estimate_tokens(prompt)
+        stream = await self._create_completion(prompt, estimated_tokens, max_retries, output_spec,
+                                               stream=True, stream_options={'include_usage': True})
+        
+        tokens_used = None
+        completed = False
+        try:
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    tokens_used = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            completed = True
+        finally:
+            await stream.close()
+            self.rate_limiter.release(estimated_tokens, tokens_used=tokens_used, success=completed)
+    
+    async def aclose(self):
+        await self.client.close()
+
+
+class AsyncDeepSeekClient(AsyncLLMClient):
+    """Async client for DeepSeek API (built on an aiohttp session)."""
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.base_url = config.get('base_url', 'https://api.deepseek.com/v1')
+        self.model = config.get('model', 'deepseek-chat')
+        self.max_tokens = config.get('max_tokens', 1000)
+        self.temperature = config.get('temperature', 0.7)
+        self.url = f"{self.base_url}/chat/completions"
+        
+        self.pool_size = config.get('pool_size', 10)
+        self.rate_limiter = get_rate_limiter('deepseek', config)
+        self.timeout = aiohttp.ClientTimeout(
+            sock_connect=config.get('connect_timeout', 5),
+            sock_read=config.get('read_timeout', 60)
+        )
+        
+        # The session is created lazily because aiohttp sessions must be
+        # created inside a running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    'Authorization': f'Bearer {self.api_key}',
+                    'Content-Type': 'application/json'
+                },
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout
+            )
+        return self._session
+    
+    def _payload(self, prompt: str, stream: bool = False,
+                 output_spec: Optional[StructuredOutput] = None) -> Dict[str, Any]:
         payload = {
             'model': self.model,
-            'messages': [
-                {"role": "system", "content": "You are a helpful assistant that generates realistic data for calendar applications. Always return valid JSON as requested."},
-                {"role": "user", "content": prompt}
-            ],
+            'messages': build_messages(self._prepare_prompt(prompt, output_spec)),
             'max_tokens': self.max_tokens,
             'temperature': self.temperature
         }
-        
+        if stream:
+            payload['stream'] = True
+            payload['stream_options'] = {'include_usage': True}
+        response_format = self._response_format(output_spec)
+        if response_format:
+            payload['response_format'] = response_format
+        return payload
+    
+    async def _post(self, prompt: str, estimated_tokens: int, max_retries: int, stream: bool = False,
+                    output_spec: Optional[StructuredOutput] = None) -> aiohttp.ClientResponse:
+        """Async twin of DeepSeekClient._post (the caller releases the response and limiter slot)."""
+        payload = self._payload(prompt, stream, output_spec)
+        session = self._get_session()
         for attempt in range(max_retries):
+            await self.rate_limiter.acquire_async(estimated_tokens)
             try:
-                response = requests.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 429:  # Rate limit
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        print(f"Rate limit hit, waiting {wait_time} seconds...")
-                        time.sleep(wait_time)
-                        continue
-                    response.raise_for_status()
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                if 'choices' not in data or not data['choices']:
-                    raise ValueError("Invalid response format from DeepSeek")
-                
-                content = data['choices'][0]['message']['content']
-                if not content:
-                    raise ValueError("Empty response from DeepSeek")
-                
-                return content.strip()
-                
-            except requests.exceptions.RequestException as e:
+                response = await session.post(self.url, json=payload)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.rate_limiter.release(estimated_tokens, success=False)
                 if attempt < max_retries - 1:
                     print(f"DeepSeek API error (attempt {attempt + 1}): {e}")
-                    time.sleep(1)
+                    await asyncio.sleep(1)
                     continue
                 raise
+            
+            if response.status == 429:  # Rate limit
+                self.rate_limiter.release(estimated_tokens, tokens_used=0, rate_limited=True,
+                                          retry_after=parse_retry_after(response.headers))
+                response.release()
+                if attempt < max_retries - 1:
+                    continue
+                response.raise_for_status()
+            
+            if response.status >= 400:
+                self.rate_limiter.release(estimated_tokens, success=False)
+                detail = await response.text() if response.status == 400 else ''
+                response.release()
+                if (response.status == 400 and 'response_format' in payload
+                        and self._downgrade_structured_output(payload['response_format']['type'], detail)):
+                    return await self._post(prompt, estimated_tokens, max_retries, stream, output_spec)
+                if response.status >= 500 and attempt < max_retries - 1:
+                    print(f"DeepSeek API error (attempt {attempt + 1}): HTTP {response.status}")
+                    await asyncio.sleep(1)
+                    continue
+                response.raise_for_status()
+            
+            return response
         
         raise Exception(f"Failed to generate text after {max_retries} attempts")
+    
+    async def complete(self, prompt: str, max_retries: int = 3,
+                       output_spec: Optional[StructuredOutput] = None) -> Completion:
+        """Generate text using DeepSeek API."""
+        estimated_tokens = self._estimate_tokens(prompt)
+        response = await self._post(prompt, estimated_tokens, max_retries, output_spec=output_spec)
+        
+        try:
+            data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):  # ValueError: malformed JSON body
+            self.rate_limiter.release(estimated_tokens, success=False)
+            raise
+        finally:
+            response.release()
+        
+        self.rate_limiter.release(estimated_tokens, tokens_used=(data.get('usage') or {}).get('total_tokens'))
+        
+        if 'choices' not in data or not data['choices']:
+            raise ValueError("Invalid response format from DeepSeek")
+        
+        choice = data['choices'][0]
+        content = choice['message']['content']
+        if not content:
+            raise ValueError("Empty response from DeepSeek")
+        
+        return Completion(content.strip(), choice.get('finish_reason'))
+    
+    async def stream_text(self, prompt: str, max_retries: int = 3,
+                          output_spec: Optional[StructuredOutput] = None) -> AsyncIterator[str]:
+        """Stream text from DeepSeek API (server-sent events)."""
+        estimated_tokens = self._estimate_tokens(prompt)
+        response = await self._post(prompt, estimated_tokens, max_retries, stream=True,
+                                    output_spec=output_spec)
+        
+        tokens_used = None
+        completed = False
+        try:
+            # StreamReader iterates line by line
+            async for raw_line in response.content:
+                event = parse_sse_line(raw_line.decode('utf-8'))
+                if event is None:
+                    continue
+                if event.get('usage'):
+                    tokens_used = event['usage'].get('total_tokens')
+                content = stream_delta(event)
+                if content:
+                    yield content
+            completed = True
+        finally:
+            response.release()
+            self.rate_limiter.release(estimated_tokens, tokens_used=tokens_used, success=completed)
+    
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
 
 
 class LLMClientFactory:
@@ -246,7 +760,7 @@ class LLMClientFactory:
         Args:
             provider: Provider name ('openai' or 'deepseek')
             config: Provider configuration
-            
+        
         Returns:
             LLM client instance
         """
@@ -257,6 +771,24 @@ class LLMClientFactory:
         else:
             raise ValueError(f"Unsupported LLM provider: {provider}")
     
+    @staticmethod
+    def create_async_client(provider: str, config: Dict[str, Any]) -> AsyncLLMClient:
+        """Create an asyncio LLM client based on the provider.
+        
+        Args:
+            provider: Provider name ('openai' or 'deepseek')
+            config: Provider configuration
+        
+        Returns:
+            Async LLM client instance
+        """
+        if provider.lower() == 'openai':
+            return AsyncOpenAIClient(config)
+        elif provider.lower() == 'deepseek':
+            return AsyncDeepSeekClient(config)
+        else:
+            raise ValueError(f"Unsupported LLM provider: {provider}")
+    
     @staticmethod
     def get_available_providers() -> list:
         """Get list of available providers."""
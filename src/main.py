@@ -19,12 +19,18 @@ CLI Design Principles:
 """
 
 import click
+import os
+import socket
 from datetime import datetime
 from pathlib import Path
 
 from .config_loader import ConfigLoader
 from .database import RedisManager
+from .entity_codec import CODECS, EntityCodec
+from .ingest_stream import IngestStream
 from .data_generator import DataGenerator
+from .hybrid_generator import HybridGenerator
+from .event_store import CATEGORIES, PRIORITIES
 
 
 @click.group()
@@ -37,16 +43,14 @@ def cli(ctx):
     """
     ctx.ensure_object(dict)
     
-    # Initialize components
+    # Initialize components (the generator needs API keys, so only `generate` builds it)
     try:
         config_loader = ConfigLoader()
         redis_manager = RedisManager(config_loader.get_database_config())
-        data_generator = DataGenerator(config_loader, redis_manager)
         
         ctx.obj['config'] = config_loader
         ctx.obj['redis'] = redis_manager
-        ctx.obj['generator'] = data_generator
-        
+    
     except Exception as e:
         click.echo(f" Initialization failed: {e}", err=True)
         ctx.exit(1)
@@ -55,23 +59,43 @@ def cli(ctx):
 @cli.command()
 @click.option('--users', '-u', default=None, type=int, help='Number of users to generate')
 @click.option('--provider', '-p', type=click.Choice(['openai', 'deepseek']), help='LLM provider to use')
+@click.option('--concurrency', '-c', default=None, type=int, help='Max concurrent LLM calls (1 = sequential)')
+@click.option('--mode', type=click.Choice(['llm', 'hybrid']), default='llm',
+              help='llm: every record from the LLM; hybrid: LLM templates expanded locally with Faker')
+@click.option('--refresh-templates', is_flag=True, help='Hybrid mode: request a new template pool')
+@click.option('--seed', default=None, type=int,
+              help='Seed for a reproducible run (ids, event counts, Faker, API seed, fixed created_at)')
+@click.option('--ingest/--no-ingest', default=None,
+              help='Queue records on the ingest stream for `ingest` writers instead of saving them (LLM and hybrid mode)')
 @click.option('--dry-run', is_flag=True, help='Show what would be generated without actually doing it')
 @click.pass_context
-def generate(ctx, users, provider, dry_run):
+def generate(ctx, users, provider, concurrency, mode, refresh_templates, seed, ingest, dry_run):
     """Generate calendar data (users and events)."""
-    generator = ctx.obj['generator']
     config = ctx.obj['config']
     
     if users is None:
         users = config.get_generation_config().get('users', {}).get('count', 50)
     
     if dry_run:
-        click.echo(f"🔍 DRY RUN: Would generate {users} users with events using {provider or 'any available'} provider")
+        click.echo(f"🔍 DRY RUN: Would generate {users} users with events using {provider or 'any available'} provider"
+                   f" ({mode} mode)")
         return
     
+    try:
+        generator = DataGenerator(config, ctx.obj['redis'])
+    except Exception as e:
+        click.echo(f" Initialization failed: {e}", err=True)
+        ctx.exit(1)
+    
     click.echo(f" Starting data generation...")
     click.echo(f" Users to generate: {users}")
-    click.echo(f" Provider: {provider or 'auto-select'}")
+    click.echo(f" Provider: {provider or 'auto-select (load balanced)'}")
+    click.echo(f" Mode: {mode}")
+    
+    if seed is not None:
+        generator.set_seed(seed)
+    if generator.run_seed.seeded:
+        click.echo(f" Seed: {generator.run_seed.seed}")
     
     try:
         with click.progressbar(length=100, label='Generating data') as bar:
@@ -79,7 +103,11 @@ def generate(ctx, users, provider, dry_run):
             # you'd want to update it during generation
             bar.update(50)
             
-            results = generator.generate_and_save(users, provider)
+            if mode == 'hybrid':
+                results = HybridGenerator(generator).generate_and_save(users, provider, refresh_templates,
+                                                                       ingest)
+            else:
+                results = generator.generate_and_save(users, provider, concurrency, ingest)
             
             bar.update(50)
         
@@ -89,14 +117,35 @@ def generate(ctx, users, provider, dry_run):
         click.echo(f" Events generated: {results['events_generated']}")
         click.echo(f" Duration: {results['duration_seconds']:.2f} seconds")
         click.echo(f" API calls made: {results['api_calls']}")
+        click.echo(f" Batch: {results['batch_id']}" + (f" (seed {results['seed']})" if results['seed'] is not None else ""))
+        if 'templates' in results:
+            click.echo(f" Profession templates: {results['templates']}")
+        if results.get('ingest_backlog') is not None:
+            click.echo(f" Ingest backlog: {results['ingest_backlog']['length']} records "
+                       f"(run `python -m src.main ingest` to persist them)")
+        
+        if results['cache_hits'] or results['cache_misses']:
+            click.echo(f" Cache hits/misses: {results['cache_hits']}/{results['cache_misses']}")
+        
+        for provider_name, provider_stats in results['providers'].items():
+            click.echo(f" {provider_name}: {provider_stats['calls']} calls, "
+                       f"{provider_stats['errors']} errors, latency EWMA {provider_stats['latency_ewma']}s")
         
         if results['failed_generations'] > 0:
             click.echo(f" Failed generations: {results['failed_generations']}")
         
+        if results['parse_failures'] or results['retries_avoided']:
+            click.echo(f" Unparseable responses: {results['parse_failures']}, "
+                       f"recovered without a retry: {results['retries_avoided']}")
+        
+        if results['truncated_responses']:
+            click.echo(f" Responses cut off by max_tokens: {results['truncated_responses']} "
+                       f"(complete records kept, remainder re-requested)")
+        
         click.echo("\n Exported files:")
         for file_type, file_path in results['exported_files'].items():
             click.echo(f"  - {file_type}: {file_path}")
-        
+    
     except Exception as e:
         click.echo(f" Generation failed: {e}", err=True)
         ctx.exit(1)
@@ -116,8 +165,17 @@ def stats(ctx):
         click.echo(f"Users in database: {stats['users_count']}")
         click.echo(f"Events in database: {stats['events_count']}")
         click.echo(f"Memory usage: {stats['memory_usage']}")
+        click.echo(f"Storage codec: {stats['codec']}")
+        for entity in ('user', 'event'):
+            allocated = stats[f'bytes_per_{entity}']
+            payload = stats[f'payload_bytes_per_{entity}']
+            if payload is not None:
+                size = f"{allocated} in Redis" if allocated is not None else "n/a in Redis"
+                click.echo(f"Bytes per {entity}: {size} ({payload} payload)")
+        backlog = IngestStream.from_config(ctx.obj['config'].get_ingest_config(), redis_manager).backlog()
+        click.echo(f"Ingest backlog: {backlog['length']} ({backlog['pending']} being written)")
         click.echo(f"Connection status: {stats['connection_status']}")
-        
+    
     except Exception as e:
         click.echo(f" Failed to get statistics: {e}", err=True)
 
@@ -130,7 +188,8 @@ def clear(ctx):
     redis_manager = ctx.obj['redis']
     
     try:
-        success = redis_manager.clear_all_data()
+        stream = IngestStream.from_config(ctx.obj['config'].get_ingest_config(), redis_manager)
+        success = redis_manager.clear_all_data(stream_keys=[stream.stream])
         if success:
             click.echo(" All data cleared successfully")
         else:
@@ -140,62 +199,142 @@ def clear(ctx):
 
 
 @cli.command()
-@click.option('--format', '-f', type=click.Choice(['json', 'csv']), default='json', help='Export format')
 @click.pass_context
-def export(ctx, format):
-    """Export existing data from Redis to files."""
+def reindex(ctx):
+    """Rebuild the time and filter indexes (for data saved before they existed)."""
     redis_manager = ctx.obj['redis']
     
     try:
-        users = redis_manager.get_all_users()
-        events = redis_manager.get_all_events()
-        
-        if not users and not events:
+        counts = redis_manager.rebuild_indexes()
+        click.echo(f" Indexed {counts['users']} users and {counts['events']} events")
+    except Exception as e:
+        click.echo(f" Reindex failed: {e}", err=True)
+
+
+@cli.command()
+@click.option('--consumer', default=None,
+              help='Writer name in the consumer group (default: host-pid); reuse it after a crash to resume')
+@click.option('--drain', is_flag=True, help='Exit once the stream is empty instead of waiting for more records')
+@click.pass_context
+def ingest(ctx, consumer, drain):
+    """Persist records queued by `generate --ingest` (Redis Streams consumer group)."""
+    redis_manager = ctx.obj['redis']
+    stream = IngestStream.from_config(ctx.obj['config'].get_ingest_config(), redis_manager)
+    consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+    
+    click.echo(f" Writer {consumer} reading {stream.stream} (group {stream.group})...")
+    try:
+        totals = stream.consume(consumer, drain=drain)
+        click.echo(f" Saved {totals['users']} users and {totals['events']} events"
+                   + (f", dropped {totals['dropped']} malformed entries" if totals['dropped'] else ""))
+    except KeyboardInterrupt:
+        click.echo(" Stopped; unacknowledged records stay pending for the next writer")
+    except Exception as e:
+        click.echo(f" Ingest failed: {e}", err=True)
+        ctx.exit(1)
+
+
+@cli.command()
+@click.option('--codec', required=True, type=click.Choice(CODECS), help='Codec to rewrite the records with')
+@click.option('--buckets', default=0, type=int, help='Hashes to group json/msgpack blobs into (0 = one key each)')
+@click.pass_context
+def migrate(ctx, codec, buckets):
+    """Rewrite stored users and events with another storage codec."""
+    redis_manager = ctx.obj['redis']
+    
+    try:
+        target = EntityCodec(codec, buckets)
+        before = redis_manager.get_stats()
+        click.echo(f" Migrating from {before['codec']} to {target}...")
+        counts = redis_manager.migrate_codec(target)
+        after = redis_manager.get_stats()
+        click.echo(f" Migrated {counts['users']} users and {counts['events']} events")
+        for entity in ('user', 'event'):
+            click.echo(f"  - Bytes per {entity}: {before[f'bytes_per_{entity}']} -> {after[f'bytes_per_{entity}']} in Redis, "
+                       f"{before[f'payload_bytes_per_{entity}']} -> {after[f'payload_bytes_per_{entity}']} payload")
+        click.echo(f" Set database.redis.codec: \"{codec}\" and buckets: {buckets} in config.yaml before the next run")
+    except Exception as e:
+        click.echo(f" Migration failed: {e}", err=True)
+
+
+@cli.command()
+@click.option('--format', '-f', type=click.Choice(['json', 'jsonl', 'csv']), default='json', help='Export format')
+@click.option('--category', multiple=True, type=click.Choice(CATEGORIES), help='Only events of this category (repeatable)')
+@click.option('--priority', multiple=True, type=click.Choice(PRIORITIES), help='Only events of this priority (repeatable)')
+@click.option('--profession', multiple=True, help='Only users with this profession and their events (repeatable)')
+@click.option('--timezone', 'timezones', multiple=True, help='Only users in this timezone and their events (repeatable)')
+@click.option('--start', type=click.DateTime(), default=None, help='Only events starting at or after this time (UTC)')
+@click.option('--end', type=click.DateTime(), default=None, help='Only events starting before this time (UTC)')
+@click.pass_context
+def export(ctx, format, category, priority, profession, timezones, start, end):
+    """Export existing data from Redis to files.
+    
+    Filters are resolved with the Redis indexes, so only matching records are read.
+    """
+    redis_manager = ctx.obj['redis']
+    
+    try:
+        if not redis_manager.client.scard("users") and not redis_manager.client.scard("events"):
             click.echo(" No data found in database to export")
             return
         
+        # Values of one filter are OR'ed, different filters AND'ed; user filters also select their events
+        user_ids = None
+        if profession or timezones:
+            user_ids = redis_manager.find_user_ids(professions=profession or None, timezones=timezones or None)
+        
+        def selected_users():
+            return redis_manager.get_all_users() if user_ids is None else redis_manager.get_users(user_ids)
+        
+        def selected_events():
+            if user_ids is None and not (category or priority or start or end):
+                return redis_manager.get_all_events()
+            return redis_manager.find_events(categories=category or None, priorities=priority or None,
+                                             user_ids=user_ids, start=start, end=end)
+        
         # Create export directory
         output_dir = Path("data/exported")
         output_dir.mkdir(parents=True, exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        if format == 'json':
-            import json
-            
-            # Export users
-            users_file = output_dir / f"users_export_{timestamp}.json"
-            with open(users_file, 'w', encoding='utf-8') as f:
-                json.dump([user.dict() for user in users], f, indent=2, default=str)
+        if format in ('json', 'jsonl'):
+            from .exporters import DatasetExporter
             
-            # Export events
-            events_file = output_dir / f"events_export_{timestamp}.json"
-            with open(events_file, 'w', encoding='utf-8') as f:
-                json.dump([event.dict() for event in events], f, indent=2, default=str)
+            # Stream records from Redis straight into the files
+            exporter = DatasetExporter(output_dir, timestamp, export_format=format, suffix='_export')
+            try:
+                user_count = exporter.write_users(selected_users())
+                event_count = exporter.write_events(selected_events())
+            finally:
+                file_paths = exporter.close()
             
-            click.echo(f" Exported {len(users)} users and {len(events)} events to JSON files:")
-            click.echo(f"  - Users: {users_file}")
-            click.echo(f"  - Events: {events_file}")
+            click.echo(f" Exported {user_count} users and {event_count} events to {format.upper()} files:")
+            click.echo(f"  - Users: {file_paths['users_file']}")
+            click.echo(f"  - Events: {file_paths['events_file']}")
         
         elif format == 'csv':
             import pandas as pd
             
+            users = list(selected_users())
+            events = list(selected_events())
+            
             # Export users to CSV
             if users:
-                users_df = pd.DataFrame([user.dict() for user in users])
+                users_df = pd.DataFrame([user.model_dump() for user in users])
                 users_csv = output_dir / f"users_export_{timestamp}.csv"
                 users_df.to_csv(users_csv, index=False)
                 click.echo(f"  - Users CSV: {users_csv}")
             
             # Export events to CSV
             if events:
-                events_df = pd.DataFrame([event.dict() for event in events])
+                events_df = pd.DataFrame([event.model_dump() for event in events])
                 events_csv = output_dir / f"events_export_{timestamp}.csv"
                 events_df.to_csv(events_csv, index=False)
                 click.echo(f"  - Events CSV: {events_csv}")
-                
+            
             click.echo(f" Exported {len(users)} users and {len(events)} events to CSV files")
-        
+    
     except Exception as e:
         click.echo(f" Export failed: {e}", err=True)
 
@@ -0,0 +1,437 @@
+"""
+Local mock of an OpenAI-compatible chat completions API.
+
+Benchmarking DataGenerator against real providers costs money, depends on
+network conditions and is never repeatable. This server speaks the same
+`/chat/completions` protocol used by DeepSeekClient and the OpenAI SDK and
+answers with canned, valid user/event (and hybrid-mode template) JSON
+shaped like real LLM output.
+
+What can be simulated:
+- Latency: fixed, uniform or lognormal distribution per request
+- Rate limiting: a fraction of requests answered with 429 + Retry-After
+- Server errors: a fraction of requests answered with 500
+- Bad output: a fraction of completions with broken JSON
+- max_tokens cut-offs: a fraction of completions cut off mid-array and
+  reported with finish_reason "length" (also in structured output modes)
+- Structured output: `response_format` json_object/json_schema requests get
+  the array wrapped in an object ({"users": [...]}) and never broken JSON;
+  modes above `structured_output` are rejected with a 400 like an older model
+- Streaming: `"stream": true` requests get server-sent events, with the
+  first chunk after part of the latency and the rest spread over the remainder
+
+Usage:
+    python -m src.mock_llm_server --port 8089 --latency lognormal --latency-ms 400
+    
+    # then point a provider at it in config.yaml
+    api:
+      deepseek:
+        base_url: "http://127.0.0.1:8089/v1"
+"""
+
+import contextlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+
+
+FIRST_NAMES = ["Ava", "Liam", "Maya", "Noah", "Zara", "Ethan", "Priya", "Lucas", "Sofia", "Omar",
+               "Hana", "Diego", "Chloe", "Kenji", "Amara", "Felix", "Leila", "Mateo", "Ingrid", "Ravi"]
+LAST_NAMES = ["Chen", "Okafor", "Garcia", "Novak", "Patel", "Silva", "Kim", "Johansson", "Haddad",
+              "Murphy", "Rossi", "Tanaka", "Mensah", "Dubois", "Kowalski", "Reyes", "Singh", "Weber"]
+PROFESSIONS = ["Software Engineer", "Product Manager", "Nurse", "Data Scientist", "Architect",
+               "Sales Director", "Teacher", "Financial Analyst", "UX Designer", "Attorney"]
+TIMEZONES = ["America/New_York", "America/Los_Angeles", "Europe/London", "Europe/Berlin",
+             "Asia/Tokyo", "Asia/Kolkata", "Australia/Sydney", "America/Chicago"]
+EVENT_TITLES = [("Team Standup", "meeting"), ("Sprint Planning", "meeting"), ("Client Call", "work"),
+                ("Dentist Appointment", "appointment"), ("Code Review", "work"), ("1:1 with Manager", "meeting"),
+                ("Gym Session", "personal"), ("Quarterly Review [Q3]", "meeting"), ("Lunch with Mentor", "personal"),
+                ("Design Workshop", "work"), ("Doctor Visit", "appointment"), ("Budget Sync", "meeting")]
+LOCATIONS = ["Office Room 101", "Virtual", "Conference Room B", "Downtown Clinic", "Cafe Central", None]
+
+STRUCTURED_OUTPUT_LEVELS = ("none", "json_object", "json_schema")  # Least to most capable
+STREAM_CHUNK_CHARS = 16         # ~4 tokens per streamed delta
+FIRST_CHUNK_LATENCY_SHARE = 0.2  # Time to first chunk, as a share of the sampled latency
+
+
+class MockBehavior:
+    """Latency distribution, fault injection and payload generation settings."""
+    
+    def __init__(self, latency: str = "lognormal", latency_ms: float = 300.0, latency_spread: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 invalid_json_rate: float = 0.0, seed: Optional[int] = None,
+                 structured_output: str = "json_schema", truncation_rate: float = 0.0):
+        """
+        Args:
+            latency: 'fixed', 'uniform' or 'lognormal'
+            latency_ms: Fixed value, uniform midpoint or lognormal median (milliseconds)
+            latency_spread: Uniform half-width as a fraction, or lognormal sigma
+            error_rate: Fraction of requests answered with HTTP 500
+            rate_limit_rate: Fraction of requests answered with HTTP 429
+            retry_after: Retry-After header value (seconds) sent with 429s
+            invalid_json_rate: Fraction of completions with broken JSON
+            seed: Seed for reproducible payloads and fault injection. Payloads
+                  are derived from the seed and the prompt, so they do not
+                  depend on the order concurrent requests arrive in.
+            structured_output: Most capable response_format type accepted
+                               ('json_schema', 'json_object' or 'none')
+            truncation_rate: Fraction of completions cut off as if max_tokens
+                             was reached (finish_reason "length")
+        """
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.invalid_json_rate = invalid_json_rate
+        self.structured_output = structured_output
+        self.truncation_rate = truncation_rate
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counter = 0
+    
+    def random(self) -> float:
+        with self._lock:
+            return self.rng.random()
+    
+    def sample_latency(self) -> float:
+        """Draw one request latency in seconds."""
+        with self._lock:
+            if self.latency == "fixed":
+                ms = self.latency_ms
+            elif self.latency == "uniform":
+                half_width = self.latency_ms * self.latency_spread
+                ms = self.rng.uniform(self.latency_ms - half_width, self.latency_ms + half_width)
+            else:
+                ms = self.latency_ms * self.rng.lognormvariate(0.0, self.latency_spread)
+        return max(0.0, ms) / 1000.0
+    
+    def _next_id(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+    
+    def _payload_rng(self, prompt: Optional[str]):
+        """(rng, lock) for one payload: per request when seeded, else the shared generator."""
+        if self.seed is None or prompt is None:
+            return self.rng, self._lock
+        return random.Random(f"{self.seed}:{prompt}"), contextlib.nullcontext()
+    
+    def _payload_id(self, rng: "random.Random") -> int:
+        """Number that keeps emails and professions distinct across requests."""
+        return self._next_id() if rng is self.rng else rng.randrange(1, 1 << 30)
+    
+    def make_users(self, count: int, prompt: Optional[str] = None) -> List[Dict[str, Any]]:
+        rng, lock = self._payload_rng(prompt)
+        users = []
+        for _ in range(count):
+            n = self._payload_id(rng)
+            with lock:
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                initial = chr(ord('A') + rng.randrange(26))  # Widens the name space for uniqueness checks
+                profession, timezone = rng.choice(PROFESSIONS), rng.choice(TIMEZONES)
+                start = rng.choice([7, 8, 9, 10])
+            users.append({
+                "name": f"{first} {initial}. {last}",
+                "email": f"{first.lower()}.{last.lower()}{n}@example.com",
+                "timezone": timezone,
+                "profession": profession,
+                "preferences": {
+                    "working_hours": {"start": f"{start:02d}:00", "end": f"{start + 8:02d}:00"},
+                    "meeting_duration_preference": "30-60 minutes",
+                    "calendar_view": "week"
+                }
+            })
+        return users
+    
+    def make_events(self, count: int, prompt: Optional[str] = None) -> List[Dict[str, Any]]:
+        rng, lock = self._payload_rng(prompt)
+        events = []
+        for _ in range(count):
+            with lock:
+                title, category = rng.choice(EVENT_TITLES)
+                hour = rng.randint(8, 16)
+                minutes = rng.choice([30, 60, 90])
+                location = rng.choice(LOCATIONS)
+                priority = rng.choice(["high", "medium", "low"])
+            end_hour, end_minute = hour + minutes // 60, minutes % 60
+            events.append({
+                "title": title,
+                "description": f"{title} scheduled automatically",
+                "start_time": f"2024-12-26T{hour:02d}:00:00",
+                "end_time": f"2024-12-26T{end_hour:02d}:{end_minute:02d}:00",
+                "location": location,
+                "attendees": ["colleague@company.com"] if category == "meeting" else [],
+                "category": category,
+                "priority": priority,
+                "recurrence": None
+            })
+        return events
+    
+    def make_templates(self, count: int, events_per_profession: int,
+                       prompt: Optional[str] = None) -> List[Dict[str, Any]]:
+        rng, lock = self._payload_rng(prompt)
+        templates = []
+        for _ in range(count):
+            n = self._payload_id(rng)
+            with lock:
+                profession = rng.choice(PROFESSIONS)
+                start = rng.choice([7, 8, 9, 10])
+                picks = [(rng.choice(EVENT_TITLES), rng.choice([15, 30, 45, 60, 90]),
+                          rng.choice(LOCATIONS), rng.choice(["high", "medium", "low"]),
+                          rng.randint(1, 5))
+                         for _ in range(events_per_profession)]
+            templates.append({
+                "profession": f"{profession} {n}",  # Distinct across calls, like a real pool
+                "working_hours": {"start": f"{start:02d}:00", "end": f"{start + 8:02d}:00"},
+                "meeting_duration_preference": "30-60 minutes",
+                "events": [{
+                    "title": title,
+                    "description": f"{title} for a {profession.lower()}",
+                    "category": category,
+                    "priority": priority,
+                    "duration_minutes": minutes,
+                    "attendees": 0 if category == "personal" else attendees,
+                    "location": location,
+                    "recurrence": None
+                } for (title, category), minutes, location, priority, attendees in picks]
+            })
+        return templates
+    
+    def supports(self, response_format: Optional[Dict[str, Any]]) -> bool:
+        """True if a request's response_format type is accepted."""
+        if not response_format:
+            return True
+        requested = response_format.get("type", "text")
+        if requested == "text":
+            return True
+        if requested not in STRUCTURED_OUTPUT_LEVELS:
+            return False
+        return STRUCTURED_OUTPUT_LEVELS.index(requested) <= STRUCTURED_OUTPUT_LEVELS.index(self.structured_output)
+    
+    def completion_for(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+        """Build the assistant message content and finish_reason for a prompt."""
+        user_match = re.search(r"Generate (\d+) realistic user", prompt)
+        event_match = re.search(r"Generate exactly (\d+) realistic calendar events", prompt)
+        template_match = re.search(r"Generate (\d+) profession templates? with (\d+) events each", prompt)
+        
+        if user_match:
+            key, payload = "users", self.make_users(int(user_match.group(1)), prompt)
+        elif event_match:
+            key, payload = "events", self.make_events(int(event_match.group(1)), prompt)
+        elif template_match:
+            key, payload = "professions", self.make_templates(int(template_match.group(1)),
+                                                              int(template_match.group(2)), prompt)
+        else:
+            return "Hello from the mock LLM server", "stop"
+        
+        if response_format and response_format.get("type") in ("json_object", "json_schema"):
+            # Constrained decoding: always an object, valid JSON unless cut off below
+            content = json.dumps({key: payload}, indent=2)
+        else:
+            content = json.dumps(payload, indent=2)
+            if self.random() < self.invalid_json_rate:
+                # Simulate broken JSON: an array that ends abruptly
+                content = content[: max(1, len(content) * 2 // 3)]
+        
+        if self.random() < self.truncation_rate:
+            # max_tokens reached: the API stops mid-value and says so
+            return content[: max(1, len(content) * 2 // 3)], "length"
+        return content, "stop"
+
+
+class MockLLMRequestHandler(BaseHTTPRequestHandler):
+    """Handles POST .../chat/completions like an OpenAI-compatible API."""
+    
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+    
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+    
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _write_chunk(self, data: bytes):
+        """Write one HTTP/1.1 chunked-encoding frame."""
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+    
+    def _send_stream(self, completion_id: str, model: str, content: str, finish_reason: str,
+                     remaining_latency: float, usage: Optional[Dict[str, int]]):
+        """Send the completion as server-sent events, pacing the chunks over the remaining latency."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        delay = remaining_latency / max(1, len(pieces))
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        
+        try:
+            for index, piece in enumerate(pieces):
+                if index:
+                    time.sleep(delay)
+                last = index == len(pieces) - 1
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece},
+                                              "finish_reason": finish_reason if last else None}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            
+            if usage is not None:
+                self._write_chunk(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")  # Terminating zero-length chunk
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client stopped reading early
+    
+    def do_POST(self):
+        behavior: MockBehavior = self.server.behavior
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        
+        streaming = bool(request.get("stream"))
+        latency = behavior.sample_latency()
+        # Streams answer after the time to first chunk; the rest is spent between chunks
+        first_chunk_latency = latency * FIRST_CHUNK_LATENCY_SHARE if streaming else latency
+        time.sleep(first_chunk_latency)
+        
+        roll = behavior.random()
+        if roll < behavior.rate_limit_rate:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                            headers={"Retry-After": str(behavior.retry_after)})
+            return
+        if roll < behavior.rate_limit_rate + behavior.error_rate:
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+        
+        response_format = request.get("response_format")
+        if not behavior.supports(response_format):
+            self._send_json(400, {"error": {
+                "message": f"response_format type '{response_format.get('type')}' is not supported by this model",
+                "type": "invalid_request_error",
+                "param": "response_format"
+            }})
+            return
+        
+        messages = request.get("messages") or [{}]
+        prompt = messages[-1].get("content", "")
+        content, finish_reason = behavior.completion_for(prompt, response_format)
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        completion_id = f"chatcmpl-mock-{behavior._next_id()}"
+        model = request.get("model", "mock-model")
+        
+        if streaming:
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            self._send_stream(completion_id, model, content, finish_reason, latency - first_chunk_latency,
+                              usage if include_usage else None)
+            return
+        
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason
+            }],
+            "usage": usage
+        })
+
+
+class MockLLMServer:
+    """Runs the mock API on a background thread (use as a context manager)."""
+    
+    def __init__(self, behavior: Optional[MockBehavior] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            behavior: Latency/fault settings (defaults to MockBehavior())
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.behavior = behavior or MockBehavior()
+        self.httpd = ThreadingHTTPServer((host, port), MockLLMRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.behavior = self.behavior
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        """Base URL to use as api.<provider>.base_url."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1', help='Interface to bind')
+@click.option('--port', default=8089, type=int, help='Port to listen on')
+@click.option('--latency', type=click.Choice(['fixed', 'uniform', 'lognormal']), default='lognormal')
+@click.option('--latency-ms', default=300.0, type=float, help='Fixed/mean/median latency in ms')
+@click.option('--latency-spread', default=0.5, type=float, help='Uniform half-width fraction or lognormal sigma')
+@click.option('--error-rate', default=0.0, type=float, help='Fraction of HTTP 500 responses')
+@click.option('--rate-limit-rate', default=0.0, type=float, help='Fraction of HTTP 429 responses')
+@click.option('--invalid-json-rate', default=0.0, type=float, help='Fraction of broken JSON completions')
+@click.option('--truncation-rate', default=0.0, type=float, help='Fraction of completions cut off (finish_reason length)')
+@click.option('--seed', default=None, type=int, help='Seed for reproducible payloads')
+@click.option('--structured-output', type=click.Choice(list(STRUCTURED_OUTPUT_LEVELS)), default='json_schema',
+              help='Most capable response_format type accepted (higher ones get HTTP 400)')
+def main(host, port, latency, latency_ms, latency_spread, error_rate, rate_limit_rate, invalid_json_rate,
+         truncation_rate, seed, structured_output):
+    """Run the mock OpenAI-compatible LLM server in the foreground."""
+    behavior = MockBehavior(latency, latency_ms, latency_spread, error_rate, rate_limit_rate,
+                            invalid_json_rate=invalid_json_rate, seed=seed, structured_output=structured_output,
+                            truncation_rate=truncation_rate)
+    server = MockLLMServer(behavior, host, port)
+    click.echo(f" Mock LLM server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Shared per-provider rate limiting for LLM clients.
+
+Before this module every client reacted to 429 responses on its own with
+time.sleep(2 ** attempt), so parallel callers kept hammering the API while
+others were backing off. Here all clients of one provider (sync threads and
+asyncio tasks alike) share a single RateLimiter:
+
+- Token buckets enforce requests/minute and tokens/minute before a call is sent
+- A 429 pauses the whole provider until Retry-After (or an exponential backoff)
+- AIMD adapts the number of in-flight calls: +1 per window of successful
+  calls, halved on every 429, so throughput settles just below the quota
+
+Configuration (per provider, under api.<provider>.rate_limit):
+- requests_per_minute: RPM quota (null = unlimited)
+- tokens_per_minute:   TPM quota (null = unlimited)
+- max_concurrency:     Upper bound for in-flight calls
+- min_concurrency:     Lower bound after repeated 429s
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate_per_minute`."""
+    
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.refill_per_second = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated = now
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill(now)
+        # Requests larger than the bucket are allowed once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+    
+    def consume(self, amount: float):
+        self.tokens -= amount
+    
+    def adjust(self, delta: float):
+        """Correct an earlier estimate (positive delta = more tokens were used)."""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class RateLimiter:
+    """
+    Coordinates all calls to one provider.
+    
+    State is guarded by a threading lock and the acquire loops only sleep
+    outside the lock, so the same limiter serves threads (acquire) and
+    asyncio tasks (acquire_async) without blocking the event loop.
+    """
+    
+    # How long a waiting caller sleeps when it is only waiting for a free slot
+    SLOT_POLL_SECONDS = 0.05
+    
+    def __init__(self, provider: str, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_concurrency: int = 16,
+                 min_concurrency: int = 1):
+        """
+        Args:
+            provider: Provider name (for log messages)
+            requests_per_minute: RPM quota, None for unlimited
+            tokens_per_minute: TPM quota, None for unlimited
+            max_concurrency: Maximum in-flight calls
+            min_concurrency: Minimum in-flight calls AIMD may shrink to
+        """
+        self.provider = provider
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        
+        # AIMD congestion window: start in the middle and let feedback move it
+        self.concurrency_limit = float(max(self.min_concurrency, self.max_concurrency // 2))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.consecutive_rate_limits = 0
+        self.rate_limited_count = 0
+        
+        self._lock = threading.Lock()
+    
+    def _try_acquire(self, tokens: float) -> float:
+        """Reserve a slot and quota if possible.
+        
+        Returns:
+            0 if the call may proceed, otherwise seconds to wait before retrying
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            
+            if self.in_flight >= int(self.concurrency_limit):
+                return self.SLOT_POLL_SECONDS
+            
+            wait = 0.0
+            if self.request_bucket is not None:
+                wait = max(wait, self.request_bucket.wait_time(1, now))
+            if self.token_bucket is not None:
+                wait = max(wait, self.token_bucket.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            
+            if self.request_bucket is not None:
+                self.request_bucket.consume(1)
+            if self.token_bucket is not None:
+                self.token_bucket.consume(tokens)
+            self.in_flight += 1
+            return 0.0
+    
+    def acquire(self, tokens: float = 0):
+        """Block the calling thread until the call may be sent."""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+    
+    async def acquire_async(self, tokens: float = 0):
+        """Wait (without blocking the event loop) until the call may be sent."""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+    
+    def release(self, estimated_tokens: float = 0, tokens_used: Optional[float] = None,
+                success: bool = True, rate_limited: bool = False,
+                retry_after: Optional[float] = None):
+        """Report the outcome of a call acquired earlier.
+        
+        Args:
+            estimated_tokens: Tokens reserved in acquire()
+            tokens_used: Actual usage reported by the API (reconciles the estimate)
+            success: Whether the call succeeded
+            rate_limited: Whether the API answered 429
+            retry_after: Seconds from the Retry-After header, if any
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            
+            if tokens_used is not None and self.token_bucket is not None:
+                self.token_bucket.adjust(tokens_used - estimated_tokens)
+            
+            if rate_limited:
+                # Multiplicative decrease + provider-wide pause
+                self.rate_limited_count += 1
+                self.consecutive_rate_limits += 1
+                self.concurrency_limit = max(float(self.min_concurrency), self.concurrency_limit / 2)
+                if retry_after is None:
+                    retry_after = min(60.0, 2.0 ** (self.consecutive_rate_limits - 1))
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+                print(f" {self.provider} rate limit hit: pausing {retry_after:.1f}s, "
+                      f"concurrency -> {int(self.concurrency_limit)}")
+            elif success:
+                # Additive increase: roughly +1 slot per window of successful calls
+                self.consecutive_rate_limits = 0
+                self.concurrency_limit = min(float(self.max_concurrency),
+                                             self.concurrency_limit + 1.0 / self.concurrency_limit)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limiter state (for stats and debugging)."""
+        with self._lock:
+            return {
+                'provider': self.provider,
+                'concurrency_limit': int(self.concurrency_limit),
+                'in_flight': self.in_flight,
+                'rate_limited': self.rate_limited_count
+            }
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Read the server-requested delay from response headers.
+    
+    Supports `retry-after-ms`, `Retry-After` in seconds and `Retry-After`
+    as an HTTP date.
+    
+    Returns:
+        Delay in seconds, or None if the headers do not specify one
+    """
+    if not headers:
+        return None
+    
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, config: Dict[str, Any]) -> RateLimiter:
+    """Return the process-wide limiter for a provider, creating it on first use.
+    
+    Args:
+        provider: Provider name ('openai' or 'deepseek')
+        config: Provider API configuration (reads the `rate_limit` section)
+    
+    Returns:
+        Shared RateLimiter instance
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            limits = config.get('rate_limit') or {}
+            _limiters[provider] = RateLimiter(
+                provider,
+                requests_per_minute=limits.get('requests_per_minute'),
+                tokens_per_minute=limits.get('tokens_per_minute'),
+                max_concurrency=limits.get('max_concurrency', 16),
+                min_concurrency=limits.get('min_concurrency', 1)
+            )
+        return _limiters[provider]
@@ -0,0 +1,262 @@
+"""
+Latency-aware load balancing across LLM providers.
+
+When several providers are configured, sending everything to the first one
+leaves the others idle. The scheduler spreads calls across every client,
+weighting each provider by what has been observed during the run:
+    
+    weight = quota share x (1 / EWMA latency) x (1 - EWMA error rate)^2
+
+- Faster providers get proportionally more calls
+- Failing providers lose weight quickly (squared error term) and get it back
+  as their calls start succeeding again, so load moves mid-run
+- Every provider keeps a small minimum share so it is still probed and can
+  recover after a bad spell
+- Replies served by the response cache are not recorded: their near-zero
+  latency would pull all traffic to whichever provider had the hits
+
+Design Pattern: Composite + Strategy
+- LoadBalancedLLMClient looks like a single LLMClient to the generator
+- Each call is routed to the provider the scheduler picks, with one
+  failover attempt on another provider if that call fails
+"""
+
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from .llm_cache import CachedChunk
+from .llm_clients import LLMClient, AsyncLLMClient, Completion
+from .structured_output import StructuredOutput
+
+
+class ProviderScheduler:
+    """Tracks per-provider health and picks a provider for each call."""
+    
+    def __init__(self, providers: List[str], quotas: Optional[Dict[str, Optional[float]]] = None,
+                 ewma_alpha: float = 0.2, min_share: float = 0.05, rng: Optional[random.Random] = None):
+        """
+        Args:
+            providers: Provider names to balance across
+            quotas: Configured requests/minute per provider (None = unknown/unlimited)
+            ewma_alpha: Smoothing factor for latency and error EWMAs
+            min_share: Minimum fraction of calls each provider keeps
+            rng: Random generator used for weighted picks
+        """
+        if not providers:
+            raise ValueError("ProviderScheduler needs at least one provider")
+        
+        self.providers = list(providers)
+        self.ewma_alpha = ewma_alpha
+        self.min_share = min_share
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        
+        # Unknown quotas are treated like the largest configured one
+        quotas = quotas or {}
+        known = [q for q in quotas.values() if q]
+        default_quota = max(known) if known else 1.0
+        self.quotas = {p: float(quotas.get(p) or default_quota) for p in self.providers}
+        
+        self.latency: Dict[str, Optional[float]] = {p: None for p in self.providers}
+        self.error_rate: Dict[str, float] = {p: 0.0 for p in self.providers}
+        self.calls: Dict[str, int] = {p: 0 for p in self.providers}
+        self.errors: Dict[str, int] = {p: 0 for p in self.providers}
+    
+    def _weights(self) -> Dict[str, float]:
+        """Compute normalized routing weights (caller holds the lock)."""
+        known_latencies = [l for l in self.latency.values() if l]
+        # Providers without samples yet are assumed to be average
+        default_latency = sum(known_latencies) / len(known_latencies) if known_latencies else 1.0
+        total_quota = sum(self.quotas.values())
+        
+        raw = {}
+        for provider in self.providers:
+            latency = self.latency[provider] or default_latency
+            health = (1.0 - self.error_rate[provider]) ** 2
+            raw[provider] = (self.quotas[provider] / total_quota) * health / max(latency, 1e-3)
+        
+        total = sum(raw.values()) or 1.0
+        floor = self.min_share if len(self.providers) > 1 else 0.0
+        shares = {p: max(floor, w / total) for p, w in raw.items()}
+        total = sum(shares.values())
+        return {p: w / total for p, w in shares.items()}
+    
+    def pick(self, exclude: Optional[List[str]] = None) -> str:
+        """Choose a provider for the next call (weighted random)."""
+        with self._lock:
+            weights = self._weights()
+        candidates = [p for p in self.providers if not exclude or p not in exclude]
+        if not candidates:
+            candidates = self.providers
+        return self.rng.choices(candidates, weights=[weights[p] for p in candidates])[0]
+    
+    def record(self, provider: str, latency: float, success: bool):
+        """Feed the outcome of a call back into the provider's EWMAs."""
+        alpha = self.ewma_alpha
+        with self._lock:
+            self.calls[provider] += 1
+            if not success:
+                self.errors[provider] += 1
+            self.error_rate[provider] = (1 - alpha) * self.error_rate[provider] + alpha * (0.0 if success else 1.0)
+            # Failed calls often return fast; only successful calls describe latency
+            if success:
+                previous = self.latency[provider]
+                self.latency[provider] = latency if previous is None else (1 - alpha) * previous + alpha * latency
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider call counts, EWMAs and current routing share."""
+        with self._lock:
+            weights = self._weights()
+            return {
+                p: {
+                    'calls': self.calls[p],
+                    'errors': self.errors[p],
+                    'latency_ewma': round(self.latency[p], 3) if self.latency[p] else None,
+                    'error_rate_ewma': round(self.error_rate[p], 3),
+                    'share': round(weights[p], 3)
+                }
+                for p in self.providers
+            }
+
+
+class LoadBalancedLLMClient(LLMClient):
+    """LLMClient that routes every call through a ProviderScheduler."""
+    
+    def __init__(self, clients: Dict[str, LLMClient], scheduler: ProviderScheduler):
+        """
+        Args:
+            clients: Provider name -> client
+            scheduler: Scheduler shared with the async twin
+        """
+        first = next(iter(clients.values()))
+        super().__init__(first.config)
+        self.clients = clients
+        self.scheduler = scheduler
+    
+    def complete(self, prompt: str, max_retries: int = 3,
+                 output_spec: Optional[StructuredOutput] = None) -> Completion:
+        provider = self.scheduler.pick()
+        started = time.perf_counter()
+        try:
+            response = self.clients[provider].complete(prompt, max_retries=max_retries,
+                                                       output_spec=output_spec)
+        except Exception as e:
+            self.scheduler.record(provider, time.perf_counter() - started, success=False)
+            if len(self.clients) < 2:
+                raise
+            # One failover attempt on a different provider
+            fallback = self.scheduler.pick(exclude=[provider])
+            print(f" {provider} failed ({str(e)[:80]}), retrying on {fallback}")
+            started = time.perf_counter()
+            try:
+                response = self.clients[fallback].complete(prompt, max_retries=max_retries,
+                                                           output_spec=output_spec)
+            except Exception:
+                self.scheduler.record(fallback, time.perf_counter() - started, success=False)
+                raise
+            provider = fallback
+        
+        if not response.cached:  # A cache hit says nothing about the provider
+            self.scheduler.record(provider, time.perf_counter() - started, success=True)
+        return response
+    
+    def stream_text(self, prompt: str, max_retries: int = 3,
+                    output_spec: Optional[StructuredOutput] = None) -> Iterator[str]:
+        """Stream from the picked provider; fail over only if nothing was yielded yet."""
+        provider = self.scheduler.pick()
+        tried = []
+        while True:
+            started = time.perf_counter()
+            yielded = False
+            cached = False
+            try:
+                for chunk in self.clients[provider].stream_text(prompt, max_retries=max_retries,
+                                                                output_spec=output_spec):
+                    if not yielded:
+                        cached = isinstance(chunk, CachedChunk)  # Replayed from the response cache
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                self.scheduler.record(provider, time.perf_counter() - started, success=False)
+                tried.append(provider)
+                if yielded or len(tried) > 1 or len(self.clients) < 2:
+                    raise
+                fallback = self.scheduler.pick(exclude=tried)
+                print(f" {provider} failed ({str(e)[:80]}), retrying on {fallback}")
+                provider = fallback
+                continue
+            
+            if not cached:
+                self.scheduler.record(provider, time.perf_counter() - started, success=True)
+            return
+
+
+class AsyncLoadBalancedLLMClient(AsyncLLMClient):
+    """Async twin of LoadBalancedLLMClient (shares the same scheduler)."""
+    
+    def __init__(self, clients: Dict[str, AsyncLLMClient], scheduler: ProviderScheduler):
+        first = next(iter(clients.values()))
+        super().__init__(first.config)
+        self.clients = clients
+        self.scheduler = scheduler
+    
+    async def complete(self, prompt: str, max_retries: int = 3,
+                       output_spec: Optional[StructuredOutput] = None) -> Completion:
+        provider = self.scheduler.pick()
+        started = time.perf_counter()
+        try:
+            response = await self.clients[provider].complete(prompt, max_retries=max_retries,
+                                                             output_spec=output_spec)
+        except Exception as e:
+            self.scheduler.record(provider, time.perf_counter() - started, success=False)
+            if len(self.clients) < 2:
+                raise
+            fallback = self.scheduler.pick(exclude=[provider])
+            print(f" {provider} failed ({str(e)[:80]}), retrying on {fallback}")
+            started = time.perf_counter()
+            try:
+                response = await self.clients[fallback].complete(prompt, max_retries=max_retries,
+                                                                 output_spec=output_spec)
+            except Exception:
+                self.scheduler.record(fallback, time.perf_counter() - started, success=False)
+                raise
+            provider = fallback
+        
+        if not response.cached:  # A cache hit says nothing about the provider
+            self.scheduler.record(provider, time.perf_counter() - started, success=True)
+        return response
+    
+    async def stream_text(self, prompt: str, max_retries: int = 3,
+                          output_spec: Optional[StructuredOutput] = None) -> AsyncIterator[str]:
+        provider = self.scheduler.pick()
+        tried = []
+        while True:
+            started = time.perf_counter()
+            yielded = False
+            cached = False
+            try:
+                async for chunk in self.clients[provider].stream_text(prompt, max_retries=max_retries,
+                                                                      output_spec=output_spec):
+                    if not yielded:
+                        cached = isinstance(chunk, CachedChunk)  # Replayed from the response cache
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                self.scheduler.record(provider, time.perf_counter() - started, success=False)
+                tried.append(provider)
+                if yielded or len(tried) > 1 or len(self.clients) < 2:
+                    raise
+                fallback = self.scheduler.pick(exclude=tried)
+                print(f" {provider} failed ({str(e)[:80]}), retrying on {fallback}")
+                provider = fallback
+                continue
+            
+            if not cached:
+                self.scheduler.record(provider, time.perf_counter() - started, success=True)
+            return
+    
+    async def aclose(self):
+        for client in self.clients.values():
+            await client.aclose()
@@ -0,0 +1,127 @@
+"""
+Structured output (JSON mode / JSON schema) specs for LLM requests.
+
+Without constraints the model can wrap JSON in prose, break it off, or add
+trailing commas, and every reply that cannot be parsed costs another full
+LLM call. Providers can constrain decoding instead:
+
+- json_schema: the reply must match a JSON schema (OpenAI structured outputs)
+- json_object: the reply must be a JSON object (OpenAI and DeepSeek JSON mode)
+
+Both modes require an object at the top level, so arrays are requested
+wrapped: {"users": [...]} / {"events": [...]}. The schemas come from the
+pydantic models with system-assigned fields (ids, timestamps) removed, so
+they stay in sync with validation.
+
+Each client has a `structured_output` mode (api.<provider>.structured_output)
+and steps down json_schema -> json_object -> none when the model rejects it.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Type
+
+from pydantic import BaseModel
+
+from .data_models import User, CalendarEvent, ProfessionTemplate
+
+
+STRUCTURED_OUTPUT_MODES = ("json_schema", "json_object", "none")
+
+# Keywords rejected by strict schema mode (constraints are re-checked by pydantic)
+_UNSUPPORTED_KEYWORDS = ("title", "default", "minLength", "maxLength", "minimum", "maximum", "minItems", "maxItems")
+
+
+def _strict_schema(node: Any) -> Any:
+    """Rewrite a pydantic JSON schema into the strict subset providers accept.
+    
+    Every object lists all its properties as required and forbids extras;
+    optional fields stay nullable through their anyOf [..., null]. Formats
+    are folded into the description, where the model still sees them.
+    """
+    if isinstance(node, list):
+        return [_strict_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    
+    result = {}
+    for key, value in node.items():
+        if key in _UNSUPPORTED_KEYWORDS or key == 'format':
+            continue
+        if key in ('properties', '$defs'):
+            result[key] = {name: _strict_schema(child) for name, child in value.items()}
+        else:
+            result[key] = _strict_schema(value)
+    
+    if 'format' in node:
+        description = node.get('description')
+        result['description'] = f"{description} ({node['format']})" if description else node['format']
+    if 'properties' in node:
+        # Model docstrings are not instructions for the LLM
+        result.pop('description', None)
+        result['required'] = list(node['properties'])
+        result['additionalProperties'] = False
+    return result
+
+
+class StructuredOutput:
+    """What a request should return: a list of `model` items under `key`."""
+    
+    def __init__(self, name: str, key: str, model: Type[BaseModel], system_fields: Iterable[str]):
+        """
+        Args:
+            name: Schema name sent to the provider
+            key: Top-level key wrapping the list (e.g. 'users')
+            model: Pydantic model of one item
+            system_fields: Fields filled in by the application, not the LLM
+        """
+        self.name = name
+        self.key = key
+        
+        item_schema = model.model_json_schema()
+        for field in system_fields:
+            item_schema['properties'].pop(field, None)
+            if field in item_schema.get('required', []):
+                item_schema['required'].remove(field)
+        
+        defs = item_schema.pop('$defs', None)
+        schema = {
+            'type': 'object',
+            'properties': {key: {'type': 'array', 'items': item_schema}},
+        }
+        if defs:
+            schema['$defs'] = defs
+        self.schema = _strict_schema(schema)
+    
+    @property
+    def instruction(self) -> str:
+        """Prompt addition for JSON mode, which fixes the syntax but not the shape."""
+        return f'\n\nWrap the array in a JSON object: {{"{self.key}": [ ... ]}}'
+    
+    def response_format(self, mode: str) -> Optional[Dict[str, Any]]:
+        """The `response_format` request parameter for a mode (None = plain request)."""
+        if mode == 'json_schema':
+            return {
+                'type': 'json_schema',
+                'json_schema': {'name': self.name, 'strict': True, 'schema': self.schema}
+            }
+        if mode == 'json_object':
+            return {'type': 'json_object'}
+        return None
+
+
+def unwrap_items(parsed: Any) -> Any:
+    """Return the list inside a {"users": [...]}-style wrapper object.
+    
+    A dict holding exactly one list is unwrapped; anything else (a bare
+    array, or a single item object) is returned unchanged.
+    """
+    if isinstance(parsed, dict):
+        lists = [value for value in parsed.values() if isinstance(value, list)]
+        if len(lists) == 1 and len(parsed) == 1:
+            return lists[0]
+    return parsed
+
+
+USER_OUTPUT = StructuredOutput('calendar_users', 'users', User, system_fields=('user_id', 'created_at'))
+EVENT_OUTPUT = StructuredOutput('calendar_events', 'events', CalendarEvent,
+                                system_fields=('event_id', 'user_id', 'created_at'))
+TEMPLATE_OUTPUT = StructuredOutput('calendar_templates', 'professions', ProfessionTemplate, system_fields=())
@@ -0,0 +1,219 @@
+"""
+Global uniqueness index for generated users, stored in Redis.
+
+Duplicate checks used to live in the prompt: every call listed the names
+and emails generated so far, so prompts grew with the dataset and nothing
+stopped a second run (or a parallel worker) from producing the same people.
+This module moves the check into Redis, where every run and worker sees it:
+
+- Values are normalized first (case, accents, whitespace) so "José  Díaz"
+  and "jose diaz" collide
+- A user is claimed atomically; losers of a race are rejected and the
+  generator re-requests them
+- Users saved before the index existed are caught through the `email:{email}`
+  keys RedisManager already writes
+
+Only emails are claimed by default. Names can be added (fields: ["email",
+"name"]), but a name index never forgets: after a few hundred users common
+names start to be rejected.
+
+Backends:
+- "set":   one Redis set per field (exact, memory grows with the dataset)
+- "bloom": one fixed-size bitmap (SETBIT test-and-set with k hash
+  functions). Memory is constant, at the cost of a small false-positive
+  rate: an unseen value is occasionally rejected and simply regenerated.
+
+Design Pattern: Strategy
+- UniquenessIndex.from_config picks the backend; the generator only calls claim()
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence
+
+import redis
+
+from .data_models import User
+
+
+KEY_PREFIX = "uniq:"
+SUPPORTED_FIELDS = ("email", "name")
+DEFAULT_FIELDS = ("email",)
+
+
+def normalize_email(email: str) -> str:
+    """Case-insensitive, whitespace-free form of an email address."""
+    return email.strip().lower()
+
+
+def normalize_name(name: str) -> str:
+    """Accent-, case- and whitespace-insensitive form of a person's name."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', stripped).strip().casefold()
+
+
+NORMALIZERS = {
+    'email': lambda user: normalize_email(user.email),
+    'name': lambda user: normalize_name(user.name)
+}
+
+
+class UniquenessIndex:
+    """Base class: claims users whose normalized fields were never seen."""
+    
+    def __init__(self, client: redis.Redis, fields: Sequence[str] = DEFAULT_FIELDS):
+        """
+        Args:
+            client: Redis client (shared with RedisManager)
+            fields: User fields that must be unique ('email', 'name')
+        """
+        unknown = set(fields) - set(SUPPORTED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported uniqueness fields: {', '.join(sorted(unknown))}")
+        
+        self.client = client
+        self.fields = list(fields)
+    
+    def _existing_email_flags(self, users: List[User]) -> List[bool]:
+        """True for users whose email already has an `email:{email}` key."""
+        if 'email' not in self.fields:
+            return [False] * len(users)
+        pipe = self.client.pipeline(transaction=False)
+        for user in users:
+            pipe.exists(f"email:{user.email}")
+        return [bool(found) for found in pipe.execute()]
+    
+    def claim(self, users: List[User]) -> List[bool]:
+        """Reserve the given users' normalized fields.
+        
+        Args:
+            users: Validated users from one LLM response
+        
+        Returns:
+            One flag per user: True if the user was unique and is now claimed
+        """
+        raise NotImplementedError
+    
+    def release(self, users: List[User]):
+        """Give back the claims of users that were never saved (e.g. the run failed).
+        
+        Args:
+            users: Users claimed by this index
+        """
+        raise NotImplementedError
+    
+    @staticmethod
+    def from_config(config: Dict[str, Any], client: redis.Redis) -> Optional["UniquenessIndex"]:
+        """Create the index described by generation.uniqueness (None if disabled)."""
+        if not config.get('enabled', True):
+            return None
+        
+        fields = config.get('fields', list(DEFAULT_FIELDS))
+        backend = config.get('backend', 'set')
+        if backend == 'set':
+            return RedisSetIndex(client, fields)
+        if backend == 'bloom':
+            return RedisBloomIndex(client, fields,
+                                   bits=int(config.get('bloom_bits', 2 ** 24)),
+                                   hashes=int(config.get('bloom_hashes', 7)))
+        raise ValueError(f"Unsupported uniqueness backend: {backend}")
+
+
+class RedisSetIndex(UniquenessIndex):
+    """Exact index: one Redis set of normalized values per field (SADD)."""
+    
+    def claim(self, users: List[User]) -> List[bool]:
+        if not users:
+            return []
+        
+        existing = self._existing_email_flags(users)
+        
+        # SADD is atomic, so two workers can never both add the same value
+        pipe = self.client.pipeline(transaction=False)
+        for user in users:
+            for field in self.fields:
+                pipe.sadd(f"{KEY_PREFIX}{field}", NORMALIZERS[field](user))
+        added = pipe.execute()
+        
+        claimed = []
+        undo = self.client.pipeline(transaction=False)
+        for i, user in enumerate(users):
+            flags = added[i * len(self.fields):(i + 1) * len(self.fields)]
+            unique = all(flags) and not existing[i]
+            claimed.append(unique)
+            if not unique:
+                # Give back the values this user did reserve (e.g. a new email with a taken name)
+                for field, flag in zip(self.fields, flags):
+                    if flag:
+                        undo.srem(f"{KEY_PREFIX}{field}", NORMALIZERS[field](user))
+        undo.execute()
+        return claimed
+    
+    def release(self, users: List[User]):
+        if not users:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for user in users:
+            for field in self.fields:
+                pipe.srem(f"{KEY_PREFIX}{field}", NORMALIZERS[field](user))
+        pipe.execute()
+
+
+class RedisBloomIndex(UniquenessIndex):
+    """Constant-memory index: a Bloom filter in a Redis bitmap.
+    
+    Each value sets `hashes` bits (double hashing over one blake2b digest).
+    SETBIT returns the previous bit, so testing and inserting happen in the
+    same command; the commands for a response run in one MULTI block, so
+    concurrent workers cannot interleave between the test and the set.
+    
+    With the defaults (2^24 bits = 2 MB, 7 hashes) the false-positive rate
+    stays below 1% up to about 1.7 million stored values.
+    """
+    
+    def __init__(self, client: redis.Redis, fields: Sequence[str] = DEFAULT_FIELDS,
+                 bits: int = 2 ** 24, hashes: int = 7):
+        super().__init__(client, fields)
+        if bits <= 0 or hashes <= 0:
+            raise ValueError("bloom_bits and bloom_hashes must be positive")
+        self.bits = bits
+        self.hashes = hashes
+        self.key = f"{KEY_PREFIX}bloom"
+    
+    def _positions(self, field: str, value: str) -> List[int]:
+        digest = hashlib.blake2b(f"{field}:{value}".encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+    
+    def claim(self, users: List[User]) -> List[bool]:
+        if not users:
+            return []
+        
+        existing = self._existing_email_flags(users)
+        
+        pipe = self.client.pipeline(transaction=True)
+        for user in users:
+            for field in self.fields:
+                for position in self._positions(field, NORMALIZERS[field](user)):
+                    pipe.setbit(self.key, position, 1)
+        previous = pipe.execute()
+        
+        # A value was unseen if any of its bits was still 0. Bits cannot be
+        # cleared again, so a rejected user's new values stay marked (a
+        # harmless false positive for values that were never saved).
+        per_value = self.hashes
+        per_user = per_value * len(self.fields)
+        claimed = []
+        for i in range(len(users)):
+            bits = previous[i * per_user:(i + 1) * per_user]
+            values_new = [not all(bits[j:j + per_value]) for j in range(0, per_user, per_value)]
+            claimed.append(all(values_new) and not existing[i])
+        return claimed
+    
+    def release(self, users: List[User]):
+        # Bits are shared between values and cannot be cleared: the values of
+        # an unsaved user stay marked, like any other false positive
+        pass